@@ -1,3 +1,3 @@
 """ML package init for static analyzers and imports."""
 
-__all__ = ["data_loader", "train", "predict"]
+__all__ = ["data_loader", "train", "predict", "inference", "registry", "synthetic", "matrix_store", "evaluation", "scoring_worker", "drift"]
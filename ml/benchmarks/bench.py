@@ -0,0 +1,321 @@
+"""
+Performance benchmarks for the Python ML paths.
+
+Covers single-row and batch inference, feature building, threshold search,
+end-to-end training, in-process /predict latency (cache misses and hits
+timed separately) and Postgres reads (single query vs partitioned; needs
+DATABASE_URL). Results are written as JSON; pass --compare to diff against
+an earlier run and exit non-zero when a benchmark got slower than the
+tolerance allows.
+
+    python -m ml.benchmarks.bench                       # all suites, default sizes
+    python -m ml.benchmarks.bench --sizes 10000 --only predict,features
+    python -m ml.benchmarks.bench --output new.json --compare baseline.json
+    DATABASE_URL=postgresql://localhost/gitvitals python -m ml.benchmarks.bench --only db
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+for extra in (REPO_ROOT, REPO_ROOT / "ml", REPO_ROOT / "ml" / "src"):
+    if str(extra) not in sys.path:
+        sys.path.insert(0, str(extra))
+
+from ml.inference import compile_model  # noqa: E402
+from ml.predict import predict_batch, predict_from_json  # noqa: E402
+from ml.train import best_threshold, make_synthetic_data, train_model  # noqa: E402
+
+DEFAULT_OUTPUT = REPO_ROOT / "ml" / "benchmarks" / "results" / "latest.json"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+MAX_BATCH_ROWS = 100_000
+SUITES = ["predict", "batch", "features", "threshold", "train", "service", "db"]
+DB_PARTITIONS = [2, 4, 8, 16]
+
+EXAMPLE_PAYLOAD = {
+    "age_years": 30.0,
+    "bp_systolic": 120.0,
+    "bp_diastolic": 80.0,
+    "heart_rate": 72.0,
+    "temperature": 98.6,
+    "respiratory_rate": 16.0,
+    "oxygen_saturation": 98.0,
+    "pulse_pressure": 40.0,
+    "pain_level": 2.0,
+}
+
+EXAMPLE_VITALS = {
+    "age_years": 30,
+    "heart_rate": 72,
+    "resp_rate": 16,
+    "temp_f": 98.6,
+    "spo2_pct": 98,
+    "systolic_bp": 120,
+    "diastolic_bp": 80,
+    "height_ft": 5,
+    "height_in": 7,
+    "weight_lb": 160,
+    "pain_0_10": 2,
+}
+
+
+def measure(fn: Callable[[], Any], number: int = 1, repeat: int = 5, rows: int | None = None) -> dict:
+    """Time ``fn``; reports seconds per call (min/median) and rows/sec if given."""
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    median = statistics.median(samples)
+    out = {"median_s": median, "min_s": min(samples), "repeat": repeat, "number": number}
+    if rows:
+        out["rows"] = rows
+        out["rows_per_s"] = rows / median if median > 0 else float("inf")
+    return out
+
+
+def _fit_reference_model(n: int = 20_000) -> tuple[Any, dict]:
+    out = train_model(make_synthetic_data(n))
+    return out["model"], out["metrics"]
+
+
+def bench_predict(results: dict, sizes: list[int]) -> None:
+    model, metrics = _fit_reference_model()
+    names = metrics["feature_names"]
+    engine = compile_model(model, names)
+    payload = {k: EXAMPLE_PAYLOAD[k] for k in names}
+    results["predict_from_json/compiled"] = measure(
+        lambda: predict_from_json(engine, payload, names, 0.5, metrics), number=1000
+    )
+    results["predict_from_json/sklearn"] = measure(
+        lambda: predict_from_json(model, payload, names, 0.5, metrics), number=100
+    )
+
+
+def bench_batch(results: dict, sizes: list[int]) -> None:
+    model, metrics = _fit_reference_model()
+    names = metrics["feature_names"]
+    engine = compile_model(model, names)
+    # Payloads are Python dicts (~600 B/row); cap so 1M-row runs fit in RAM.
+    for n in (n for n in sizes if n <= MAX_BATCH_ROWS):
+        payloads = make_synthetic_data(n, seed=11).drop(columns=["at_risk"]).to_dict("records")
+        results[f"predict_batch/compiled/{n}"] = measure(
+            lambda: predict_batch(engine, payloads, names, 0.5, metrics), repeat=3, rows=n
+        )
+
+
+def bench_features(results: dict, sizes: list[int]) -> None:
+    import pandas as pd
+    from vitalsml.features import build_feature_dict, build_feature_matrix, vectorize
+
+    results["features/build_feature_dict"] = measure(lambda: build_feature_dict(EXAMPLE_VITALS), number=10_000)
+    results["features/vectorize"] = measure(lambda: vectorize(EXAMPLE_VITALS), number=10_000)
+    for n in sizes:
+        frame = pd.DataFrame({k: np.full(n, float(v)) for k, v in EXAMPLE_VITALS.items()})
+        results[f"features/build_feature_matrix/{n}"] = measure(
+            lambda: build_feature_matrix(frame), repeat=3, rows=n
+        )
+
+
+def bench_threshold(results: dict, sizes: list[int]) -> None:
+    rng = np.random.default_rng(3)
+    for n in sizes:
+        y = rng.integers(0, 2, size=n)
+        prob = rng.random(n)
+        results[f"best_threshold/grid/{n}"] = measure(lambda: best_threshold(y, prob), repeat=3, rows=n)
+        results[f"best_threshold/exact/{n}"] = measure(lambda: best_threshold(y, prob, None), repeat=3, rows=n)
+
+
+def bench_train(results: dict, sizes: list[int]) -> None:
+    for n in sizes:
+        df = make_synthetic_data(n)
+        results[f"train_model/{n}"] = measure(lambda: train_model(df), repeat=1, rows=n)
+
+
+def bench_service(results: dict, sizes: list[int]) -> None:
+    try:
+        from fastapi.testclient import TestClient
+        from service.api import app
+    except Exception as exc:  # missing httpx or model artifacts
+        print(f"  skipping service suite: {exc}", file=sys.stderr)
+        return
+
+    from service import api
+
+    # Distinct readings, so misses really run inference; a repeated payload
+    # would time the prediction cache after the first call.
+    number, repeat = 200, 5
+    readings = _service_readings(number * (repeat + 1))
+    hot = readings[:20]
+
+    with TestClient(app) as client:
+        def run(name: str, pool: list[dict]) -> None:
+            it = iter(pool * (len(readings) // len(pool) + 1))
+
+            def call() -> None:
+                resp = client.post("/predict", json=next(it))
+                resp.raise_for_status()
+
+            cache = api.prediction_cache
+            before = cache.stats() if cache is not None else None
+            results[name] = measure(call, number=number, repeat=repeat)
+            if cache is not None:
+                after = cache.stats()
+                hits = after["hits"] - before["hits"]
+                lookups = hits + after["misses"] - before["misses"]
+                results[name]["cache_hit_rate"] = hits / max(lookups, 1)
+
+        run("service/predict/miss", readings)
+        if api.prediction_cache is None:
+            print("  skipping service/predict/hit: prediction cache disabled", file=sys.stderr)
+            return
+        for reading in hot:  # fill the cache
+            client.post("/predict", json=reading).raise_for_status()
+        run("service/predict/hit", hot)
+
+
+def _service_readings(n: int) -> list[dict]:
+    """``n`` distinct, valid /predict bodies built from synthetic vitals."""
+    df = make_synthetic_data(n, seed=11)
+    return [
+        {
+            **EXAMPLE_VITALS,
+            "age_years": round(max(float(r.age_years), 0.0), 3),
+            "heart_rate": round(max(float(r.heart_rate), 0.0), 3),
+            "resp_rate": round(max(float(r.respiratory_rate), 0.0), 3),
+            "temp_f": round(float(r.temperature), 3),
+            "spo2_pct": round(min(max(float(r.oxygen_saturation), 0.0), 100.0), 3),
+            "systolic_bp": round(max(float(r.bp_systolic), 0.0), 3),
+            "diastolic_bp": round(max(float(r.bp_diastolic), 0.0), 3),
+            "pain_0_10": round(min(max(float(r.pain_level), 0.0), 10.0), 3),
+        }
+        for r in df.itertuples(index=False)
+    ]
+
+
+def bench_db(results: dict, sizes: list[int]) -> None:
+    if not (os.environ.get("DATABASE_URL") or os.environ.get("SUPABASE_DB_URL")):
+        print("  skipping db suite: DATABASE_URL is not set", file=sys.stderr)
+        return
+    from ml.data_loader import load_training_data_from_db
+
+    def load(**kwargs: Any) -> Any:
+        with contextlib.redirect_stdout(io.StringIO()):  # the loader prints a summary per call
+            return load_training_data_from_db(**kwargs)
+
+    rows = len(load())
+    results["db/single_query"] = measure(load, repeat=3, rows=rows)
+    for p in DB_PARTITIONS:
+        results[f"db/partitioned/{p}"] = measure(lambda: load(partitions=p), repeat=3, rows=rows)
+
+
+SUITE_FUNCS: dict[str, Callable[[dict, list[int]], None]] = {
+    "predict": bench_predict,
+    "batch": bench_batch,
+    "features": bench_features,
+    "threshold": bench_threshold,
+    "train": bench_train,
+    "service": bench_service,
+    "db": bench_db,
+}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Names of benchmarks whose best time slowed down by more than ``tolerance``.
+
+    Uses ``min_s`` rather than the median: it is the least noisy estimate of
+    what the code itself costs.
+    """
+    regressions = []
+    print(f"{'benchmark':48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, cur in sorted(current["results"].items()):
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:48} {'-':>12} {cur['min_s']:12.6f} {'new':>8}")
+            continue
+        change = cur["min_s"] / base["min_s"] - 1.0 if base["min_s"] > 0 else 0.0
+        flag = " <-- regression" if change > tolerance else ""
+        print(f"{name:48} {base['min_s']:12.6f} {cur['min_s']:12.6f} {change:+8.1%}{flag}")
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark GitVitals ML hot paths")
+    parser.add_argument(
+        "--sizes",
+        type=str,
+        default=",".join(str(n) for n in DEFAULT_SIZES),
+        help="Comma-separated row counts for the size-dependent suites.",
+    )
+    parser.add_argument("--only", type=str, default="", help=f"Comma-separated suites from {SUITES}.")
+    parser.add_argument("--output", type=str, default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--compare", type=str, default="", help="Baseline JSON from an earlier run.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown before --compare reports a regression (0.2 = 20%%).",
+    )
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    suites = [s.strip() for s in args.only.split(",") if s.strip()] or SUITES
+    unknown = sorted(set(suites) - set(SUITES))
+    if unknown:
+        raise ValueError(f"Unknown suites: {unknown}. Choose from {SUITES}")
+
+    results: dict[str, dict] = {}
+    for suite in suites:
+        print(f"Running {suite} ...")
+        SUITE_FUNCS[suite](results, sizes)
+
+    import sklearn
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "sizes": sizes,
+            "suites": suites,
+        },
+        "results": results,
+    }
+    output = Path(args.output).expanduser().resolve()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results: {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).expanduser().read_text())
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {regressions}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        for name, r in results.items():
+            rate = f"  {r['rows_per_s']:,.0f} rows/s" if "rows_per_s" in r else ""
+            print(f"{name:48} {r['median_s'] * 1e3:10.3f} ms{rate}")
+
+
+if __name__ == "__main__":
+    main()
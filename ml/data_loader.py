@@ -4,10 +4,34 @@ Connects to Supabase Postgres and loads training data from ml_training_data view
 """
 from __future__ import annotations
 
+import json
 import os
+import resource
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
 
+import numpy as np
 import pandas as pd
 import psycopg
+from psycopg_pool import ConnectionPool
+
+try:
+    from ml.matrix_store import DEFAULT_DTYPE, frame_chunks_to_matrix, write_dataset
+except Exception:
+    from matrix_store import DEFAULT_DTYPE, frame_chunks_to_matrix, write_dataset
+
+METADATA_COLUMNS = ["id", "studentId", "patientId", "readingNumber", "submittedAt", "gradedAt"]
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_PARTITIONS = 8
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = REPO_ROOT / "ml" / "data" / "cache"
+MATRIX_DIR = REPO_ROOT / "ml" / "data" / "matrix"
+_ID_COLUMNS = ["id", "studentId", "patientId"]
+_TIME_COLUMNS = ["submittedAt", "gradedAt"]
+
 
 def get_database_url() -> str:
     """
@@ -23,9 +47,315 @@ def get_database_url() -> str:
     return url
 
 
+def _build_query(view_name: str, limit: int | None, where: str | None = None) -> str:
+    query = f'SELECT * FROM "{view_name}"'
+    if where:
+        query += f" WHERE {where}"
+    if limit is not None and limit > 0:
+        query += f" LIMIT {limit}"
+    return query
+
+
+# Storage dtypes for the ml_training_data columns. Integer vitals are stored
+# as the planned integer type only when a chunk has no missing or fractional
+# values (and fits); otherwise as float32, which still holds every vital
+# exactly enough and keeps NaN. Other numeric columns default to float32.
+# Features become float64 once, inside the model's StandardScaler.
+TRAINING_DTYPES: dict[str, str] = {
+    "age_years": "float32",
+    "bp_systolic": "int16",
+    "bp_diastolic": "int16",
+    "heart_rate": "int16",
+    "temperature": "float32",
+    "respiratory_rate": "int16",
+    "oxygen_saturation": "uint8",
+    "pulse_pressure": "int16",
+    "pain_level": "uint8",
+    "at_risk": "int8",
+}
+_DEFAULT_FEATURE_DTYPE = "float32"
+
+
+def _fits_integer(raw: np.ndarray, dtype: np.dtype) -> bool:
+    if raw.size == 0:
+        return True
+    if raw.dtype.kind == "f" and (np.isnan(raw).any() or (raw != np.round(raw)).any()):
+        return False
+    info = np.iinfo(dtype)
+    return info.min <= raw.min() and raw.max() <= info.max
+
+
+def _compact_column(values: pd.Series, dtype: str) -> pd.Series:
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        values = pd.to_numeric(values, errors="coerce")
+    target = np.dtype(dtype)
+    if target.kind in "iu" and not _fits_integer(values.to_numpy(), target):
+        target = np.dtype(_DEFAULT_FEATURE_DTYPE)
+    # Already-compact columns pass through as-is (astype(copy=False) is
+    # deprecated in pandas 3, where astype is copy-on-write anyway).
+    return values if values.dtype == target else values.astype(target)
+
+
+def compact_frame(df: pd.DataFrame, plan: dict[str, str] | None = None) -> pd.DataFrame:
+    """Coerce every non-metadata column to its planned compact dtype (see TRAINING_DTYPES)."""
+    plan = TRAINING_DTYPES if plan is None else plan
+    out = {}
+    for col in df.columns:
+        if col in METADATA_COLUMNS:
+            out[col] = df[col]
+        else:
+            out[col] = _compact_column(df[col], plan.get(col, _DEFAULT_FEATURE_DTYPE))
+    compact = pd.DataFrame(out, index=df.index)
+    compact.attrs.update(df.attrs)
+    return compact
+
+
+def _prepare_frame(df: pd.DataFrame, keep_metadata: bool = False) -> pd.DataFrame:
+    """Drop metadata columns, drop unlabeled rows and store features in compact dtypes."""
+    if not keep_metadata:
+        df = df.drop(columns=[c for c in METADATA_COLUMNS if c in df.columns], errors="ignore")
+
+    if "at_risk" in df.columns:
+        df = df[pd.to_numeric(df["at_risk"], errors="coerce").notna()]
+    return compact_frame(df)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def log_memory(stage: str, data: pd.DataFrame | np.ndarray | None = None) -> None:
+    """Print the size of ``data`` next to its all-float64 size, and the peak RSS."""
+    parts = []
+    if data is not None:
+        if isinstance(data, pd.DataFrame):
+            nbytes = int(data.memory_usage(index=False).sum())
+        else:
+            nbytes = int(data.nbytes)
+        rows = data.shape[0]
+        cols = data.shape[1] if data.ndim > 1 else 1
+        parts.append(
+            f"{rows:,} x {cols} = {nbytes / 2**20:.1f} MiB "
+            f"(float64 would be {rows * cols * 8 / 2**20:.1f} MiB)"
+        )
+    parts.append(f"peak RSS {peak_rss_mb():.1f} MiB")
+    print(f"  Memory [{stage}]: " + ", ".join(parts))
+
+
+def iter_training_data_from_db(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int | None = None,
+    view_name: str = "ml_training_data",
+    keep_metadata: bool = False,
+    where: str | None = None,
+    params: tuple = (),
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream training data from Postgres in typed chunks.
+
+    Uses a server-side (named) cursor so only ``chunk_size`` rows are held as
+    Python objects at any time; each chunk is converted to a numeric
+    DataFrame before the next one is fetched.
+
+    Args:
+        chunk_size: Rows per yielded DataFrame
+        limit: Optional row limit for testing (default: all rows)
+        view_name: Name of the SQL view to query (default: ml_training_data)
+        keep_metadata: Keep id/timestamp columns (needed for write-back and caching)
+        where: Optional SQL filter, with %s placeholders bound from params
+        params: Values for the placeholders in where
+
+    Yields:
+        DataFrames with the same columns load_training_data_from_db returns
+
+    Raises:
+        ValueError: If DATABASE_URL is not set or chunk_size < 1
+        RuntimeError: If the database query fails
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    query = _build_query(view_name, limit, where)
+    yield from _stream_query(query, params, view_name, chunk_size, keep_metadata)
+
+
+def _stream_query(
+    query: str, params: tuple | dict, name: str, chunk_size: int, keep_metadata: bool
+) -> Iterator[pd.DataFrame]:
+    try:
+        with psycopg.connect(get_database_url()) as conn:
+            with conn.cursor(name=f"{name}_stream") as cur:
+                cur.itersize = chunk_size
+                cur.execute(query, params or None)
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    columns = [d.name for d in cur.description]
+                    chunk = pd.DataFrame.from_records(rows, columns=columns)
+                    del rows
+                    yield _prepare_frame(chunk, keep_metadata=keep_metadata)
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when querying {name}: {e}") from e
+
+
+# The ml_training_data feature expressions, read straight from "VitalReading"
+# with the patient's age: the view has no age and only holds labeled rows.
+# Shared with scoring_worker.py; needs migrations/003_add_risk_scores.sql.
+READINGS_SELECT = """
+SELECT
+  vr.id,
+  vr."studentId",
+  vr."patientId",
+  vr."readingNumber",
+  p.age AS age_years,
+  vr."bloodPressureSystolic" AS bp_systolic,
+  vr."bloodPressureDiastolic" AS bp_diastolic,
+  vr."heartRate" AS heart_rate,
+  CAST(vr.temperature AS FLOAT) AS temperature,
+  vr."respiratoryRate" AS respiratory_rate,
+  vr."oxygenSaturation" AS oxygen_saturation,
+  (vr."bloodPressureSystolic" - vr."bloodPressureDiastolic") AS pulse_pressure,
+  COALESCE(vr."pain0to10", 0) AS pain_level
+FROM "VitalReading" vr
+LEFT JOIN "Patient" p ON p.id = vr."patientId"
+"""
+UNSCORED_FILTER = 'vr."riskScoredAt" IS NULL'
+
+
+def iter_unscored_readings(chunk_size: int = DEFAULT_CHUNK_SIZE, limit: int | None = None) -> Iterator[pd.DataFrame]:
+    """Stream readings the scoring worker has not scored yet, oldest first, with ids."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    query = READINGS_SELECT + f'WHERE {UNSCORED_FILTER}\nORDER BY vr."submittedAt", vr.id'
+    if limit is not None and limit > 0:
+        query += f"\nLIMIT {int(limit)}"
+    yield from _stream_query(query, (), "unscored_readings", chunk_size, keep_metadata=True)
+
+
+_DELTA_FILTER = '"gradedAt" > %s OR ("gradedAt" = %s AND id > %s)'
+
+
+def _delta_params(watermark: dict) -> tuple:
+    return (watermark["gradedAt"], watermark["gradedAt"], watermark["id"])
+
+
+def compute_watermark(df: pd.DataFrame) -> dict | None:
+    """Latest (gradedAt, id) pair in a frame that still has metadata columns."""
+    if "gradedAt" not in df.columns or "id" not in df.columns:
+        return None
+    graded = df["gradedAt"].dropna()
+    if graded.empty:
+        return None
+    graded = pd.to_datetime(graded, utc=True)
+    latest = graded.max()
+    ids = df.loc[graded.index[graded == latest], "id"].astype(str)
+    return {"gradedAt": latest.isoformat(), "id": ids.max()}
+
+
+def _partition_filters(
+    conn: psycopg.Connection, view_name: str, partitions: int, where: str | None, params: tuple
+) -> list[tuple[str, tuple]]:
+    """Split the view into ``submittedAt`` ranges of roughly equal row counts.
+
+    Boundaries are quantiles from one ``percentile_disc`` query; repeated
+    boundaries (many rows sharing a timestamp) collapse, so fewer ranges
+    than asked for can come back. Rows with a NULL submittedAt go to the
+    first range.
+    """
+    fractions = [i / partitions for i in range(1, partitions)]
+    query = f'SELECT percentile_disc(%s::float8[]) WITHIN GROUP (ORDER BY "submittedAt") FROM "{view_name}"'
+    if where:
+        query += f" WHERE {where}"
+    row = conn.execute(query, (fractions, *params)).fetchone()
+    bounds = sorted({b for b in (row[0] or []) if b is not None})
+
+    edges = [None, *bounds, None]
+    filters = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if lo is None and hi is None:
+            filters.append(("TRUE", ()))
+        elif lo is None:
+            filters.append(('("submittedAt" < %s OR "submittedAt" IS NULL)', (hi,)))
+        elif hi is None:
+            filters.append(('"submittedAt" >= %s', (lo,)))
+        else:
+            filters.append(('"submittedAt" >= %s AND "submittedAt" < %s', (lo, hi)))
+    return filters
+
+
+def read_view_partitioned(
+    view_name: str = "ml_training_data",
+    partitions: int = DEFAULT_PARTITIONS,
+    pool_size: int | None = None,
+    where: str | None = None,
+    params: tuple = (),
+) -> pd.DataFrame:
+    """
+    Read a view as ``submittedAt`` ranges fetched concurrently over a connection pool.
+
+    Meant for a remote database, where one query over one connection can be
+    bound by round trips and several range queries in flight overlap them.
+    Against a local Postgres (500k rows, 1 CPU) it is no faster than the
+    single query; ``bench.py --only db`` measures both paths. Ranges are
+    concatenated in ascending ``submittedAt`` order and sorted by
+    (submittedAt, id) inside each range, so the result is the same on every
+    run regardless of which fetch finishes first. Metadata columns are kept.
+
+    Args:
+        view_name: Name of the SQL view to query
+        partitions: Number of submittedAt ranges to split the view into
+        pool_size: Connections (and fetch threads); default min(partitions, 8)
+        where: Optional SQL filter, with %s placeholders bound from params
+        params: Values for the placeholders in where
+
+    Raises:
+        ValueError: If DATABASE_URL is not set or partitions/pool_size < 1
+        RuntimeError: If a database query fails
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be >= 1")
+    pool_size = pool_size or min(partitions, 8)
+    if pool_size < 1:
+        raise ValueError("pool_size must be >= 1")
+    base = f"({where}) AND " if where else ""
+
+    def fetch(pool: ConnectionPool, range_filter: str, range_params: tuple) -> pd.DataFrame:
+        query = f'SELECT * FROM "{view_name}" WHERE {base}{range_filter} ORDER BY "submittedAt", id'
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, (*params, *range_params))
+                rows = cur.fetchall()
+                columns = [d.name for d in cur.description]
+        chunk = pd.DataFrame.from_records(rows, columns=columns)
+        del rows
+        return _prepare_frame(chunk, keep_metadata=True)
+
+    try:
+        with ConnectionPool(
+            get_database_url(), min_size=pool_size, max_size=pool_size, name="data-loader", open=True
+        ) as pool:
+            with pool.connection() as conn:
+                filters = _partition_filters(conn, view_name, partitions, where, params)
+            with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="db-read") as executor:
+                # map() yields in submission order, i.e. ascending submittedAt.
+                frames = list(executor.map(lambda f: fetch(pool, *f), filters))
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when querying {view_name}: {e}") from e
+
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
 def load_training_data_from_db(
     limit: int | None = None,
     view_name: str = "ml_training_data",
+    chunk_size: int | None = None,
+    since: dict | None = None,
+    partitions: int | None = None,
+    pool_size: int | None = None,
 ) -> pd.DataFrame:
     """
     Load training data from Supabase Postgres.
@@ -33,26 +363,61 @@ def load_training_data_from_db(
     Args:
         limit: Optional row limit for testing (default: all rows)
         view_name: Name of the SQL view to query (default: ml_training_data)
+        chunk_size: Stream the view through a server-side cursor in chunks of
+            this many rows instead of one read_sql_query call
+        since: Only load rows graded after this (gradedAt, id) watermark
+        partitions: Fetch the view as this many submittedAt ranges in
+            parallel over a connection pool (see read_view_partitioned);
+            cannot be combined with limit or chunk_size
+        pool_size: Connections for the partitioned read
     
     Returns:
-        DataFrame with feature columns and at_risk target column
+        DataFrame with feature columns and at_risk target column. The latest
+        (gradedAt, id) seen is stored in ``df.attrs["watermark"]``.
     
     Raises:
         ValueError: If DATABASE_URL is not set
         psycopg.Error: If database connection or query fails
     """
-    db_url = get_database_url()
+    where = _DELTA_FILTER if since else None
+    params = _delta_params(since) if since else ()
 
-    query = f'SELECT * FROM "{view_name}"'
-    if limit is not None and limit > 0:
-        query += f" LIMIT {limit}"
+    if partitions is not None:
+        if limit is not None or chunk_size is not None:
+            raise ValueError("partitions cannot be combined with limit or chunk_size")
+        df = read_view_partitioned(view_name, partitions, pool_size, where=where, params=params)
+    elif chunk_size is not None:
+        chunks = list(
+            iter_training_data_from_db(
+                chunk_size, limit, view_name, keep_metadata=True, where=where, params=params
+            )
+        )
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+        del chunks
+    else:
+        db_url = get_database_url()
+        query = _build_query(view_name, limit, where)
 
-    try:
-        with psycopg.connect(db_url) as conn:
-            df = pd.read_sql_query(query, conn)
-    except Exception as e:
-        raise RuntimeError(f"Database error when querying {view_name}: {e}") from e
+        try:
+            with psycopg.connect(db_url) as conn:
+                # Compact each chunk as it is built so the full result never
+                # exists as a float64/int64 frame.
+                chunks = [
+                    _prepare_frame(chunk, keep_metadata=True)
+                    for chunk in pd.read_sql_query(
+                        query, conn, params=params or None, chunksize=DEFAULT_CHUNK_SIZE
+                    )
+                ]
+            df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+            del chunks
+        except Exception as e:
+            raise RuntimeError(f"Database error when querying {view_name}: {e}") from e
 
+    if df.empty and since:
+        print(f"No rows graded in {view_name} since {since['gradedAt']}")
+        df = pd.DataFrame()
+        df.attrs["watermark"] = since
+        return df
     if df.empty:
         raise ValueError(
             f"No data returned from {view_name}. "
@@ -64,20 +429,195 @@ def load_training_data_from_db(
     if "at_risk" not in df.columns:
         raise ValueError(f"Target column 'at_risk' not found in {view_name}")
 
-    # Drop metadata columns (keep only features + target)
-    metadata_cols = ["id", "studentId", "patientId", "readingNumber", "submittedAt", "gradedAt"]
-    df = df.drop(columns=[c for c in metadata_cols if c in df.columns], errors="ignore")
+    watermark = compute_watermark(df)
 
-    # Ensure numeric types
-    for col in df.columns:
-        if col != "at_risk":
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    # Drop rows with NaN in target
-    df = df.dropna(subset=["at_risk"])
+    # Drop metadata columns; chunks are already compact and labeled
+    df = _prepare_frame(df)
+    df.attrs["watermark"] = watermark
 
     print(f"Loaded {len(df)} training rows from {view_name}")
     print(f"  Features: {[c for c in df.columns if c != 'at_risk']}")
     print(f"  Target distribution: {df['at_risk'].value_counts().to_dict()}")
+    log_memory("loaded", df)
+
+    return df
+
+
+def export_training_matrix(
+    out_dir: Path = MATRIX_DIR,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int | None = None,
+    view_name: str = "ml_training_data",
+    dtype: type = DEFAULT_DTYPE,
+) -> Path:
+    """
+    Stream the training view into an on-disk matrix dataset (see matrix_store).
+
+    Only one chunk is held in memory at a time, so this works for views far
+    larger than RAM. Rows with a missing feature value are skipped.
+
+    Returns:
+        The dataset directory, for MatrixDataset or train.py --mode out-of-core
+    """
+    frames = (
+        chunk.dropna()
+        for chunk in iter_training_data_from_db(chunk_size, limit, view_name)
+    )
+    try:
+        feature_names, chunks = frame_chunks_to_matrix(frames)
+    except ValueError as e:
+        raise ValueError(f"No labeled rows returned from {view_name}: {e}") from e
+    path = write_dataset(
+        out_dir, chunks, feature_names, dtype=dtype, extra_meta={"source": "db", "view": view_name}
+    )
+    print(f"Exported {view_name} to {path}")
+    print(f"  Peak RSS: {peak_rss_mb():.1f} MiB")
+    return path
+
+
+def _snapshot_paths(cache_dir: Path, view_name: str) -> tuple[Path, Path]:
+    return cache_dir / f"{view_name}.npz", cache_dir / f"{view_name}.meta.json"
 
+
+def _write_snapshot(df: pd.DataFrame, cache_dir: Path, view_name: str) -> dict:
+    """Write the snapshot columns + watermark atomically (tmp file + rename)."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    data_path, meta_path = _snapshot_paths(cache_dir, view_name)
+
+    arrays: dict[str, np.ndarray] = {}
+    for col in df.columns:
+        if col in _TIME_COLUMNS:
+            ts = pd.to_datetime(df[col], utc=True)
+            arrays[col] = ts.to_numpy(dtype="datetime64[ns]").view("int64")
+        elif col in _ID_COLUMNS:
+            arrays[col] = df[col].astype(str).to_numpy(dtype=str)
+        else:
+            arrays[col] = df[col].to_numpy()
+
+    watermark = compute_watermark(df)
+
+    meta = {
+        "view_name": view_name,
+        "row_count": int(len(df)),
+        "columns": list(df.columns),
+        "watermark": watermark,
+    }
+    tmp_data = data_path.with_suffix(".npz.tmp")
+    with open(tmp_data, "wb") as fh:
+        np.savez(fh, **arrays)
+    os.replace(tmp_data, data_path)
+    tmp_meta = meta_path.with_suffix(".json.tmp")
+    tmp_meta.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp_meta, meta_path)
+    return meta
+
+
+def _read_snapshot(cache_dir: Path, view_name: str) -> tuple[pd.DataFrame, dict] | None:
+    data_path, meta_path = _snapshot_paths(cache_dir, view_name)
+    if not data_path.exists() or not meta_path.exists():
+        return None
+    meta = json.loads(meta_path.read_text())
+    with np.load(data_path, allow_pickle=False) as npz:
+        columns = {}
+        for col in meta["columns"]:
+            arr = npz[col]
+            if col in _TIME_COLUMNS:
+                columns[col] = pd.to_datetime(arr, unit="ns", utc=True)
+            else:
+                columns[col] = arr
+    df = pd.DataFrame(columns, columns=meta["columns"])
+    if len(df) != meta["row_count"]:
+        return None
+    return df, meta
+
+
+def _count_rows(view_name: str) -> int:
+    try:
+        with psycopg.connect(get_database_url()) as conn:
+            row = conn.execute(f'SELECT count(*) FROM "{view_name}"').fetchone()
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when counting {view_name}: {e}") from e
+    return int(row[0])
+
+
+def _fetch_all(view_name: str, chunk_size: int, where: str | None = None, params: tuple = ()) -> pd.DataFrame:
+    chunks = list(
+        iter_training_data_from_db(
+            chunk_size, view_name=view_name, keep_metadata=True, where=where, params=params
+        )
+    )
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def sync_training_snapshot(
+    view_name: str = "ml_training_data",
+    cache_dir: Path = CACHE_DIR,
+    refresh: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """
+    Bring the local snapshot of the view up to date and return it (with metadata).
+
+    The first run (or ``refresh=True``) downloads the whole view. Later runs
+    only fetch rows graded after the stored (gradedAt, id) watermark, replace
+    any cached rows with the same id and append the rest. If the merged row
+    count no longer matches ``count(*)`` on the view (rows deleted, labels
+    cleared, or rows without gradedAt), the snapshot is rebuilt from scratch.
+    """
+    cached = None if refresh else _read_snapshot(cache_dir, view_name)
+
+    if cached is not None and cached[1].get("watermark"):
+        snapshot, meta = cached
+        mark = meta["watermark"]
+        delta = _fetch_all(
+            view_name,
+            chunk_size,
+            where=_DELTA_FILTER,
+            params=_delta_params(mark),
+        )
+        if not delta.empty and set(delta.columns) != set(snapshot.columns):
+            print(f"Snapshot {view_name}: view columns changed; doing a full refresh")
+        else:
+            if not delta.empty:
+                delta["id"] = delta["id"].astype(str)
+                for col in _TIME_COLUMNS:
+                    if col in delta.columns:
+                        delta[col] = pd.to_datetime(delta[col], utc=True)
+                snapshot = snapshot[~snapshot["id"].isin(delta["id"])]
+                snapshot = pd.concat([snapshot, delta[snapshot.columns]], ignore_index=True)
+
+            expected = _count_rows(view_name)
+            if len(snapshot) == expected:
+                if not delta.empty:
+                    _write_snapshot(snapshot, cache_dir, view_name)
+                print(f"Snapshot {view_name}: {len(delta)} new/updated rows, {len(snapshot)} total")
+                return snapshot
+            print(
+                f"Snapshot {view_name}: {len(snapshot)} cached rows but view has {expected}; "
+                "doing a full refresh"
+            )
+
+    snapshot = _fetch_all(view_name, chunk_size)
+    _write_snapshot(snapshot, cache_dir, view_name)
+    print(f"Snapshot {view_name}: full refresh, {len(snapshot)} rows")
+    return snapshot
+
+
+def load_training_data_cached(
+    view_name: str = "ml_training_data",
+    cache_dir: Path = CACHE_DIR,
+    refresh: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """Like load_training_data_from_db, but served from the incremental snapshot cache."""
+    snapshot = sync_training_snapshot(view_name, cache_dir, refresh, chunk_size)
+    if snapshot.empty or "at_risk" not in snapshot.columns:
+        raise ValueError(
+            f"No labeled data in {view_name}. "
+            "Ensure the view exists and contains labeled data "
+            "(instructorLabel IS NOT NULL)."
+        )
+    df = _prepare_frame(snapshot.copy())
+    df.attrs["watermark"] = compute_watermark(snapshot)
+    print(f"Loaded {len(df)} training rows from {view_name} (cached)")
     return df
@@ -0,0 +1,143 @@
+"""
+Reference histograms and drift statistics.
+
+Training exports, per feature and per age group, fixed-bin histograms of the
+hold-out inputs and predicted probabilities (``drift_reference`` in
+eval_report.json). The service bins live traffic on the same edges (see
+service/drift.py) and compares the two with PSI and a binned two-sample KS
+statistic, so the comparison never needs raw rows from either side.
+
+Feature edges are hold-out deciles (repeated quantiles collapse, so
+low-cardinality features such as pain_level get fewer bins); probabilities
+use fixed 0.1-wide bins. Bin ``i`` holds values in ``[edges[i-1], edges[i])``.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ml.evaluation import age_group_codes  # pragma: no cover
+    from ml.predict import AGE_GROUPS  # pragma: no cover
+else:
+    try:
+        from ml.evaluation import age_group_codes
+        from ml.predict import AGE_GROUPS
+    except Exception:
+        from evaluation import age_group_codes
+        from predict import AGE_GROUPS
+
+DRIFT_BINS = 10
+PREDICTION_EDGES = [round(0.1 * i, 1) for i in range(1, 10)]
+PREDICTION_KEY = "p_flag"
+# Conventional PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift.
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# Floor for empty bins, so PSI stays finite.
+_PSI_EPSILON = 1e-4
+
+
+def quantile_edges(values: np.ndarray, bins: int = DRIFT_BINS) -> list[float]:
+    """Interior decile-style edges of ``values`` (NaN ignored, duplicates dropped)."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0 or bins < 2:
+        return []
+    edges = np.unique(np.quantile(values, np.arange(1, bins) / bins))
+    # An edge at the minimum would leave the first bin empty by construction.
+    return [float(e) for e in edges if e > values.min()]
+
+
+class ReferenceBuilder:
+    """Accumulate reference histograms batch by batch on fixed edges."""
+
+    def __init__(self, feature_names: list[str], feature_edges: dict[str, list[float]]):
+        self.feature_names = list(feature_names)
+        self.edges = {name: np.asarray(feature_edges[name], dtype=float) for name in self.feature_names}
+        self.edges[PREDICTION_KEY] = np.asarray(PREDICTION_EDGES, dtype=float)
+        n_groups = len(AGE_GROUPS)
+        self.counts = {
+            name: np.zeros((n_groups, edges.size + 1), dtype=np.int64) for name, edges in self.edges.items()
+        }
+
+    @classmethod
+    def from_sample(cls, X: np.ndarray, feature_names: list[str], bins: int = DRIFT_BINS) -> "ReferenceBuilder":
+        """Edges from the deciles of each column of ``X``."""
+        return cls(feature_names, {name: quantile_edges(X[:, j], bins) for j, name in enumerate(feature_names)})
+
+    def update(self, X: np.ndarray, prob: np.ndarray, ages: np.ndarray) -> None:
+        codes = age_group_codes(ages).astype(np.int64)
+        columns = {name: X[:, j] for j, name in enumerate(self.feature_names)}
+        columns[PREDICTION_KEY] = prob
+        for name, values in columns.items():
+            values = np.asarray(values, dtype=float)
+            known = ~np.isnan(values)
+            edges = self.edges[name]
+            n_bins = edges.size + 1
+            cells = codes[known] * n_bins + np.searchsorted(edges, values[known], side="right")
+            self.counts[name] += np.bincount(cells, minlength=len(AGE_GROUPS) * n_bins).reshape(-1, n_bins)
+
+    def to_dict(self) -> dict[str, Any]:
+        def entry(name: str) -> dict[str, Any]:
+            counts = self.counts[name]
+            return {
+                "edges": [float(e) for e in self.edges[name]],
+                "counts": {
+                    "all": [int(c) for c in counts.sum(axis=0)],
+                    **{g: [int(c) for c in counts[i]] for i, g in enumerate(AGE_GROUPS)},
+                },
+            }
+
+        return {
+            "age_groups": list(AGE_GROUPS),
+            "features": {name: entry(name) for name in self.feature_names},
+            "prediction": entry(PREDICTION_KEY),
+        }
+
+
+def build_reference(
+    X: np.ndarray, feature_names: list[str], prob: np.ndarray, ages: np.ndarray, bins: int = DRIFT_BINS
+) -> dict[str, Any]:
+    """Reference histograms for an in-memory hold-out set."""
+    X = np.asarray(X, dtype=float)
+    builder = ReferenceBuilder.from_sample(X, feature_names, bins)
+    builder.update(X, np.asarray(prob, dtype=float), ages)
+    return builder.to_dict()
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index of ``actual`` against ``expected`` bin counts."""
+    e = np.asarray(expected, dtype=float)
+    a = np.asarray(actual, dtype=float)
+    e = np.maximum(e / max(e.sum(), 1.0), _PSI_EPSILON)
+    a = np.maximum(a / max(a.sum(), 1.0), _PSI_EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks_statistic(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Largest gap between the two binned CDFs (a lower bound on the exact KS statistic)."""
+    e = np.cumsum(np.asarray(expected, dtype=float))
+    a = np.cumsum(np.asarray(actual, dtype=float))
+    if e[-1] == 0 or a[-1] == 0:
+        return 0.0
+    return float(np.max(np.abs(e / e[-1] - a / a[-1])))
+
+
+def drift_status(psi_value: float | None) -> str:
+    if psi_value is None:
+        return "insufficient_data"
+    if psi_value >= PSI_ALERT:
+        return "alert"
+    if psi_value >= PSI_WARN:
+        return "warn"
+    return "ok"
+
+
+def compare_counts(expected: list[int], actual: list[int], min_count: int) -> dict[str, Any]:
+    """PSI/KS of one live histogram against its reference; None below ``min_count`` rows."""
+    n = int(sum(actual))
+    if n < min_count or sum(expected) == 0:
+        return {"n": n, "psi": None, "ks": None, "status": drift_status(None)}
+    value = psi(expected, actual)
+    return {"n": n, "psi": value, "ks": ks_statistic(expected, actual), "status": drift_status(value)}
@@ -0,0 +1,225 @@
+"""
+Single-pass evaluation of held-out predictions.
+
+``evaluate_predictions`` sorts the scores once, regroups them by age group
+with a stable sort on the small integer group codes (so every group's slice
+is already in score order), and derives everything else from cumulative
+sums and ``np.bincount``: overall and per-group confusion matrices, ROC AUC
+and PR AUC, Brier score, calibration bins, threshold curves and the tuned
+per-group thresholds. Values match the sklearn metric functions.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ml.predict import AGE_GROUP_BOUNDS, AGE_GROUPS  # pragma: no cover
+else:
+    try:
+        from ml.predict import AGE_GROUP_BOUNDS, AGE_GROUPS
+    except Exception:
+        from predict import AGE_GROUP_BOUNDS, AGE_GROUPS
+
+CALIBRATION_BINS = 10
+
+
+def age_group_codes(ages: np.ndarray) -> np.ndarray:
+    """Index into AGE_GROUPS for each age (same boundaries as train.age_group)."""
+    return np.searchsorted(AGE_GROUP_BOUNDS, np.asarray(ages, dtype=float), side="right").astype(np.int8)
+
+
+def curve_from_sorted(
+    p_sorted: np.ndarray, y_sorted: np.ndarray, thresholds: np.ndarray | None = None
+) -> dict[str, np.ndarray]:
+    """Precision/recall/F1 at each threshold for scores already sorted ascending.
+
+    Predictions are ``prob >= t``; ``thresholds=None`` uses every distinct
+    score.
+    """
+    cum_pos = np.concatenate([[0], np.cumsum(y_sorted, dtype=np.int64)])
+    n_pos = int(cum_pos[-1])
+
+    if thresholds is None:
+        distinct = np.ones(p_sorted.size, dtype=bool)
+        distinct[1:] = p_sorted[1:] != p_sorted[:-1]
+        t = p_sorted[distinct]
+    else:
+        t = np.asarray(thresholds, dtype=float)
+    below = np.searchsorted(p_sorted, t, side="left")
+    tp = n_pos - cum_pos[below]
+    fp = (p_sorted.size - below) - tp
+    fn = n_pos - tp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(n_pos > 0, tp / max(n_pos, 1), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+
+    return {
+        "thresholds": t,
+        "tp": tp,
+        "fp": fp,
+        "fn": fn,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+    }
+
+
+def _ranking_metrics(p_sorted: np.ndarray, y_sorted: np.ndarray) -> tuple[float | None, float | None]:
+    """ROC AUC and average precision from ascending scores (None if one class)."""
+    n = p_sorted.size
+    n_pos = int(y_sorted.sum())
+    n_neg = n - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return None, None
+    # Walk thresholds from the highest score down; tied scores move together.
+    p_desc = p_sorted[::-1]
+    last_of_tie = np.flatnonzero(np.diff(p_desc))
+    idx = np.concatenate([last_of_tie, [n - 1]])
+    tps = np.cumsum(y_sorted[::-1], dtype=np.int64)[idx]
+    fps = idx + 1 - tps
+
+    tpr = np.concatenate([[0.0], tps / n_pos])
+    fpr = np.concatenate([[0.0], fps / n_neg])
+    roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0))
+
+    precision = tps / (tps + fps)
+    pr_auc = float(np.sum(np.diff(np.concatenate([[0.0], tps / n_pos])) * precision))
+    return roc_auc, pr_auc
+
+
+def _confusion_metrics(tn: int, fp: int, fn: int, tp: int) -> dict[str, Any]:
+    tn, fp, fn, tp = int(tn), int(fp), int(fn), int(tp)
+    n = tn + fp + fn + tp
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    specificity = tn / (tn + fp) if tn + fp else 0.0
+    # balanced_accuracy_score averages recall over the classes present
+    present = [r for r, k in ((recall, tp + fn), (specificity, tn + fp)) if k]
+    return {
+        "accuracy": (tp + tn) / n if n else 0.0,
+        "balanced_accuracy": float(np.mean(present)) if present else 0.0,
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "recall": recall,
+        "f1": 2 * tp / (2 * tp + fp + fn) if 2 * tp + fp + fn else 0.0,
+        "confusion_matrix": {"tn": tn, "fp": fp, "fn": fn, "tp": tp},
+    }
+
+
+def _calibration(count: np.ndarray, prob_sum: np.ndarray, pos: np.ndarray) -> dict[str, Any]:
+    n_bins = count.size
+    seen = count > 0
+    mean_pred = np.where(seen, prob_sum / np.maximum(count, 1), 0.0)
+    frac_pos = np.where(seen, pos / np.maximum(count, 1), 0.0)
+    total = int(count.sum())
+    ece = float(np.sum(count * np.abs(mean_pred - frac_pos)) / total) if total else 0.0
+    return {
+        "bin_edges": [float(x) for x in np.linspace(0.0, 1.0, n_bins + 1)],
+        "count": [int(x) for x in count],
+        "mean_predicted": [float(x) for x in mean_pred],
+        "fraction_positive": [float(x) for x in frac_pos],
+        "ece": ece,
+    }
+
+
+def evaluate_predictions(
+    y_true: np.ndarray,
+    prob: np.ndarray,
+    ages: np.ndarray,
+    threshold: float,
+    report_grid: np.ndarray,
+    tune_grid: np.ndarray | None = None,
+    calibration_bins: int = CALIBRATION_BINS,
+) -> dict[str, Any]:
+    """All hold-out metrics from one score sort.
+
+    Returns ``overall`` (metrics at ``threshold``), ``groups`` (per age group,
+    at that group's tuned threshold), ``age_group_thresholds`` (F1-optimal
+    over ``tune_grid``, or every distinct score when it is None),
+    ``threshold_curves`` (per group, over ``report_grid``) and
+    ``calibration`` (overall and per group).
+    """
+    y = np.asarray(y_true).astype(np.int64)
+    p = np.asarray(prob, dtype=float)
+    codes = age_group_codes(ages)
+    n_groups = len(AGE_GROUPS)
+
+    order = np.argsort(p, kind="stable")
+    p_sorted, y_sorted, g_sorted = p[order], y[order], codes[order]
+    # Stable (radix) sort on int8 codes keeps each group's slice in score order.
+    regroup = np.argsort(g_sorted, kind="stable")
+    p_grouped, y_grouped = p_sorted[regroup], y_sorted[regroup]
+    group_sizes = np.bincount(codes, minlength=n_groups)
+    bounds = np.concatenate([[0], np.cumsum(group_sizes)])
+
+    # Calibration and Brier: one bincount per statistic over (group, bin).
+    bins = np.minimum((p * calibration_bins).astype(np.int64), calibration_bins - 1)
+    cell = codes.astype(np.int64) * calibration_bins + bins
+    shape = (n_groups, calibration_bins)
+    cal_count = np.bincount(cell, minlength=n_groups * calibration_bins).reshape(shape)
+    cal_prob = np.bincount(cell, weights=p, minlength=n_groups * calibration_bins).reshape(shape)
+    cal_pos = np.bincount(cell, weights=y, minlength=n_groups * calibration_bins).reshape(shape)
+    sq_err = np.bincount(codes, weights=(p - y) ** 2, minlength=n_groups)
+
+    group_thresholds: dict[str, float] = {}
+    curves: dict[str, dict[str, np.ndarray]] = {}
+    groups: dict[str, dict[str, Any]] = {}
+    for g, name in enumerate(AGE_GROUPS):
+        lo, hi = int(bounds[g]), int(bounds[g + 1])
+        if hi == lo:
+            continue
+        gp, gy = p_grouped[lo:hi], y_grouped[lo:hi]
+        curves[name] = curve_from_sorted(gp, gy, report_grid)
+        tuning = curves[name] if tune_grid is report_grid else curve_from_sorted(gp, gy, tune_grid)
+        t = float(tuning["thresholds"][int(np.argmax(tuning["f1"]))])
+        group_thresholds[name] = t
+
+        # Rows predicted positive at t sit at the top of the sorted slice.
+        n_pred_pos = (hi - lo) - int(np.searchsorted(gp, t, side="left"))
+        tp = int(gy[hi - lo - n_pred_pos:].sum())
+        n_pos = int(gy.sum())
+        fp, fn = n_pred_pos - tp, n_pos - tp
+        tn = (hi - lo) - tp - fp - fn
+        roc_auc, pr_auc = _ranking_metrics(gp, gy)
+        groups[name] = {
+            "n": int(hi - lo),
+            "positive_rate": n_pos / (hi - lo),
+            "threshold": t,
+            **_confusion_metrics(tn, fp, fn, tp),
+            "roc_auc": roc_auc,
+            "pr_auc": pr_auc,
+            "brier_score": float(sq_err[g] / (hi - lo)),
+        }
+
+    n = p.size
+    n_pred_pos = n - int(np.searchsorted(p_sorted, threshold, side="left"))
+    tp = int(y_sorted[n - n_pred_pos:].sum())
+    n_pos = int(y.sum())
+    fp, fn = n_pred_pos - tp, n_pos - tp
+    roc_auc, pr_auc = _ranking_metrics(p_sorted, y_sorted)
+    overall = {
+        **_confusion_metrics(n - tp - fp - fn, fp, fn, tp),
+        "roc_auc": roc_auc,
+        "pr_auc": pr_auc,
+        "brier_score": float(sq_err.sum() / n) if n else 0.0,
+    }
+    # Keep the historical key order: confusion_matrix last.
+    overall["confusion_matrix"] = overall.pop("confusion_matrix")
+
+    return {
+        "overall": overall,
+        "groups": groups,
+        # Name order, as the reports have always listed groups.
+        "age_group_thresholds": dict(sorted(group_thresholds.items())),
+        "threshold_curves": dict(sorted(curves.items())),
+        "calibration": {
+            "overall": _calibration(cal_count.sum(axis=0), cal_prob.sum(axis=0), cal_pos.sum(axis=0)),
+            "groups": {
+                name: _calibration(cal_count[g], cal_prob[g], cal_pos[g])
+                for g, name in enumerate(AGE_GROUPS)
+                if group_sizes[g]
+            },
+        },
+    }
@@ -0,0 +1,204 @@
+"""
+Compiled inference for the scaler + logistic regression pipeline.
+
+The trained artifact is a sklearn ``Pipeline([StandardScaler, LogisticRegression])``.
+Scoring it through sklearn costs far more than the math itself, so this module
+folds the scaler into the classifier weights and scores with one dot product
+and a sigmoid on plain NumPy arrays.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+COMPACT_FILENAME = "model.json"
+COMPACT_FORMAT = "gitvitals-logit-v1"
+
+
+@dataclass(frozen=True)
+class CompiledLogit:
+    """Fused ``sigmoid(((x - mean) / scale) @ coef + intercept)``."""
+
+    feature_names: list[str]
+    mean: np.ndarray
+    scale: np.ndarray
+    coef: np.ndarray
+    intercept: float
+    weights: np.ndarray
+    bias: float
+
+    @classmethod
+    def from_params(
+        cls,
+        feature_names: list[str],
+        mean: np.ndarray,
+        scale: np.ndarray,
+        coef: np.ndarray,
+        intercept: float,
+    ) -> "CompiledLogit":
+        mean = np.asarray(mean, dtype=float)
+        scale = np.asarray(scale, dtype=float)
+        coef = np.asarray(coef, dtype=float)
+        weights = coef / scale
+        bias = float(intercept) - float(weights @ mean)
+        return cls(
+            feature_names=list(feature_names),
+            mean=mean,
+            scale=scale,
+            coef=coef,
+            intercept=float(intercept),
+            weights=weights,
+            bias=bias,
+        )
+
+    @property
+    def n_features(self) -> int:
+        return int(self.weights.shape[0])
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=float) @ self.weights + self.bias
+
+    def predict_positive(self, X: np.ndarray) -> np.ndarray:
+        """Return P(at_risk = 1) for each row of ``X``."""
+        return _sigmoid(self.decision_function(X))
+
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """Per-feature log-odds terms ``coef * (x - mean) / scale``; rows sum to z - intercept."""
+        return (np.asarray(X, dtype=float) - self.mean) * self.weights
+
+    def predict_with_contributions(self, X: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """P(at_risk = 1) and the contributions it was computed from."""
+        contrib = self.contributions(X)
+        return _sigmoid(contrib.sum(axis=1) + self.intercept), contrib
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # Same shape as sklearn so callers can treat both interchangeably.
+        p = self.predict_positive(X)
+        return np.column_stack([1.0 - p, p])
+
+    def to_dict(self) -> dict[str, Any]:
+        # Raw (unfused) parameters; JSON floats round-trip exactly.
+        return {
+            "format": COMPACT_FORMAT,
+            "feature_names": list(self.feature_names),
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "coef": self.coef.tolist(),
+            "intercept": self.intercept,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "CompiledLogit":
+        if data.get("format") != COMPACT_FORMAT:
+            raise ValueError(f"Unsupported compact model format: {data.get('format')!r}")
+        return cls.from_params(
+            data["feature_names"],
+            np.array(data["mean"], dtype=float),
+            np.array(data["scale"], dtype=float),
+            np.array(data["coef"], dtype=float),
+            float(data["intercept"]),
+        )
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    # Split on sign so exp() never overflows.
+    out = np.empty_like(z)
+    pos = z >= 0
+    out[pos] = 1.0 / (1.0 + np.exp(-z[pos]))
+    ez = np.exp(z[~pos])
+    out[~pos] = ez / (1.0 + ez)
+    return out
+
+
+def _is_log_loss_classifier(clf: Any) -> bool:
+    name = type(clf).__name__
+    if name == "LogisticRegression":
+        return True
+    if name == "SGDClassifier":
+        return getattr(clf, "loss", None) in ("log_loss", "log")
+    return False
+
+
+def compile_pipeline(model: Any, feature_names: list[str] | None = None) -> CompiledLogit | None:
+    """Compile a fitted scaler + binary logistic pipeline, or return None.
+
+    None means the pipeline has a shape this kernel does not handle (extra
+    steps, multiclass, a non-logistic classifier, ...) and callers should keep
+    using the sklearn model.
+    """
+    steps = getattr(model, "steps", None)
+    if not steps or len(steps) != 2:
+        return None
+    scaler, clf = steps[0][1], steps[1][1]
+    if type(scaler).__name__ != "StandardScaler" or not _is_log_loss_classifier(clf):
+        return None
+
+    coef = getattr(clf, "coef_", None)
+    intercept = getattr(clf, "intercept_", None)
+    classes = getattr(clf, "classes_", None)
+    if coef is None or intercept is None or classes is None or len(classes) != 2:
+        return None
+    coef = np.asarray(coef, dtype=float)
+    if coef.ndim != 2 or coef.shape[0] != 1:
+        return None
+
+    n_features = coef.shape[1]
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    mean = np.zeros(n_features) if mean is None or not scaler.with_mean else np.asarray(mean, dtype=float)
+    scale = np.ones(n_features) if scale is None or not scaler.with_std else np.asarray(scale, dtype=float)
+    if mean.shape != (n_features,) or scale.shape != (n_features,):
+        return None
+
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        names = [str(x) for x in list(names)]
+    else:
+        names = list(feature_names or [])
+    if len(names) != n_features:
+        return None
+
+    return CompiledLogit.from_params(names, mean, scale, coef[0], float(np.asarray(intercept)[0]))
+
+
+def compact_model_json(compiled: CompiledLogit, metrics: dict[str, Any]) -> str:
+    """Serving-only artifact: kernel parameters plus thresholds, a few hundred bytes."""
+    data = compiled.to_dict()
+    data["threshold"] = float(metrics.get("threshold", 0.5))
+    data["age_group_thresholds"] = dict(metrics.get("age_group_thresholds") or {})
+    data["model_version"] = metrics.get("model_version")
+    return json.dumps(data, indent=2)
+
+
+def load_compact(path: Path) -> tuple[CompiledLogit, dict[str, Any]]:
+    """Load a compact model file; returns the kernel and the raw JSON."""
+    data = json.loads(Path(path).read_text())
+    return CompiledLogit.from_dict(data), data
+
+
+def compile_model(model: Any, feature_names: list[str] | None = None) -> Any:
+    """Return a compiled kernel when possible, otherwise the sklearn model itself."""
+    compiled = compile_pipeline(model, feature_names)
+    return compiled if compiled is not None else model
+
+
+def predict_positive_explained(
+    model: Any, X: np.ndarray, feature_names: list[str]
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """predict_positive plus per-feature log-odds contributions (None for sklearn fallbacks)."""
+    if isinstance(model, CompiledLogit):
+        return model.predict_with_contributions(X)
+    return predict_positive(model, X, feature_names), None
+
+
+def predict_positive(model: Any, X: np.ndarray, feature_names: list[str]) -> np.ndarray:
+    """P(at_risk = 1) for a float matrix, via the kernel or the sklearn fallback."""
+    if isinstance(model, CompiledLogit):
+        return model.predict_positive(X)
+    import pandas as pd
+
+    return model.predict_proba(pd.DataFrame(X, columns=feature_names))[:, 1]
@@ -0,0 +1,202 @@
+"""
+On-disk training matrices for out-of-core work.
+
+A dataset is a directory holding ``X.npy`` (rows x features), ``y.npy``
+(int8 labels) and ``meta.json``. It is written once, chunk by chunk, and
+read back either as read-only memmaps or as streamed row batches, so neither
+side holds more than one chunk in memory however many rows there are.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+DATASET_FORMAT = "gitvitals-matrix-v1"
+DEFAULT_DTYPE = np.float32
+
+# Fixed header size, so the real row count can be patched in after the last
+# chunk without moving any data.
+_HEADER_BYTES = 128
+
+
+def _npy_header(dtype: np.dtype, shape: tuple[int, ...]) -> bytes:
+    header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": shape}
+    body = repr(header).encode("latin1")
+    prefix = np.lib.format.magic(1, 0)
+    pad = _HEADER_BYTES - len(prefix) - 2 - len(body) - 1
+    if pad < 0:
+        raise ValueError(f"Shape {shape} does not fit in a {_HEADER_BYTES}-byte .npy header")
+    return prefix + struct.pack("<H", len(body) + pad + 1) + body + b" " * pad + b"\n"
+
+
+class NpyAppender:
+    """Append rows to a ``.npy`` file whose final length is not known up front."""
+
+    def __init__(self, path: Path, dtype: type, n_cols: int | None = None):
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.n_cols = n_cols
+        self.n_rows = 0
+        self._fh = self.path.open("wb")
+        self._fh.write(_npy_header(self.dtype, self._shape()))
+
+    def _shape(self) -> tuple[int, ...]:
+        return (self.n_rows,) if self.n_cols is None else (self.n_rows, self.n_cols)
+
+    def append(self, rows: np.ndarray) -> None:
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        expected = 1 if self.n_cols is None else 2
+        if rows.ndim != expected or (self.n_cols is not None and rows.shape[1] != self.n_cols):
+            raise ValueError(f"Expected rows of shape {self._shape()[1:] or '()'}, got {rows.shape[1:]}")
+        self._fh.write(rows.tobytes())
+        self.n_rows += rows.shape[0]
+
+    def close(self) -> int:
+        self._fh.seek(0)
+        self._fh.write(_npy_header(self.dtype, self._shape()))
+        self._fh.close()
+        return self.n_rows
+
+
+def write_dataset(
+    out_dir: Path,
+    chunks: Iterable[tuple[np.ndarray, np.ndarray]],
+    feature_names: list[str],
+    dtype: type = DEFAULT_DTYPE,
+    extra_meta: dict | None = None,
+) -> Path:
+    """Stream ``(X, y)`` chunks into ``out_dir``.
+
+    Files are written into a staging directory that is renamed into place at
+    the end, so a reader never sees a half-written dataset.
+    """
+    out_dir = Path(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = out_dir.with_name(f".{out_dir.name}.{os.getpid()}.tmp")
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir()
+    try:
+        X_out = NpyAppender(staging / "X.npy", dtype, len(feature_names))
+        y_out = NpyAppender(staging / "y.npy", np.int8)
+        positives = 0
+        for X, y in chunks:
+            X_out.append(X)
+            y_out.append(y)
+            positives += int(np.sum(y))
+        n_rows = X_out.close()
+        y_out.close()
+        meta = {
+            "format": DATASET_FORMAT,
+            "n_rows": int(n_rows),
+            "n_features": len(feature_names),
+            "dtype": np.dtype(dtype).name,
+            "feature_names": list(feature_names),
+            "positive_rate": positives / n_rows if n_rows else 0.0,
+            **(extra_meta or {}),
+        }
+        (staging / "meta.json").write_text(json.dumps(meta, indent=2))
+        if out_dir.exists():
+            shutil.rmtree(out_dir)
+        os.rename(staging, out_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return out_dir
+
+
+def frame_chunks_to_matrix(
+    frames: Iterable[pd.DataFrame], target: str = "at_risk"
+) -> tuple[list[str], Iterator[tuple[np.ndarray, np.ndarray]]]:
+    """Turn labeled DataFrame chunks into ``(X, y)`` chunks.
+
+    Returns the feature names (every non-target column of the first chunk)
+    and the chunk iterator. Later chunks must carry the same columns.
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("No rows to write")
+    if target not in first.columns:
+        raise ValueError(f"Training data must include target column {target!r}")
+    feature_names = [c for c in first.columns if c != target]
+
+    def convert() -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        for frame in _chain(first, frames):
+            missing = [c for c in feature_names if c not in frame.columns]
+            if missing:
+                raise ValueError(f"Chunk is missing columns: {missing}")
+            yield frame[feature_names].to_numpy(dtype=float), frame[target].to_numpy(dtype=np.int8)
+
+    return feature_names, convert()
+
+
+def _chain(first: pd.DataFrame, rest: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    yield first
+    yield from rest
+
+
+class MatrixDataset:
+    """Read side of a dataset written by ``write_dataset``."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Matrix dataset not found: {self.path}")
+        self.meta = json.loads(meta_path.read_text())
+        if self.meta.get("format") != DATASET_FORMAT:
+            raise ValueError(f"Unsupported matrix dataset format: {self.meta.get('format')!r}")
+        self.feature_names: list[str] = list(self.meta["feature_names"])
+        # Memmaps only to read shapes/offsets here; no pages are touched.
+        self.X = np.load(self.path / "X.npy", mmap_mode="r")
+        self.y = np.load(self.path / "y.npy", mmap_mode="r")
+        if self.X.shape[0] != self.y.shape[0]:
+            raise ValueError(f"X has {self.X.shape[0]} rows but y has {self.y.shape[0]}")
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.y.shape[0])
+
+    def read(self, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+        """Rows ``[start, stop)`` as in-memory arrays.
+
+        Uses positional file reads rather than slicing the memmaps: pages of
+        a mapping stay resident after a full pass, reads do not.
+        """
+        n_cols = self.X.shape[1]
+        count = max(stop - start, 0)
+        with (self.path / "X.npy").open("rb") as fh:
+            fh.seek(self.X.offset + start * n_cols * self.X.dtype.itemsize)
+            X = np.fromfile(fh, dtype=self.X.dtype, count=count * n_cols).reshape(count, n_cols)
+        with (self.path / "y.npy").open("rb") as fh:
+            fh.seek(self.y.offset + start * self.y.dtype.itemsize)
+            y = np.fromfile(fh, dtype=self.y.dtype, count=count)
+        return X, y
+
+    def batches(
+        self, start: int, stop: int, batch_size: int, order: np.ndarray | None = None
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Contiguous row batches of ``[start, stop)``, optionally in a given batch order."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        starts = np.arange(start, stop, batch_size)
+        if order is not None:
+            starts = starts[order]
+        for s in starts:
+            yield self.read(int(s), min(int(s) + batch_size, stop))
+
+    def to_frame(self, limit: int | None = None, target: str = "at_risk") -> pd.DataFrame:
+        """The first ``limit`` rows as an in-memory training DataFrame, in the stored dtypes."""
+        n = self.n_rows if limit is None else min(limit, self.n_rows)
+        X, y = self.read(0, n)
+        df = pd.DataFrame(X, columns=self.feature_names, copy=False)
+        df[target] = y
+        return df
@@ -0,0 +1,11 @@
+-- Index for incremental snapshot sync
+-- Run this in your Supabase SQL Editor after 001_create_training_view.sql
+--
+-- data_loader.sync_training_snapshot fetches only rows graded after the last
+-- cached (gradedAt, id) watermark:
+--   WHERE "gradedAt" > $1 OR ("gradedAt" = $1 AND id > $2)
+-- This index lets that delta query avoid a full scan of VitalReading.
+
+CREATE INDEX IF NOT EXISTS idx_vitalreading_graded_at_id
+ON "VitalReading"("gradedAt", id)
+WHERE "instructorLabel" IS NOT NULL;
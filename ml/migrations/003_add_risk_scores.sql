@@ -0,0 +1,38 @@
+-- Precomputed risk scores for VitalReading
+-- Run this in your Supabase SQL Editor after 002_index_graded_at.sql
+--
+-- ml/scoring_worker.py claims readings with "riskScoredAt" IS NULL, scores
+-- them in batches and writes the columns below back, so dashboards can read
+-- risk without calling the ML service.
+
+ALTER TABLE "VitalReading"
+  ADD COLUMN IF NOT EXISTS "riskProbability" DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS "riskFlag" BOOLEAN,
+  ADD COLUMN IF NOT EXISTS "riskModelVersion" TEXT,
+  ADD COLUMN IF NOT EXISTS "riskScoredAt" TIMESTAMPTZ;
+
+-- The worker's claim query:
+--   WHERE "riskScoredAt" IS NULL ORDER BY "submittedAt", id LIMIT $1
+--   FOR UPDATE OF vr SKIP LOCKED
+-- Only unscored rows are indexed, so the index stays small.
+CREATE INDEX IF NOT EXISTS idx_vitalreading_unscored
+ON "VitalReading"("submittedAt", id)
+WHERE "riskScoredAt" IS NULL;
+
+-- Used by `scoring_worker.py --rescore` to find rows scored by another model.
+CREATE INDEX IF NOT EXISTS idx_vitalreading_risk_model_version
+ON "VitalReading"("riskModelVersion");
+
+-- Wake the worker when a reading is inserted instead of waiting for its next
+-- poll. The payload is unused; the worker always claims from the table.
+CREATE OR REPLACE FUNCTION notify_vital_reading_unscored() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('vital_reading_unscored', '');
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_vital_reading_unscored ON "VitalReading";
+CREATE TRIGGER trg_vital_reading_unscored
+AFTER INSERT ON "VitalReading"
+FOR EACH STATEMENT EXECUTE FUNCTION notify_vital_reading_unscored();
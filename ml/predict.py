@@ -3,16 +3,31 @@ from __future__ import annotations
 import argparse
 import json
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterator
 
-import joblib
-import pandas as pd
+import numpy as np
+
+if TYPE_CHECKING:
+    from ml.inference import compile_model, predict_positive, predict_positive_explained  # pragma: no cover
+else:
+    try:
+        from ml.inference import compile_model, predict_positive, predict_positive_explained
+    except Exception:
+        from inference import compile_model, predict_positive, predict_positive_explained
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 MODEL_PATH = REPO_ROOT / "ml" / "artifacts" / "model.joblib"
 METRICS_PATH = REPO_ROOT / "ml" / "artifacts" / "metrics.json"
 
+BULK_CHUNK_SIZE = 50_000
+# Columns copied through to bulk output so scores can be joined back; "row"
+# is the 0-based input row number added by score_bulk.
+BULK_ID_COLUMNS = ["row", "id", "studentId", "patientId", "readingNumber"]
+
 
 def load_metrics() -> dict[str, Any]:
     if not METRICS_PATH.exists():
@@ -52,6 +67,10 @@ def _coerce_payload(payload: dict[str, Any], feature_names: list[str]) -> dict[s
     return data
 
 
+AGE_GROUPS = ("neonate", "child", "teen", "adult", "senior")
+AGE_GROUP_BOUNDS = np.array([1.0, 13.0, 18.0, 65.0])
+
+
 def _age_group(age: float) -> str:
     if age < 1:
         return "neonate"
@@ -72,10 +91,162 @@ def _resolve_threshold(metrics: dict[str, Any], payload: dict[str, Any], default
     if age_val is None:
         return default_threshold
     try:
-        group = _age_group(float(age_val))
+        age = float(age_val)
     except Exception:
         return default_threshold
-    return float(thresholds.get(group, default_threshold))
+    if np.isnan(age):
+        # Unknown age: no age group, as in _resolve_thresholds.
+        return default_threshold
+    return float(thresholds.get(_age_group(age), default_threshold))
+
+
+def _resolve_thresholds(
+    metrics: dict[str, Any], ages: np.ndarray, default_threshold: float
+) -> np.ndarray:
+    """Vectorized _resolve_threshold: one threshold per age (NaN -> default, as there)."""
+    out = np.full(ages.shape, float(default_threshold))
+    thresholds = metrics.get("age_group_thresholds")
+    if not isinstance(thresholds, dict):
+        return out
+    table = np.array([float(thresholds.get(g, default_threshold)) for g in AGE_GROUPS])
+    known = ~np.isnan(ages)
+    idx = np.searchsorted(AGE_GROUP_BOUNDS, ages[known], side="right")
+    out[known] = table[idx]
+    return out
+
+
+# Contributors reported per prediction when explanations are requested.
+EXPLAIN_TOP_K = 3
+FEATURE_LABELS = {
+    "age_years": "Age",
+    "bp_systolic": "Systolic BP",
+    "bp_diastolic": "Diastolic BP",
+    "heart_rate": "Heart rate",
+    "temperature": "Temperature",
+    "respiratory_rate": "Respiratory rate",
+    "oxygen_saturation": "SpO2",
+    "pulse_pressure": "Pulse pressure",
+    "pain_level": "Pain level",
+}
+
+
+def _explanation_item(feature: str, value: float, log_odds: float) -> dict[str, Any]:
+    direction = "raises" if log_odds > 0 else "lowers"
+    return {
+        "feature": feature,
+        "value": value,
+        "log_odds": log_odds,
+        "text": f"{FEATURE_LABELS.get(feature, feature)} {value:g} {direction} risk ({log_odds:+.2f} log-odds)",
+    }
+
+
+def explain_contributions(
+    contrib: np.ndarray,
+    X: np.ndarray,
+    feature_names: list[str],
+    flags: np.ndarray,
+    top_k: int = EXPLAIN_TOP_K,
+) -> list[list[dict[str, Any]]]:
+    """Top-``top_k`` features per row, ranked in the direction of the decision.
+
+    ``contrib`` is ``coef * (x - mean) / scale`` from the compiled kernel:
+    how far each feature moves the log-odds away from a reading at the
+    training mean. For a flagged row (``flags`` true) the features that raise
+    risk most come first; otherwise the ones that lower it most. Each item
+    has feature, value, log_odds and a readable text.
+    """
+    k = min(top_k, contrib.shape[1])
+    signed = np.where(np.asarray(flags, dtype=bool)[:, None], contrib, -contrib)
+    order = np.argsort(-signed, axis=1, kind="stable")[:, :k]
+    top = np.take_along_axis(contrib, order, axis=1).tolist()
+    values = np.take_along_axis(X, order, axis=1).tolist()
+    return [
+        [_explanation_item(feature_names[j], v, c) for j, c, v in zip(idx_row, c_row, v_row)]
+        for idx_row, c_row, v_row in zip(order.tolist(), top, values)
+    ]
+
+
+def _row_values(data: dict[str, Any], feature_names: list[str]) -> list[float]:
+    missing = [k for k in feature_names if k not in data]
+    if missing:
+        raise ValueError(f"Missing required features: {sorted(missing)}")
+    try:
+        return [float(data[k]) for k in feature_names]
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Non-numeric feature value: {exc}") from exc
+
+
+def predict_batch(
+    model: Any,
+    payloads: list[dict[str, Any]],
+    feature_names: list[str],
+    threshold: float,
+    metrics: dict[str, Any] | None = None,
+    timings: dict[str, float] | None = None,
+    top_k: int = 0,
+) -> list[dict[str, Any]]:
+    """Score many payloads with a single predict_proba call.
+
+    Results are returned in input order. Rows that cannot be scored get
+    ``{"error": ...}`` instead of failing the whole batch. If ``timings`` is
+    given, seconds spent per stage are added to it. With ``top_k > 0`` and a
+    compiled model, each result also carries its ``contributions`` (see
+    explain_contributions).
+    """
+    t0 = time.perf_counter()
+    expected_keys = set(feature_names)
+    results: list[dict[str, Any]] = [{} for _ in payloads]
+    rows: list[list[float]] = []
+    ages: list[float] = []
+    ok_index: list[int] = []
+    extras: list[list[str]] = []
+
+    for i, payload in enumerate(payloads):
+        data = _coerce_payload(payload, feature_names)
+        try:
+            rows.append(_row_values(data, feature_names))
+        except ValueError as exc:
+            results[i] = {"error": str(exc)}
+            continue
+        try:
+            ages.append(float(data.get("age_years", np.nan)))
+        except (TypeError, ValueError):
+            ages.append(np.nan)
+        ok_index.append(i)
+        extras.append(sorted(set(data.keys()) - expected_keys))
+
+    if not rows:
+        return results
+
+    X = np.asarray(rows, dtype=float)
+    t1 = time.perf_counter()
+    if top_k > 0:
+        probs, contrib = predict_positive_explained(model, X, feature_names)
+    else:
+        probs, contrib = predict_positive(model, X, feature_names), None
+    t2 = time.perf_counter()
+    thresholds = _resolve_thresholds(metrics or {}, np.asarray(ages, dtype=float), threshold)
+    preds = probs >= thresholds
+    t3 = time.perf_counter()
+    explanations = explain_contributions(contrib, X, feature_names, preds, top_k) if contrib is not None else None
+    if timings is not None:
+        # Coercion happens row by row inside the feature loop here.
+        timings["features"] = timings.get("features", 0.0) + (t1 - t0)
+        timings["predict_proba"] = timings.get("predict_proba", 0.0) + (t2 - t1)
+        timings["threshold"] = timings.get("threshold", 0.0) + (t3 - t2)
+        if explanations is not None:
+            timings["explain"] = timings.get("explain", 0.0) + (time.perf_counter() - t3)
+
+    for j, i in enumerate(ok_index):
+        results[i] = {
+            "pred": int(preds[j]),
+            "risk_probability": float(probs[j]),
+            "threshold": float(thresholds[j]),
+            "extra_fields_ignored": extras[j],
+        }
+        if explanations is not None:
+            results[i]["contributions"] = explanations[j]
+    return results
 
 
 def predict_from_json(
@@ -84,8 +255,12 @@ def predict_from_json(
     feature_names: list[str],
     threshold: float,
     metrics: dict[str, Any] | None = None,
+    timings: dict[str, float] | None = None,
+    top_k: int = 0,
 ) -> dict[str, Any]:
+    t0 = time.perf_counter()
     data = _coerce_payload(payload, feature_names)
+    t1 = time.perf_counter()
     payload_keys = set(data.keys())
     expected_keys = set(feature_names)
 
@@ -102,20 +277,223 @@ def predict_from_json(
 
     # Enforce column order + numeric conversion
     try:
-        df = pd.DataFrame([{k: data[k] for k in feature_names}], columns=feature_names).astype(float)
+        X = np.array([[data[k] for k in feature_names]], dtype=float)
     except Exception as exc:
         raise ValueError(f"Non-numeric feature value: {exc}") from exc
+    t2 = time.perf_counter()
 
     threshold_used = _resolve_threshold(metrics or {}, data, threshold)
+    t3 = time.perf_counter()
 
-    prob = float(model.predict_proba(df)[:, 1][0])
+    if top_k > 0:
+        probs, contrib = predict_positive_explained(model, X, feature_names)
+    else:
+        probs, contrib = predict_positive(model, X, feature_names), None
+    prob = float(probs[0])
     pred = int(prob >= threshold_used)
-    return {
+    t4 = time.perf_counter()
+    result = {
         "pred": pred,
         "risk_probability": prob,
         "threshold": threshold_used,
         "extra_fields_ignored": extra,
     }
+    if contrib is not None:
+        result["contributions"] = explain_contributions(contrib, X, feature_names, np.array([pred]), top_k)[0]
+    if timings is not None:
+        timings["coerce"] = timings.get("coerce", 0.0) + (t1 - t0)
+        timings["features"] = timings.get("features", 0.0) + (t2 - t1)
+        timings["threshold"] = timings.get("threshold", 0.0) + (t3 - t2)
+        timings["predict_proba"] = timings.get("predict_proba", 0.0) + (t4 - t3)
+        if contrib is not None:
+            timings["explain"] = timings.get("explain", 0.0) + (time.perf_counter() - t4)
+    return result
+
+
+def score_frame(
+    model: Any,
+    frame: Any,
+    feature_names: list[str],
+    threshold: float,
+    metrics: dict[str, Any] | None = None,
+) -> Any:
+    """Vectorized predict_batch for a DataFrame chunk.
+
+    Returns the id columns present in ``frame`` plus risk_probability, pred,
+    threshold and error. Rows with missing or non-numeric features keep an
+    empty score and an error message instead of failing the chunk.
+    """
+    import pandas as pd
+
+    frame = frame.reset_index(drop=True)
+    if (
+        "pulse_pressure" in feature_names
+        and "pulse_pressure" not in frame.columns
+        and {"bp_systolic", "bp_diastolic"} <= set(frame.columns)
+    ):
+        frame = frame.assign(
+            pulse_pressure=pd.to_numeric(frame["bp_systolic"], errors="coerce")
+            - pd.to_numeric(frame["bp_diastolic"], errors="coerce")
+        )
+    missing = [k for k in feature_names if k not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required features: {sorted(missing)}")
+
+    X = np.column_stack(
+        [pd.to_numeric(frame[k], errors="coerce").to_numpy(dtype=float) for k in feature_names]
+    )
+    ok = ~np.isnan(X).any(axis=1)
+    ages = (
+        pd.to_numeric(frame["age_years"], errors="coerce").to_numpy(dtype=float)
+        if "age_years" in frame.columns
+        else np.full(len(frame), np.nan)
+    )
+
+    probs = np.full(len(frame), np.nan)
+    if ok.any():
+        probs[ok] = predict_positive(model, X[ok], feature_names)
+    thresholds = _resolve_thresholds(metrics or {}, ages, threshold)
+
+    out = frame[[c for c in BULK_ID_COLUMNS if c in frame.columns]].copy()
+    out["risk_probability"] = probs
+    out["pred"] = pd.array(np.where(ok, probs >= thresholds, 0), dtype="Int8")
+    out.loc[~ok, "pred"] = pd.NA
+    out["threshold"] = thresholds
+    out["error"] = np.where(ok, "", "missing or non-numeric features")
+    return out
+
+
+def iter_input_chunks(path: Path, chunk_size: int = BULK_CHUNK_SIZE) -> Iterator[Any]:
+    """Read a CSV, NDJSON or Parquet file as DataFrames of at most ``chunk_size`` rows."""
+    import pandas as pd
+
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif suffix in (".ndjson", ".jsonl", ".json"):
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size)
+    elif suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Parquet input needs pyarrow: pip install pyarrow") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported input format {suffix!r}; use .csv, .ndjson/.jsonl or .parquet")
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV, NDJSON or Parquet file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.suffix = path.suffix.lower()
+        if self.suffix not in (".csv", ".ndjson", ".jsonl", ".json", ".parquet"):
+            raise ValueError(f"Unsupported output format {self.suffix!r}; use .csv, .ndjson/.jsonl or .parquet")
+        if self.suffix == ".parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as exc:
+                raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow") from exc
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._parquet = None
+        self._first = True
+
+    def write(self, chunk: Any) -> None:
+        if self.suffix == ".csv":
+            chunk.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        elif self.suffix == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            # json, not DataFrame.to_json: pandas rounds floats to 10 digits,
+            # so scores would not match the CSV output or the service.
+            records = chunk.astype(object).where(chunk.notna(), None).to_dict(orient="records")
+            with self.path.open("w" if self._first else "a") as fh:
+                fh.writelines(json.dumps(record) + "\n" for record in records)
+        self._first = False
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        elif self._first and self.suffix != ".parquet":
+            self.path.write_text("")  # empty input still leaves an output file
+
+
+# Scoring context for bulk worker processes, set once by the pool initializer.
+_BULK_CONTEXT: tuple | None = None
+
+
+def _init_bulk_worker(model: Any, feature_names: list[str], threshold: float, metrics: dict) -> None:
+    global _BULK_CONTEXT
+    _BULK_CONTEXT = (model, feature_names, threshold, metrics)
+
+
+def _score_chunk(chunk: Any) -> Any:
+    model, feature_names, threshold, metrics = _BULK_CONTEXT
+    return score_frame(model, chunk, feature_names, threshold, metrics)
+
+
+def score_bulk(
+    chunks: Iterator[Any],
+    writer: ChunkWriter,
+    model: Any,
+    feature_names: list[str],
+    threshold: float,
+    metrics: dict[str, Any] | None = None,
+    n_jobs: int = 1,
+) -> dict[str, Any]:
+    """Score an iterator of chunks into ``writer``, preserving input order.
+
+    With ``n_jobs > 1`` chunks are scored in worker processes, but at most
+    ``2 * n_jobs`` are in flight, so memory stays bounded by the chunk size
+    rather than the input size.
+    """
+    start = time.perf_counter()
+    n_rows = n_errors = offset = 0
+
+    def emit(scored: Any) -> None:
+        nonlocal n_rows, n_errors
+        writer.write(scored)
+        n_rows += len(scored)
+        n_errors += int((scored["error"] != "").sum())
+
+    def numbered(chunk: Any) -> Any:
+        nonlocal offset
+        chunk = chunk.reset_index(drop=True)
+        chunk.insert(0, "row", np.arange(offset, offset + len(chunk)))
+        offset += len(chunk)
+        return chunk
+
+    if n_jobs <= 1:
+        for chunk in chunks:
+            emit(score_frame(model, numbered(chunk), feature_names, threshold, metrics))
+    else:
+        with ProcessPoolExecutor(
+            n_jobs, initializer=_init_bulk_worker, initargs=(model, feature_names, threshold, metrics or {})
+        ) as pool:
+            pending: deque = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_score_chunk, numbered(chunk)))
+                if len(pending) >= 2 * n_jobs:
+                    emit(pending.popleft().result())
+            while pending:
+                emit(pending.popleft().result())
+    writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": n_rows,
+        "errors": n_errors,
+        "seconds": seconds,
+        "rows_per_s": n_rows / seconds if seconds > 0 else float("inf"),
+    }
 
 
 def main() -> None:
@@ -127,16 +505,72 @@ def main() -> None:
         default="",
         help="JSON string with feature values (must match training feature names).",
     )
+    parser.add_argument(
+        "--no-compile",
+        action="store_true",
+        help="Score with the sklearn pipeline instead of the compiled NumPy kernel.",
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        default="",
+        help="Bulk mode: score every row of a .csv, .ndjson/.jsonl or .parquet file.",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["file", "db"],
+        default="file",
+        help="Bulk mode input: --input file, or stream unscored readings from Postgres (db).",
+    )
+    parser.add_argument("--output", type=str, default="", help="Bulk mode output (.csv, .ndjson/.jsonl or .parquet).")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Rows per bulk chunk.")
+    parser.add_argument("--limit", type=int, default=None, help="With --source db, score at most this many rows.")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Worker processes for bulk scoring.")
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=EXPLAIN_TOP_K,
+        help="Per-feature log-odds contributions in --json output (compiled models only; 0 = none).",
+    )
     args = parser.parse_args()
 
     model_path = Path(args.model).expanduser().resolve()
     if not model_path.exists():
         raise FileNotFoundError(f"Model not found: {model_path}. Run: python ml/train.py")
 
+    import joblib
+
     metrics = load_metrics()
     model = joblib.load(model_path)
     feature_names = get_feature_names(model, metrics)
     threshold = float(metrics.get("threshold", 0.5))
+    if not args.no_compile:
+        model = compile_model(model, feature_names)
+
+    if args.input or args.source == "db":
+        if not args.output:
+            parser.error("bulk mode needs --output")
+        if args.chunk_size < 1:
+            parser.error("--chunk-size must be >= 1")
+        if args.source == "db":
+            try:
+                from ml.data_loader import iter_unscored_readings
+            except Exception:
+                from data_loader import iter_unscored_readings
+            chunks = iter_unscored_readings(chunk_size=args.chunk_size, limit=args.limit)
+        else:
+            input_path = Path(args.input).expanduser().resolve()
+            if not input_path.exists():
+                raise FileNotFoundError(f"Input not found: {input_path}")
+            chunks = iter_input_chunks(input_path, args.chunk_size)
+        output_path = Path(args.output).expanduser().resolve()
+        stats = score_bulk(
+            chunks, ChunkWriter(output_path), model, feature_names, threshold, metrics, n_jobs=args.n_jobs
+        )
+        print(f"Scored {stats['rows']:,} rows ({stats['errors']:,} errors) in {stats['seconds']:.2f}s")
+        print(f"Throughput: {stats['rows_per_s']:,.0f} rows/s")
+        print(f"Output: {output_path}")
+        return
 
     if not args.json:
         # Build a safe example matching the trained feature names
@@ -159,7 +593,7 @@ def main() -> None:
         print("Example payload:")
         print(json.dumps(example, indent=2))
 
-        result = predict_from_json(model, example, feature_names, threshold, metrics)
+        result = predict_from_json(model, example, feature_names, threshold, metrics, top_k=args.top_k)
         print(json.dumps(result, indent=2))
         return
 
@@ -168,7 +602,7 @@ def main() -> None:
         if not isinstance(payload, dict):
             raise ValueError("Payload must be a JSON object (dictionary).")
 
-        result = predict_from_json(model, payload, feature_names, threshold, metrics)
+        result = predict_from_json(model, payload, feature_names, threshold, metrics, top_k=args.top_k)
         print(json.dumps(result, indent=2))
 
     except Exception as e:
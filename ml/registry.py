@@ -0,0 +1,143 @@
+"""
+Versioned artifact registry.
+
+Each trained model is published to its own directory,
+``ml/artifacts/versions/<version>/`` (model.joblib, metrics.json,
+eval_report.json), and ``ml/artifacts/CURRENT`` names the version to serve.
+Both steps are atomic renames, so a reader never sees a half-written
+version: it either gets the old CURRENT or the complete new one.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ARTIFACTS_DIR = REPO_ROOT / "ml" / "artifacts"
+
+
+@dataclass(frozen=True)
+class ArtifactPaths:
+    version: str | None
+    directory: Path
+    model_path: Path
+    metrics_path: Path
+    eval_report_path: Path
+    compact_path: Path
+
+
+def versions_dir(artifacts_dir: Path = ARTIFACTS_DIR) -> Path:
+    return artifacts_dir / "versions"
+
+
+def current_version(artifacts_dir: Path = ARTIFACTS_DIR) -> str | None:
+    pointer = artifacts_dir / "CURRENT"
+    if not pointer.exists():
+        return None
+    version = pointer.read_text().strip()
+    return version or None
+
+
+def list_versions(artifacts_dir: Path = ARTIFACTS_DIR) -> list[str]:
+    root = versions_dir(artifacts_dir)
+    if not root.exists():
+        return []
+    return sorted(p.name for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def _is_plain_name(version: str) -> bool:
+    return bool(version) and version not in (".", "..") and "/" not in version and "\\" not in version
+
+
+def version_dir(version: str, artifacts_dir: Path = ARTIFACTS_DIR) -> Path:
+    """Directory of a published ``version``; anything else is FileNotFoundError.
+
+    ``version`` comes from CURRENT or from /admin/reload, so it must name an
+    entry of versions/ itself: no separators, no ``..``, nothing outside it.
+    """
+    root = versions_dir(artifacts_dir)
+    if not _is_plain_name(version) or version not in list_versions(artifacts_dir):
+        raise FileNotFoundError(f"Artifact version {version!r} not found in {root}")
+    directory = root / version
+    if directory.resolve().parent != root.resolve():
+        raise FileNotFoundError(f"Artifact version {version!r} not found in {root}")
+    return directory
+
+
+def resolve(artifacts_dir: Path = ARTIFACTS_DIR, version: str | None = None) -> ArtifactPaths:
+    """Paths for ``version`` (default: CURRENT, else the legacy top-level files)."""
+    version = version or current_version(artifacts_dir)
+    directory = version_dir(version, artifacts_dir) if version else artifacts_dir
+    return ArtifactPaths(
+        version=version,
+        directory=directory,
+        model_path=directory / "model.joblib",
+        metrics_path=directory / "metrics.json",
+        eval_report_path=directory / "eval_report.json",
+        compact_path=directory / "model.json",
+    )
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def set_current(version: str, artifacts_dir: Path = ARTIFACTS_DIR) -> None:
+    version_dir(version, artifacts_dir)
+    _atomic_write_text(artifacts_dir / "CURRENT", version + "\n")
+
+
+def publish(
+    version: str,
+    model: Any,
+    metrics: dict,
+    eval_report: dict | None = None,
+    artifacts_dir: Path = ARTIFACTS_DIR,
+    make_current: bool = True,
+    compact_json: Callable[[dict], str | None] | None = None,
+) -> ArtifactPaths:
+    """Write a complete version directory, then point CURRENT at it.
+
+    ``compact_json`` renders the serving-only model file from the final
+    metrics (so it carries the final version); None skips it.
+    """
+    import joblib
+
+    if not _is_plain_name(version) or version.startswith("."):
+        raise ValueError(f"Invalid artifact version name: {version!r}")
+    root = versions_dir(artifacts_dir)
+    root.mkdir(parents=True, exist_ok=True)
+
+    final_version = version
+    suffix = 1
+    while (root / final_version).exists():
+        final_version = f"{version}-{suffix}"
+        suffix += 1
+
+    staging = root / f".staging-{final_version}-{os.getpid()}"
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir()
+    try:
+        metrics = {**metrics, "model_version": final_version}
+        joblib.dump(model, staging / "model.joblib")
+        (staging / "metrics.json").write_text(json.dumps(metrics, indent=2))
+        if eval_report is not None:
+            (staging / "eval_report.json").write_text(json.dumps(eval_report, indent=2))
+        compact = compact_json(metrics) if compact_json is not None else None
+        if compact is not None:
+            (staging / "model.json").write_text(compact)
+        os.rename(staging, root / final_version)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if make_current:
+        set_current(final_version, artifacts_dir)
+    return resolve(artifacts_dir, final_version)
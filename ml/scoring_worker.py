@@ -0,0 +1,249 @@
+"""
+Background scoring of stored vital readings.
+
+Moves scoring off the request path: the worker claims unscored
+``"VitalReading"`` rows in large batches, scores each batch with the
+vectorized bulk path (predict.score_frame) and writes probability, flag and
+model version back (see migrations/003_add_risk_scores.sql):
+
+    python ml/scoring_worker.py                  # run until interrupted
+    python ml/scoring_worker.py --once           # drain the backlog and exit
+    python ml/scoring_worker.py --concurrency 4 --batch-size 20000
+
+Each batch is claimed with ``FOR UPDATE SKIP LOCKED`` inside its own
+transaction, so any number of threads or worker processes can run against
+the same table without scoring a row twice, and a crash before commit
+simply releases the rows. Scores go back through ``COPY`` into a temporary
+table and a single ``UPDATE ... FROM``. Between drains the worker waits on
+``LISTEN vital_reading_unscored`` (falling back to polling every
+``--poll-seconds``) and picks up a newly published model version on its
+next cycle.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+import psycopg
+from psycopg_pool import ConnectionPool
+
+if TYPE_CHECKING:
+    from ml import registry  # pragma: no cover
+    from ml.data_loader import READINGS_SELECT, UNSCORED_FILTER, get_database_url, peak_rss_mb  # pragma: no cover
+    from ml.predict import score_frame  # pragma: no cover
+    from ml.service.model_state import ModelState, load_model_state  # pragma: no cover
+else:
+    try:
+        from ml import registry
+        from ml.data_loader import READINGS_SELECT, UNSCORED_FILTER, get_database_url, peak_rss_mb
+        from ml.predict import score_frame
+        from ml.service.model_state import ModelState, load_model_state
+    except Exception:
+        import registry
+        from data_loader import READINGS_SELECT, UNSCORED_FILTER, get_database_url, peak_rss_mb
+        from predict import score_frame
+        from service.model_state import ModelState, load_model_state
+
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_CONCURRENCY = 2
+DEFAULT_POLL_SECONDS = 30.0
+NOTIFY_CHANNEL = "vital_reading_unscored"
+
+_CLAIM_QUERY = READINGS_SELECT + """WHERE {where}
+ORDER BY vr."submittedAt", vr.id
+LIMIT %(limit)s
+FOR UPDATE OF vr SKIP LOCKED
+"""
+_UNSCORED = UNSCORED_FILTER
+_STALE = '(vr."riskScoredAt" IS NULL OR vr."riskModelVersion" IS DISTINCT FROM %(version)s)'
+
+_WRITE_BACK = """
+UPDATE "VitalReading" vr
+SET "riskProbability" = s."riskProbability",
+    "riskFlag" = s."riskFlag",
+    "riskModelVersion" = %(version)s,
+    "riskScoredAt" = now()
+FROM _risk_scores s
+WHERE vr.id = s.id
+"""
+
+
+class ScoringWorker:
+    """Claims, scores and writes back batches of unscored readings."""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rescore: bool = False,
+        artifacts_dir: Path = registry.ARTIFACTS_DIR,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.pool = pool
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.rescore = rescore
+        self.artifacts_dir = artifacts_dir
+        self.state: ModelState = load_model_state(artifacts_dir)
+        self.stop = threading.Event()
+
+    def refresh_model(self) -> bool:
+        """Load the CURRENT artifact version if it changed; True when swapped."""
+        version = registry.current_version(self.artifacts_dir)
+        if version is None or version == self.state.version:
+            return False
+        self.state = load_model_state(self.artifacts_dir)
+        print(f"Loaded model version {self.state.version}")
+        return True
+
+    def score_batch(self) -> tuple[int, int]:
+        """Claim, score and write back one batch; returns (rows, errors)."""
+        state = self.state  # one model for the whole batch, even across a reload
+        params = {"limit": self.batch_size, "version": state.version}
+        query = _CLAIM_QUERY.format(where=_STALE if self.rescore else _UNSCORED)
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                rows = cur.fetchall()
+                if not rows:
+                    return 0, 0
+                frame = pd.DataFrame.from_records(rows, columns=[d.name for d in cur.description])
+                del rows
+                scored = score_frame(
+                    state.engine, frame, state.feature_names, state.threshold, state.metrics
+                )
+
+                ok = scored["error"].to_numpy() == ""
+                probs = scored["risk_probability"].to_numpy(dtype=float)
+                flags = scored["pred"].to_numpy(dtype=float, na_value=np.nan) == 1
+                # Unscorable rows (missing vitals or age) are stamped with the
+                # version and a NULL score so they are not claimed again.
+                cur.execute(
+                    'CREATE TEMP TABLE _risk_scores ON COMMIT DROP AS '
+                    'SELECT id, "riskProbability", "riskFlag" FROM "VitalReading" WITH NO DATA'
+                )
+                with cur.copy('COPY _risk_scores (id, "riskProbability", "riskFlag") FROM STDIN') as copy:
+                    for row_id, good, prob, flag in zip(frame["id"], ok, probs, flags):
+                        copy.write_row((row_id, float(prob), bool(flag)) if good else (row_id, None, None))
+                cur.execute(_WRITE_BACK, params)
+            # Leaving the pool context commits the claim and the write-back together.
+        return len(frame), int((~ok).sum())
+
+    def drain(self) -> dict[str, float]:
+        """Score until no unscored rows are left, ``concurrency`` batches at a time."""
+        start = time.perf_counter()
+        totals = {"rows": 0, "errors": 0, "batches": 0}
+        lock = threading.Lock()
+
+        def loop() -> None:
+            while not self.stop.is_set():
+                rows, errors = self.score_batch()
+                if rows == 0:
+                    return
+                with lock:
+                    totals["rows"] += rows
+                    totals["errors"] += errors
+                    totals["batches"] += 1
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="scorer") as pool:
+            for future in [pool.submit(loop) for _ in range(self.concurrency)]:
+                future.result()
+
+        seconds = time.perf_counter() - start
+        return {**totals, "seconds": seconds, "rows_per_s": totals["rows"] / max(seconds, 1e-9)}
+
+    def run(self, poll_seconds: float = DEFAULT_POLL_SECONDS, once: bool = False) -> None:
+        """Drain, then wait for a NOTIFY (or the poll timeout) and drain again."""
+        listener = None
+        if not once:
+            listener = psycopg.connect(get_database_url(), autocommit=True)
+            listener.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        try:
+            while not self.stop.is_set():
+                self.refresh_model()
+                stats = self.drain()
+                if stats["rows"]:
+                    print(
+                        f"Scored {stats['rows']:,} readings ({stats['errors']:,} errors) "
+                        f"in {stats['seconds']:.2f}s ({stats['rows_per_s']:,.0f} rows/s) "
+                        f"with model {self.state.version}; peak RSS {peak_rss_mb():.1f} MiB"
+                    )
+                if once or listener is None:
+                    return
+                # Returns on the first notification or after poll_seconds; a
+                # burst of inserts is handled by the next drain as a whole.
+                for _ in listener.notifies(timeout=poll_seconds, stop_after=1):
+                    pass
+        finally:
+            if listener is not None:
+                listener.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score stored vital readings in the background")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Readings claimed per batch.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Batches scored in parallel (one pooled connection each).",
+    )
+    parser.add_argument(
+        "--poll-seconds",
+        type=float,
+        default=DEFAULT_POLL_SECONDS,
+        help="Fallback poll interval when no NOTIFY arrives.",
+    )
+    parser.add_argument("--once", action="store_true", help="Drain the current backlog and exit.")
+    parser.add_argument(
+        "--rescore",
+        action="store_true",
+        help="Also rescore readings scored by a different model version.",
+    )
+    parser.add_argument(
+        "--artifacts-dir",
+        type=Path,
+        default=Path(os.environ.get("ML_ARTIFACTS_DIR", str(registry.ARTIFACTS_DIR))),
+        help="Model registry to score with (default: $ML_ARTIFACTS_DIR or ml/artifacts).",
+    )
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be >= 1")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+
+    with ConnectionPool(
+        get_database_url(),
+        min_size=args.concurrency,
+        max_size=args.concurrency,
+        name="scoring-worker",
+        open=True,
+    ) as pool:
+        worker = ScoringWorker(pool, args.batch_size, args.concurrency, args.rescore, args.artifacts_dir)
+        print(f"Scoring with model {worker.state.version} (batch {args.batch_size:,}, concurrency {args.concurrency})")
+
+        def request_stop(signum: int, frame: Any) -> None:
+            print("Stopping after the current batches...")
+            worker.stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        try:
+            worker.run(args.poll_seconds, once=args.once)
+        except KeyboardInterrupt:
+            worker.stop.set()
+
+
+if __name__ == "__main__":
+    main()
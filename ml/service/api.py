@@ -1,30 +1,127 @@
+import hmac
+import os
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any
 
-import joblib
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
-from ml.predict import get_feature_names, load_metrics, predict_from_json
-from service.schemas import PredictOut, VitalsIn
+from ml import registry
+from ml.predict import EXPLAIN_TOP_K, _age_group, predict_batch, predict_from_json
+from service import metrics as prom
+from service.batching import MicroBatcher
+from service.cache import PredictionCache
+from service.drift import DriftTracker
+from service.model_state import ModelHolder, ModelState
+from service.schemas import BatchItemOut, BatchPredictIn, BatchPredictOut, PredictOut, VitalsIn
+from service.streaming import NDJSON_MEDIA_TYPE, NDJSONStreamResponse, ndjson_blocks
 
-REPO_ROOT = Path(__file__).resolve().parents[2]
+# Registry the service loads from; defaults to ml/artifacts.
+ARTIFACTS_DIR = Path(os.environ.get("ML_ARTIFACTS_DIR", str(registry.ARTIFACTS_DIR)))
+# Live model; reloads swap holder.current atomically. Read it once per request.
+holder = ModelHolder(ARTIFACTS_DIR)
 
-app = FastAPI(title="GitVitals ML Service", version="0.1.0")
+# Poll <artifacts>/CURRENT for new versions; 0 disables (use /admin/reload).
+RELOAD_POLL_SECONDS = float(os.environ.get("ML_RELOAD_POLL_SECONDS", "0"))
+# /admin endpoints require a matching X-Admin-Token header. Without a token
+# they are refused, unless ML_ADMIN_ALLOW_UNAUTHENTICATED=1 (local use only).
+ADMIN_TOKEN = os.environ.get("ML_ADMIN_TOKEN", "")
+ADMIN_ALLOW_UNAUTHENTICATED = os.environ.get("ML_ADMIN_ALLOW_UNAUTHENTICATED", "0") == "1"
 
-metrics = load_metrics()
-model_path = REPO_ROOT / "ml" / "artifacts" / "model.joblib"
-model = joblib.load(model_path)
-feature_names = get_feature_names(model, metrics)
-threshold = float(metrics.get("threshold", 0.5))
+# Micro-batching for /predict; ML_MICROBATCH_MAX_SIZE=1 turns it off.
+MICROBATCH_MAX_SIZE = int(os.environ.get("ML_MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("ML_MICROBATCH_MAX_WAIT_MS", "2"))
 
+# Prediction cache for repeated readings; ML_PREDICTION_CACHE_SIZE=0 turns it off.
+PREDICTION_CACHE_SIZE = int(os.environ.get("ML_PREDICTION_CACHE_SIZE", "10000"))
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE) if PREDICTION_CACHE_SIZE > 0 else None
+
+# /predict/stream scores at most this many lines per vectorized call.
+STREAM_BLOCK_SIZE = int(os.environ.get("ML_STREAM_BLOCK_SIZE", "1000"))
+STREAM_MAX_LINE_BYTES = 64 * 1024
+
+# Top contributors listed in PredictOut.reasons; ML_EXPLAIN_TOP_K=0 turns explanations off.
+REASONS_TOP_K = int(os.environ.get("ML_EXPLAIN_TOP_K", str(EXPLAIN_TOP_K)))
+DEFAULT_REASON = "Risk probability compared to threshold"
+
+# Live input/output histograms vs. the training reference; ML_DRIFT_ENABLED=0 turns it off.
+DRIFT_ENABLED = os.environ.get("ML_DRIFT_ENABLED", "1") != "0"
+# Histograms with fewer live readings than this report no PSI/KS yet.
+DRIFT_MIN_COUNT = int(os.environ.get("ML_DRIFT_MIN_COUNT", "100"))
+drift_tracker = DriftTracker(DRIFT_MIN_COUNT) if DRIFT_ENABLED else None
+
+
+def _observe_drift(state: ModelState, payload: dict[str, Any], result: dict[str, Any]) -> None:
+    if drift_tracker is not None:
+        drift_tracker.observe(state, payload, result["risk_probability"])
+
+
+def _record(state: ModelState, payload: dict[str, Any], result: dict[str, Any]) -> None:
+    age = payload.get("age_years")
+    group = _age_group(float(age)) if age is not None and age == age else "unknown"
+    prom.PREDICTIONS.inc(group, result["pred"])
+    _observe_drift(state, payload, result)
+
+
+def _record_timings(timings: dict[str, float]) -> None:
+    for stage, seconds in timings.items():
+        prom.STAGE_SECONDS.observe(seconds, stage)
+
+
+def _score_batch(payloads: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    state = holder.current
+    timings: dict[str, float] = {}
+    results = predict_batch(
+        state.engine, payloads, state.feature_names, state.threshold, state.metrics, timings,
+        top_k=REASONS_TOP_K,
+    )
+    _record_timings(timings)
+    for payload, result in zip(payloads, results):
+        result["model_version"] = state.version
+        if "error" not in result:
+            _record(state, payload, result)
+    return results
+
+
+def _score_one(state: ModelState, payload: dict[str, Any]) -> dict[str, Any]:
+    timings: dict[str, float] = {}
+    result = predict_from_json(
+        state.engine, payload, state.feature_names, state.threshold, state.metrics, timings,
+        top_k=REASONS_TOP_K,
+    )
+    _record_timings(timings)
+    result["model_version"] = state.version
+    _record(state, payload, result)
+    return result
 
-@app.get("/health")
-def health():
-    return {"ok": True}
 
+batcher = (
+    MicroBatcher(_score_batch, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS)
+    if MICROBATCH_MAX_SIZE > 1
+    else None
+)
 
-@app.post("/predict", response_model=PredictOut)
-def predict(v: VitalsIn):
-    payload = {
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    holder.start_watcher(RELOAD_POLL_SECONDS)
+    yield
+    holder.stop_watcher()
+    if batcher is not None:
+        await batcher.stop()
+
+
+app = FastAPI(title="GitVitals ML Service", version="0.1.0", lifespan=lifespan)
+app.add_middleware(prom.InFlightMiddleware)
+
+
+def _to_payload(v: VitalsIn) -> dict[str, Any]:
+    return {
         "age_years": v.age_years,
         "bp_systolic": v.systolic_bp,
         "bp_diastolic": v.diastolic_bp,
@@ -36,11 +133,246 @@ def predict(v: VitalsIn):
         "pain_level": v.pain_0_10,
     }
 
-    result = predict_from_json(model, payload, feature_names, threshold, metrics)
+
+def _to_predict_out(result: dict[str, Any]) -> PredictOut:
     return PredictOut(
         p_flag=result["risk_probability"],
         pred_flag=result["pred"],
         threshold=result["threshold"],
-        reasons=["Risk probability compared to threshold"],
-        model_version="0.1.0",
+        # Largest log-odds contributors first; sklearn fallback models have none.
+        reasons=[c["text"] for c in result.get("contributions") or ()] or [DEFAULT_REASON],
+        model_version=result["model_version"],
     )
+
+
+@app.get("/health")
+def health():
+    return {"ok": True}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(
+        prom.render(holder.current.version),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/batching")
+def batching_stats():
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+
+@app.get("/cache")
+def cache_stats():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
+@app.get("/drift")
+def drift_report():
+    if drift_tracker is None:
+        return {"enabled": False, "reason": "ML_DRIFT_ENABLED=0"}
+    return drift_tracker.report(holder.current)
+
+
+def _check_admin(token: str | None) -> None:
+    if not ADMIN_TOKEN:
+        if ADMIN_ALLOW_UNAUTHENTICATED:
+            return
+        raise HTTPException(
+            status_code=403,
+            detail="Admin endpoints are disabled: set ML_ADMIN_TOKEN (or ML_ADMIN_ALLOW_UNAUTHENTICATED=1)",
+        )
+    if token is None or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/model")
+def admin_model(x_admin_token: str | None = Header(default=None)):
+    _check_admin(x_admin_token)
+    state = holder.current
+    return {
+        "version": state.version,
+        "feature_names": state.feature_names,
+        "threshold": state.threshold,
+        "age_group_thresholds": state.metrics.get("age_group_thresholds", {}),
+        "compiled": state.engine is not state.model,
+        "last_reload_error": holder.last_reload_error,
+        **({"workers": holder.supervisor.info()} if holder.supervisor is not None else {}),
+    }
+
+
+@app.post("/admin/reload")
+def admin_reload(
+    version: str | None = None,
+    force: bool = False,
+    x_admin_token: str | None = Header(default=None),
+):
+    _check_admin(x_admin_token)
+    try:
+        return holder.reload(version, force=force)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except Exception as exc:
+        # The previous model keeps serving.
+        raise HTTPException(status_code=500, detail=f"Reload failed: {exc}") from exc
+
+
+@app.post("/admin/drift/reset")
+def admin_drift_reset(x_admin_token: str | None = Header(default=None)):
+    _check_admin(x_admin_token)
+    if drift_tracker is None:
+        return {"enabled": False}
+    drift_tracker.reset()
+    return {"enabled": True, "reset": True}
+
+
+@app.post(
+    "/predict",
+    response_model=PredictOut,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": VitalsIn.model_json_schema()}},
+        }
+    },
+)
+async def predict(request: Request):
+    # Body is parsed and validated here (not by FastAPI) so the pydantic
+    # stage can be timed; failures still become the usual 422 response.
+    t_start = time.perf_counter()
+    try:
+        body = await request.json()
+    except ValueError as exc:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error", "input": None}]
+        ) from exc
+    t0 = time.perf_counter()
+    try:
+        v = VitalsIn.model_validate(body)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**e, "loc": ("body", *e["loc"])} for e in exc.errors(include_url=False)]
+        ) from exc
+    t1 = time.perf_counter()
+    state = holder.current
+    payload = _to_payload(v)
+    t2 = time.perf_counter()
+    prom.STAGE_SECONDS.observe(t1 - t0, "validation")
+    prom.STAGE_SECONDS.observe(t2 - t1, "payload_mapping")
+
+    cache_key = tuple(payload.get(name) for name in state.feature_names)
+    if prediction_cache is not None:
+        cached = prediction_cache.get(state.version, cache_key)
+        if cached is not None:
+            # Repeated readings are still live traffic: count them and bin them for drift.
+            _record(state, payload, cached)
+            prom.REQUEST_SECONDS.observe(time.perf_counter() - t_start, "predict")
+            return _to_predict_out(cached)
+
+    if batcher is None:
+        result = await run_in_threadpool(_score_one, state, payload)
+    else:
+        result = await batcher.submit(payload)
+
+    if prediction_cache is not None:
+        prediction_cache.put(result["model_version"], cache_key, result)
+    prom.REQUEST_SECONDS.observe(time.perf_counter() - t_start, "predict")
+    return _to_predict_out(result)
+
+
+def _validation_message(exc: ValidationError) -> str:
+    """One line per reading: ``field: message; ...``."""
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in exc.errors(include_url=False)
+    )
+
+
+def _score_validated(parsed: list[VitalsIn | str], start: int = 0) -> list[BatchItemOut]:
+    """Score validated readings in one call; ``str`` entries are validation errors."""
+    items: list[BatchItemOut | None] = [None] * len(parsed)
+    payloads: list[dict[str, Any]] = []
+    positions: list[int] = []
+    for j, v in enumerate(parsed):
+        if isinstance(v, str):
+            items[j] = BatchItemOut(index=start + j, error=v)
+        else:
+            payloads.append(_to_payload(v))
+            positions.append(j)
+
+    for j, result in zip(positions, _score_batch(payloads)):
+        if "error" in result:
+            items[j] = BatchItemOut(index=start + j, error=result["error"])
+        else:
+            items[j] = BatchItemOut(index=start + j, result=_to_predict_out(result))
+    return [item for item in items if item is not None]
+
+
+@app.post("/predict/batch", response_model=BatchPredictOut)
+def predict_batch_endpoint(body: BatchPredictIn):
+    # Validate rows one by one so a bad reading only fails its own slot.
+    parsed: list[VitalsIn | str] = []
+    for raw in body.readings:
+        try:
+            parsed.append(VitalsIn.model_validate(raw))
+        except ValidationError as exc:
+            parsed.append(_validation_message(exc))
+
+    results = _score_validated(parsed)
+    n_errors = sum(1 for item in results if item.error is not None)
+    return BatchPredictOut(results=results, n_ok=len(results) - n_errors, n_errors=n_errors)
+
+
+def _score_stream_block(lines: list[bytes | None], start: int) -> bytes:
+    t0 = time.perf_counter()
+    parsed: list[VitalsIn | str] = []
+    for line in lines:
+        if line is None:
+            parsed.append(f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes")
+            continue
+        try:
+            parsed.append(VitalsIn.model_validate_json(line))
+        except ValidationError as exc:
+            parsed.append(_validation_message(exc))
+    prom.STAGE_SECONDS.observe(time.perf_counter() - t0, "validation")
+    items = _score_validated(parsed, start)
+    return b"".join(item.model_dump_json(exclude_none=True).encode() + b"\n" for item in items)
+
+
+@app.post(
+    "/predict/stream",
+    response_class=NDJSONStreamResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON_MEDIA_TYPE: {"schema": VitalsIn.model_json_schema()}},
+        },
+        "responses": {"200": {"content": {NDJSON_MEDIA_TYPE: {"schema": BatchItemOut.model_json_schema()}}}},
+    },
+)
+async def predict_stream(request: Request):
+    """Score an NDJSON stream of VitalsIn records and stream back one BatchItemOut line each.
+
+    Lines are validated and scored in blocks as they arrive, and each block's
+    results are sent before the next block is read, so memory stays bounded
+    by the block size on both ends however long the stream is. ``index`` is
+    the 0-based position of the record among the non-empty input lines.
+
+    The client has to read results while it is still uploading. One that
+    sends the whole body before reading stalls once unread results fill the
+    socket buffers; such clients should send bounded requests instead.
+    """
+
+    async def results():
+        index = 0
+        async for block in ndjson_blocks(request.stream(), STREAM_BLOCK_SIZE, STREAM_MAX_LINE_BYTES):
+            # Off the event loop: a full block is milliseconds of CPU.
+            yield await run_in_threadpool(_score_stream_block, block, index)
+            index += len(block)
+
+    return NDJSONStreamResponse(results())
@@ -0,0 +1,110 @@
+"""
+Async micro-batching for /predict.
+
+Concurrent requests are queued and scored together: the worker task waits for
+the first request, then keeps collecting until it has ``max_batch_size`` items
+or ``max_wait_ms`` has passed, and scores the whole batch with one vectorized
+call. Each caller awaits its own future.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import Any, Callable
+
+ScoreFn = Callable[[list[dict[str, Any]]], list[dict[str, Any]]]
+
+
+class MicroBatcher:
+    def __init__(self, score_fn: ScoreFn, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._queue: asyncio.Queue[tuple[dict[str, Any], asyncio.Future]] | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._batch_sizes: Counter[int] = Counter()
+
+    def _ensure_running(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # (Re)bind to the current loop; queues and tasks are loop-specific.
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue))
+        assert self._queue is not None
+        return self._queue
+
+    async def submit(self, payload: dict[str, Any]) -> dict[str, Any]:
+        queue = self._ensure_running()
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        await queue.put((payload, fut))
+        return await fut
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._queue = None
+        self._loop = None
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple[dict[str, Any], asyncio.Future]]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = await self._collect(queue)
+            self._batch_sizes[len(batch)] += 1
+            live = [(payload, fut) for payload, fut in batch if not fut.cancelled()]
+            if not live:
+                continue
+            try:
+                # Scoring is a single vectorized call, cheap enough to run inline.
+                results = self.score_fn([payload for payload, _ in live])
+            except Exception as exc:
+                for _, fut in live:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+            for (_, fut), result in zip(live, results):
+                if fut.done():
+                    continue
+                if "error" in result:
+                    fut.set_exception(ValueError(result["error"]))
+                else:
+                    fut.set_result(result)
+
+    def stats(self) -> dict[str, Any]:
+        n_batches = sum(self._batch_sizes.values())
+        n_items = sum(size * count for size, count in self._batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "batches": n_batches,
+            "items": n_items,
+            "mean_batch_size": (n_items / n_batches) if n_batches else 0.0,
+            "max_observed_batch_size": max(self._batch_sizes, default=0),
+            "batch_size_counts": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+        }
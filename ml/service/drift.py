@@ -0,0 +1,149 @@
+"""
+Online drift monitoring for live predictions.
+
+Each scored reading is binned on the reference edges that training exported
+(see ml/drift.py): one count per feature and for ``p_flag``, in the
+reading's age group. Counts live in per-thread shards, as in metrics.py, so
+recording is a few bisects and list increments with no lock on the request
+path. Memory is fixed by the reference layout (features x age groups x
+bins, per thread), however much traffic arrives. ``/drift`` sums the shards
+and compares them with the reference using PSI and KS.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_right
+from typing import Any
+
+import numpy as np
+
+from ml.drift import PREDICTION_KEY, compare_counts
+from ml.predict import AGE_GROUP_BOUNDS
+
+_AGE_BOUNDS = [float(b) for b in AGE_GROUP_BOUNDS]
+_STATUS_RANK = {"insufficient_data": -1, "ok": 0, "warn": 1, "alert": 2}
+
+
+class DriftMonitor:
+    """Live histograms for one model version, binned like its reference."""
+
+    def __init__(self, version: str, reference: dict[str, Any], min_count: int = 100):
+        self.version = version
+        self.reference = reference
+        self.min_count = min_count
+        self.groups: list[str] = list(reference["age_groups"])
+        self.started_at = time.time()
+        # (name, edges, offset, n_bins) per histogram, in one flat count list.
+        self._layout: list[tuple[str, list[float], int, int]] = []
+        size = 0
+        entries = [*reference["features"].items(), (PREDICTION_KEY, reference["prediction"])]
+        for name, entry in entries:
+            edges = [float(e) for e in entry["edges"]]
+            self._layout.append((name, edges, size, len(edges) + 1))
+            size += len(self.groups) * (len(edges) + 1)
+        self._size = size
+        self._local = threading.local()
+        self._shards: list[list[int]] = []
+        self._register_lock = threading.Lock()
+
+    def _shard(self) -> list[int]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0] * self._size
+            with self._register_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def observe(self, payload: dict[str, Any], probability: float) -> None:
+        age = payload.get("age_years")
+        if age is None or age != age:  # no age group to bin into
+            return
+        group = bisect_right(_AGE_BOUNDS, float(age))
+        shard = self._shard()
+        for name, edges, offset, n_bins in self._layout:
+            value = probability if name == PREDICTION_KEY else payload.get(name)
+            if value is None or value != value:  # missing or NaN
+                continue
+            shard[offset + group * n_bins + bisect_right(edges, value)] += 1
+
+    def _totals(self) -> np.ndarray:
+        with self._register_lock:
+            shards = list(self._shards)
+        if not shards:
+            return np.zeros(self._size, dtype=np.int64)
+        return np.sum(np.array(shards, dtype=np.int64), axis=0)
+
+    def report(self) -> dict[str, Any]:
+        totals = self._totals()
+        n_groups = len(self.groups)
+        histograms: dict[str, dict[str, Any]] = {}
+        worst = "insufficient_data"
+        for name, _edges, offset, n_bins in self._layout:
+            live = totals[offset:offset + n_groups * n_bins].reshape(n_groups, n_bins)
+            ref = self.reference["prediction"] if name == PREDICTION_KEY else self.reference["features"][name]
+            overall = compare_counts(ref["counts"]["all"], live.sum(axis=0).tolist(), self.min_count)
+            groups = {
+                g: compare_counts(ref["counts"][g], live[i].tolist(), self.min_count)
+                for i, g in enumerate(self.groups)
+            }
+            for stats in (overall, *groups.values()):
+                if _STATUS_RANK[stats["status"]] > _STATUS_RANK[worst]:
+                    worst = stats["status"]
+            histograms[name] = {"all": overall, "groups": groups}
+
+        prediction = histograms.pop(PREDICTION_KEY)
+        n_observed = int(totals[self._layout[-1][2]:].sum())
+        return {
+            "model_version": self.version,
+            "since": self.started_at,
+            "n_observed": n_observed,
+            "min_count": self.min_count,
+            "status": worst,
+            "features": histograms,
+            "prediction": prediction,
+        }
+
+
+class DriftTracker:
+    """Keeps one DriftMonitor for the model currently being served."""
+
+    def __init__(self, min_count: int = 100):
+        self.min_count = min_count
+        self._monitor: DriftMonitor | None = None
+        self._lock = threading.Lock()
+
+    def monitor_for(self, state: Any) -> DriftMonitor | None:
+        monitor = self._monitor
+        if monitor is not None and monitor.version == state.version:
+            return monitor
+        if state.drift_reference is None:
+            return None
+        with self._lock:
+            # New model (or first request): start counting against its reference.
+            if self._monitor is None or self._monitor.version != state.version:
+                self._monitor = DriftMonitor(state.version, state.drift_reference, self.min_count)
+            return self._monitor
+
+    def observe(self, state: Any, payload: dict[str, Any], probability: float) -> None:
+        monitor = self.monitor_for(state)
+        if monitor is not None:
+            monitor.observe(payload, probability)
+
+    def reset(self) -> None:
+        # Writers may still hold the old monitor for one more reading; it is
+        # simply dropped with it.
+        with self._lock:
+            self._monitor = None
+
+    def report(self, state: Any) -> dict[str, Any]:
+        monitor = self.monitor_for(state)
+        if monitor is None:
+            return {
+                "enabled": False,
+                "model_version": state.version,
+                "reason": "No drift_reference in eval_report.json; retrain to export one.",
+            }
+        return {"enabled": True, **monitor.report()}
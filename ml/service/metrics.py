@@ -0,0 +1,174 @@
+"""
+Prometheus metrics for the ML service.
+
+Every metric keeps one shard per thread (``threading.local``), so recording
+is a plain in-place update on memory no other thread writes: no locks on the
+request path. A lock is only taken the first time a thread records, to
+register its shard, and at scrape time the shards are summed.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Any, Iterable
+
+# Upper bounds in seconds; stage timings are mostly microseconds.
+DEFAULT_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Sharded:
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._register_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: dict = {}
+            with self._register_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _all_shards(self) -> list[dict]:
+        with self._register_lock:
+            return list(self._shards)
+
+
+class Counter(_Sharded):
+    def inc(self, *labelvalues: Any, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0.0) + amount
+
+    def render(self) -> list[str]:
+        totals: dict[tuple, float] = {}
+        for shard in self._all_shards():
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0.0) + value
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key in sorted(totals):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {totals[key]:g}")
+        return lines
+
+
+class Gauge(_Sharded):
+    """Summed across threads, so inc and dec may happen on different threads."""
+
+    def inc(self, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[()] = shard.get((), 0.0) + amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def render(self) -> list[str]:
+        total = sum(shard.get((), 0.0) for shard in self._all_shards())
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {total:g}"]
+
+
+class Histogram(_Sharded):
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: Any) -> None:
+        shard = self._shard()
+        cell = shard.get(labelvalues)
+        if cell is None:
+            # [count per bucket..., +Inf count, sum]
+            cell = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def render(self) -> list[str]:
+        merged: dict[tuple, list] = {}
+        for shard in self._all_shards():
+            for key, cell in list(shard.items()):
+                acc = merged.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+                for i, v in enumerate(cell):
+                    acc[i] += v
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key in sorted(merged):
+            cell = merged[key]
+            cumulative = 0
+            for bound, count in zip(self.buckets, cell):
+                cumulative += count
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            cumulative += cell[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {cell[-1]:.9g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "gitvitals_predict_stage_seconds",
+    "Time spent in each prediction stage (per scoring call; batched calls count once).",
+    labelnames=("stage",),
+)
+REQUEST_SECONDS = Histogram(
+    "gitvitals_request_seconds",
+    "End-to-end handler time by endpoint.",
+    labelnames=("endpoint",),
+)
+PREDICTIONS = Counter(
+    "gitvitals_predictions_total",
+    "Scored readings by age group and predicted flag.",
+    labelnames=("age_group", "pred_flag"),
+)
+IN_FLIGHT = Gauge("gitvitals_in_flight_requests", "HTTP requests currently being handled.")
+
+
+def render(model_version: str) -> str:
+    lines: list[str] = [
+        "# HELP gitvitals_model_info Model currently being served.",
+        "# TYPE gitvitals_model_info gauge",
+        f'gitvitals_model_info{{version="{_escape(model_version)}"}} 1',
+    ]
+    for metric in (STAGE_SECONDS, REQUEST_SECONDS, PREDICTIONS, IN_FLIGHT):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class InFlightMiddleware:
+    """Pure ASGI middleware tracking in-flight HTTP requests."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            IN_FLIGHT.dec()
@@ -0,0 +1,175 @@
+"""
+Hot-swappable model state for the ML service.
+
+Everything a request needs to score (model, compiled engine, feature names,
+thresholds, version) lives in one immutable ModelState. Reloads build and
+warm a complete new state off the request path and then replace the single
+``ModelHolder.current`` reference, so every request sees either the old
+model or the new one, never a mix.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ml import registry
+from ml.inference import compile_model, load_compact
+from ml.predict import get_feature_names, predict_batch
+
+# "auto": serve model.json when present, else unpickle model.joblib.
+# "joblib": always unpickle (imports sklearn).
+MODEL_FORMAT = os.environ.get("ML_MODEL_FORMAT", "auto")
+
+
+@dataclass(frozen=True)
+class ModelState:
+    version: str
+    model: Any  # sklearn pipeline, or None when served from the compact file
+    engine: Any
+    feature_names: list[str]
+    threshold: float
+    metrics: dict[str, Any]
+    # Training-time histograms for the drift monitor (eval_report.json), if exported.
+    drift_reference: dict[str, Any] | None = None
+
+
+def load_model_state(artifacts_dir: Path = registry.ARTIFACTS_DIR, version: str | None = None) -> ModelState:
+    paths = registry.resolve(artifacts_dir, version)
+    if not paths.metrics_path.exists():
+        raise FileNotFoundError(
+            f"Model artifacts not found in {paths.directory}. Run training first: python ml/train.py"
+        )
+    metrics = json.loads(paths.metrics_path.read_text())
+    if not isinstance(metrics, dict):
+        raise ValueError("metrics.json is not a JSON object")
+
+    if MODEL_FORMAT != "joblib" and paths.compact_path.exists():
+        # Fast path: a few dozen floats, no pandas/sklearn/joblib import.
+        engine, compact = load_compact(paths.compact_path)
+        model = None
+        feature_names = list(engine.feature_names)
+        identity = paths.compact_path
+        metrics = {
+            **metrics,
+            "threshold": compact.get("threshold", metrics.get("threshold", 0.5)),
+            "age_group_thresholds": compact.get("age_group_thresholds", metrics.get("age_group_thresholds")),
+        }
+    else:
+        if not paths.model_path.exists():
+            raise FileNotFoundError(
+                f"Model artifacts not found in {paths.directory}. Run training first: python ml/train.py"
+            )
+        import joblib
+
+        model = joblib.load(paths.model_path)
+        feature_names = get_feature_names(model, metrics)
+        # Fused NumPy kernel when the pipeline shape allows it, sklearn otherwise.
+        engine = compile_model(model, feature_names)
+        identity = paths.model_path
+
+    resolved_version = paths.version or metrics.get("model_version")
+    if not resolved_version:
+        digest = hashlib.sha1(identity.read_bytes()).hexdigest()[:12]
+        resolved_version = f"legacy-{digest}"
+
+    state = ModelState(
+        version=str(resolved_version),
+        model=model,
+        engine=engine,
+        feature_names=feature_names,
+        threshold=float(metrics.get("threshold", 0.5)),
+        metrics=metrics,
+        drift_reference=_load_drift_reference(paths.eval_report_path),
+    )
+    _warm_up(state)
+    return state
+
+
+def _load_drift_reference(eval_report_path: Path) -> dict[str, Any] | None:
+    if not eval_report_path.exists():
+        return None
+    try:
+        report = json.loads(eval_report_path.read_text())
+    except ValueError:
+        return None
+    reference = report.get("drift_reference") if isinstance(report, dict) else None
+    return reference if isinstance(reference, dict) else None
+
+
+def _warm_up(state: ModelState) -> None:
+    # Touch the full scoring path once so the first real request after a
+    # swap does not pay for lazy imports or first-call allocations.
+    dummy = {name: 0.0 for name in state.feature_names}
+    result = predict_batch(state.engine, [dummy], state.feature_names, state.threshold, state.metrics)[0]
+    if "error" in result:
+        raise RuntimeError(f"Warm-up prediction failed for {state.version}: {result['error']}")
+
+
+class ModelHolder:
+    """Owns the live ModelState and swaps it on reload."""
+
+    def __init__(self, artifacts_dir: Path = registry.ARTIFACTS_DIR):
+        self.artifacts_dir = artifacts_dir
+        self.current: ModelState = load_model_state(artifacts_dir)
+        self._reload_lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._last_reload_error: str | None = None
+        # Set in pre-forked workers (service/serve.py): reloads are handed to
+        # the parent, which loads the model once and replaces every worker.
+        self.supervisor: Any = None
+
+    @property
+    def last_reload_error(self) -> str | None:
+        if self.supervisor is not None:
+            return self.supervisor.last_reload_error
+        return self._last_reload_error
+
+    @last_reload_error.setter
+    def last_reload_error(self, value: str | None) -> None:
+        self._last_reload_error = value
+
+    def reload(self, version: str | None = None, force: bool = False) -> dict[str, Any]:
+        """Load ``version`` (default: CURRENT), warm it, then swap it in."""
+        if self.supervisor is not None:
+            return self.supervisor.request_reload(version, force)
+        with self._reload_lock:
+            previous = self.current
+            target = version or registry.current_version(self.artifacts_dir)
+            if not force and target is not None and target == previous.version:
+                return {"previous": previous.version, "version": previous.version, "swapped": False}
+            new_state = load_model_state(self.artifacts_dir, target)
+            self.current = new_state
+            self.last_reload_error = None
+            return {"previous": previous.version, "version": new_state.version, "swapped": True}
+
+    def start_watcher(self, poll_seconds: float) -> None:
+        # Pre-forked workers leave polling to the parent.
+        if poll_seconds <= 0 or self._watcher is not None or self.supervisor is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(poll_seconds,), name="model-registry-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+        self._watcher = None
+
+    def _watch(self, poll_seconds: float) -> None:
+        while not self._stop.wait(poll_seconds):
+            try:
+                target = registry.current_version(self.artifacts_dir)
+                if target is not None and target != self.current.version:
+                    self.reload(target)
+            except Exception as exc:
+                # Keep serving the current model; surface the failure on /admin/model.
+                self.last_reload_error = f"{type(exc).__name__}: {exc}"
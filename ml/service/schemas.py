@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, List, Optional
 
 
 class VitalsIn(BaseModel):
@@ -33,3 +33,21 @@ class PredictOut(BaseModel):
     threshold: float
     reasons: List[str]
     model_version: str
+
+
+class BatchPredictIn(BaseModel):
+    # Raw readings; each one is validated against VitalsIn individually so
+    # that a single bad row does not reject the whole batch.
+    readings: List[Dict[str, Any]] = Field(..., max_length=50_000)
+
+
+class BatchItemOut(BaseModel):
+    index: int
+    result: Optional[PredictOut] = None
+    error: Optional[str] = None
+
+
+class BatchPredictOut(BaseModel):
+    results: List[BatchItemOut]
+    n_ok: int
+    n_errors: int
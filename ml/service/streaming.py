@@ -0,0 +1,91 @@
+"""
+NDJSON request/response streaming.
+
+``ndjson_blocks`` turns a chunked request body into blocks of complete lines
+as the bytes arrive, holding at most one partial line plus one block.
+``NDJSONStreamResponse`` lets the response body iterator keep reading the
+request body while results are being sent back.
+"""
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def ndjson_blocks(
+    chunks: AsyncIterator[bytes], max_block: int, max_line_bytes: int
+) -> AsyncIterator[list[bytes | None]]:
+    """Yield the complete non-empty lines received so far, ``max_block`` at a time.
+
+    A block is emitted as soon as a body chunk has been split, so a slow
+    client still gets its results without waiting for a full block. A line
+    longer than ``max_line_bytes`` is discarded up to its newline and
+    reported as ``None`` in place of its bytes.
+    """
+    if max_block < 1:
+        raise ValueError("max_block must be >= 1")
+    partial = bytearray()
+    oversized = False
+    block: list[bytes | None] = []
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline < 0:
+                if not oversized:
+                    partial += chunk[start:]
+                    if len(partial) > max_line_bytes:
+                        partial.clear()
+                        oversized = True
+                break
+            if oversized:
+                block.append(None)
+                oversized = False
+            else:
+                partial += chunk[start:newline]
+                line = bytes(partial).strip()
+                partial.clear()
+                if len(line) > max_line_bytes:
+                    block.append(None)
+                elif line:
+                    block.append(line)
+            start = newline + 1
+            if len(block) >= max_block:
+                yield block
+                block = []
+        if block:
+            yield block
+            block = []
+
+    if oversized:
+        block.append(None)
+    else:
+        line = bytes(partial).strip()
+        if line:
+            block.append(line)
+    if block:
+        yield block
+
+
+class NDJSONStreamResponse(StreamingResponse):
+    """StreamingResponse whose body iterator consumes the request body.
+
+    Starlette normally runs a disconnect listener that calls ``receive()``
+    alongside the body iterator; here that would swallow request chunks, so
+    the listener is skipped. A client disconnect still surfaces through
+    ``request.stream()`` and ends the iterator.
+    """
+
+    def __init__(self, content, **kwargs):
+        kwargs.setdefault("media_type", NDJSON_MEDIA_TYPE)
+        super().__init__(content, **kwargs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
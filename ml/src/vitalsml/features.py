@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Mapping, Tuple, Optional
 
 import numpy as np
 
@@ -82,7 +82,98 @@ FEATURE_ORDER: List[str] = [
 ]
 
 
+# Raw VitalsIn fields read by build_feature_dict
+_INPUT_COLUMNS: List[str] = [
+    "age_years",
+    "heart_rate",
+    "resp_rate",
+    "temp_f",
+    "spo2_pct",
+    "systolic_bp",
+    "diastolic_bp",
+    "pain_0_10",
+    "height_ft",
+    "height_in",
+    "weight_lb",
+]
+
+
 def vectorize(v: Dict) -> Tuple[np.ndarray, List[str]]:
     fd = build_feature_dict(v)
     x = np.array([fd[name] for name in FEATURE_ORDER], dtype=float)
     return x, FEATURE_ORDER
+
+
+def _column(data: Mapping[str, Any], name: str, n: int) -> np.ndarray:
+    """Column as float64 with NaN for missing/None values."""
+    if name not in data:
+        return np.full(n, np.nan)
+    col = np.asarray(data[name], dtype=float)
+    if col.shape != (n,):
+        raise ValueError(f"Column {name!r} has shape {col.shape}, expected ({n},)")
+    return col
+
+
+def build_feature_matrix(
+    data: Mapping[str, Any],
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Columnar version of ``vectorize`` for a DataFrame or dict of arrays.
+
+    Returns an ``(n, len(FEATURE_ORDER))`` float64 matrix whose rows equal
+    ``vectorize(row)[0]``. Absent columns behave like absent dict keys; for
+    height/weight a NaN/None value is treated as missing, exactly as ``None``
+    is in ``build_feature_dict``. Pass ``out`` to fill a preallocated matrix.
+    """
+    present = [name for name in _INPUT_COLUMNS if name in data]
+    if not present:
+        raise ValueError(f"None of the input columns are present: {_INPUT_COLUMNS}")
+    n = len(np.asarray(data[present[0]]))
+
+    if out is None:
+        out = np.empty((n, len(FEATURE_ORDER)), dtype=float)
+    elif out.shape != (n, len(FEATURE_ORDER)) or out.dtype != np.float64:
+        raise ValueError(f"out must be float64 with shape ({n}, {len(FEATURE_ORDER)})")
+
+    def core(name: str) -> np.ndarray:
+        # Absent keys default to 0.0 like v.get(name, 0.0)
+        return _column(data, name, n) if name in data else np.zeros(n)
+
+    age = core("age_years")
+    hr = core("heart_rate")
+    rr = core("resp_rate")
+    sys = core("systolic_bp")
+    dia = core("diastolic_bp")
+
+    col = {name: j for j, name in enumerate(FEATURE_ORDER)}
+    out[:, col["age_years"]] = age
+    out[:, col["heart_rate"]] = hr
+    out[:, col["resp_rate"]] = rr
+    out[:, col["temp_f"]] = core("temp_f")
+    out[:, col["spo2_pct"]] = core("spo2_pct")
+    out[:, col["systolic_bp"]] = sys
+    out[:, col["diastolic_bp"]] = dia
+    out[:, col["pain_0_10"]] = core("pain_0_10")
+
+    pulse_pressure = np.subtract(sys, dia, out=out[:, col["pulse_pressure"]])
+    out[:, col["map_est"]] = dia + (pulse_pressure / 3.0)
+    np.multiply(hr, age, out=out[:, col["hr_x_age"]])
+    np.multiply(rr, age, out=out[:, col["rr_x_age"]])
+    np.multiply(sys, age, out=out[:, col["sys_x_age"]])
+    np.multiply(dia, age, out=out[:, col["dia_x_age"]])
+
+    ft = _column(data, "height_ft", n)
+    inch = _column(data, "height_in", n)
+    h_total = np.nan_to_num(ft) * 12.0 + np.nan_to_num(inch)
+    has_height = h_total > 0
+    out[:, col["height_total_in"]] = np.where(has_height, h_total, 0.0)
+
+    w_lb = _column(data, "weight_lb", n)
+    has_weight = ~np.isnan(w_lb)
+    out[:, col["weight_lb"]] = np.where(has_weight, w_lb, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # float_power calls libm pow() like the scalar path; ** 2 would use x*x
+        bmi = (w_lb / np.float_power(h_total, 2)) * 703.0
+    out[:, col["bmi"]] = np.where(has_height & has_weight, bmi, 0.0)
+    return out
@@ -0,0 +1,148 @@
+"""
+Synthetic vitals data, in memory or out of core.
+
+``make_synthetic_data`` returns a small DataFrame for tests and demos.
+``write_synthetic_dataset`` streams the same distributions to disk chunk by
+chunk as a matrix dataset (see matrix_store.py), so datasets far larger than
+RAM can be generated and then read back lazily:
+
+    python ml/synthetic.py --rows 100000000 --out ml/data/synthetic/100m
+    python ml/train.py --source synthetic --synthetic-dir ml/data/synthetic/100m
+
+Chunk ``i`` is drawn from ``default_rng([seed, i])``, so a dataset is fully
+determined by (rows, seed, chunk_size) and chunks can be regenerated
+independently.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from ml.matrix_store import DEFAULT_DTYPE, write_dataset  # pragma: no cover
+else:
+    try:
+        from ml.matrix_store import DEFAULT_DTYPE, write_dataset
+    except Exception:
+        from matrix_store import DEFAULT_DTYPE, write_dataset
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_SYNTHETIC_DIR = REPO_ROOT / "ml" / "data" / "synthetic"
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+FEATURE_NAMES = [
+    "age_years",
+    "bp_systolic",
+    "bp_diastolic",
+    "heart_rate",
+    "temperature",
+    "respiratory_rate",
+    "oxygen_saturation",
+    "pulse_pressure",
+    "pain_level",
+]
+
+
+def synthetic_columns(rng: np.random.Generator, n: int) -> dict[str, np.ndarray]:
+    """Draw ``n`` rows of age-aware vitals plus the ``at_risk`` label."""
+    age_years = rng.uniform(0, 100, size=n)
+    age_factor = np.clip((age_years - 18) / 50, 0, 1)
+
+    bp_systolic = rng.integers(90, 180, size=n) + (age_factor * 12)
+    bp_diastolic = rng.integers(60, 110, size=n) + (age_factor * 6)
+    heart_rate = rng.integers(50, 120, size=n) + (age_years < 12) * 15
+    temperature = rng.uniform(96.0, 102.0, size=n)
+    respiratory_rate = rng.integers(10, 30, size=n) + (age_years < 2) * 6
+    oxygen_saturation = rng.integers(85, 100, size=n)
+    pulse_pressure = bp_systolic - bp_diastolic
+    pain_level = rng.integers(0, 11, size=n)
+
+    risk_score = (
+        0.18 * ((bp_systolic > 140) | (bp_systolic < 90)).astype(int)
+        + 0.14 * ((bp_diastolic > 90) | (bp_diastolic < 60)).astype(int)
+        + 0.18 * (heart_rate > 100).astype(int)
+        + 0.14 * (temperature > 100.4).astype(int)
+        + 0.10 * (respiratory_rate > 20).astype(int)
+        + 0.10 * (oxygen_saturation < 95).astype(int)
+        + 0.10 * (pain_level >= 7).astype(int)
+        + 0.06 * (age_years > 70).astype(int)
+    ) + rng.normal(0, 0.12, size=n)
+
+    at_risk = (risk_score >= 0.45).astype(int)
+
+    return {
+        "age_years": age_years.round(1),
+        "bp_systolic": bp_systolic,
+        "bp_diastolic": bp_diastolic,
+        "heart_rate": heart_rate,
+        "temperature": temperature,
+        "respiratory_rate": respiratory_rate,
+        "oxygen_saturation": oxygen_saturation,
+        "pulse_pressure": pulse_pressure,
+        "pain_level": pain_level,
+        "at_risk": at_risk,
+    }
+
+
+def make_synthetic_data(n: int = 2000, seed: int = 7) -> pd.DataFrame:
+    """Generate synthetic medical vitals data with age-aware variation."""
+    return pd.DataFrame(synthetic_columns(np.random.default_rng(seed), n))
+
+
+def iter_synthetic_chunks(
+    n: int, seed: int = 7, chunk_size: int = DEFAULT_CHUNK_ROWS
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Yield ``(X, y)`` chunks; X is float64 in FEATURE_NAMES order, y is int8."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    for index, start in enumerate(range(0, n, chunk_size)):
+        cols = synthetic_columns(np.random.default_rng([seed, index]), min(chunk_size, n - start))
+        X = np.column_stack([np.asarray(cols[name], dtype=float) for name in FEATURE_NAMES])
+        yield X, cols["at_risk"].astype(np.int8)
+
+
+def write_synthetic_dataset(
+    out_dir: Path,
+    n: int,
+    seed: int = 7,
+    chunk_size: int = DEFAULT_CHUNK_ROWS,
+    dtype: type = DEFAULT_DTYPE,
+) -> Path:
+    """Stream ``n`` rows to a matrix dataset in ``out_dir``; peak memory is one chunk."""
+    return write_dataset(
+        out_dir,
+        iter_synthetic_chunks(n, seed, chunk_size),
+        FEATURE_NAMES,
+        dtype=dtype,
+        extra_meta={"source": "synthetic", "seed": int(seed), "chunk_size": int(chunk_size)},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write an out-of-core synthetic vitals dataset")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--dtype", choices=["float32", "float64"], default="float32")
+    parser.add_argument(
+        "--out",
+        type=str,
+        default="",
+        help=f"Output directory (default: {DEFAULT_SYNTHETIC_DIR}/<rows>).",
+    )
+    args = parser.parse_args()
+
+    out_dir = Path(args.out).expanduser().resolve() if args.out else DEFAULT_SYNTHETIC_DIR / str(args.rows)
+    start = time.perf_counter()
+    write_synthetic_dataset(out_dir, args.rows, args.seed, args.chunk_size, np.dtype(args.dtype).type)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {args.rows:,} rows to {out_dir} in {seconds:.1f}s ({args.rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Shared fixtures for the ML tests.
+
+Run from ml/ with ``python -m pytest``. The repo root goes on sys.path for
+``ml.*`` imports and ml/ for the service's ``service.*`` imports, the same
+layout ``PYTHONPATH=.:ml`` gives the service; ml/src adds ``vitalsml``.
+
+Tests never read ml/artifacts: ``service.api`` is imported through the
+``api`` fixture, after ``ML_ARTIFACTS_DIR`` points at a registry published
+from the ``trained`` fixture.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ML_DIR = Path(__file__).resolve().parents[1]
+for path in (ML_DIR.parent, ML_DIR, ML_DIR / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from ml import registry  # noqa: E402
+from ml.data_loader import compact_frame  # noqa: E402
+from ml.inference import compact_model_json, compile_pipeline  # noqa: E402
+from ml.synthetic import make_synthetic_data  # noqa: E402
+from ml.train import train_model  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def synthetic_frame():
+    """Compact (float32) synthetic training frame, as load_data returns it."""
+    return compact_frame(make_synthetic_data(n=2000, seed=7))
+
+
+@pytest.fixture(scope="session")
+def trained(synthetic_frame):
+    """A full-mode training result: {"model", "metrics", "eval_report"}."""
+    return train_model(synthetic_frame, seed=7)
+
+
+@pytest.fixture(scope="session")
+def artifacts_dir(tmp_path_factory, trained):
+    """A registry with ``trained`` published as the CURRENT version "v1"."""
+    directory = tmp_path_factory.mktemp("artifacts")
+    engine = compile_pipeline(trained["model"], trained["metrics"]["feature_names"])
+    registry.publish(
+        "v1",
+        trained["model"],
+        trained["metrics"],
+        trained["eval_report"],
+        artifacts_dir=directory,
+        compact_json=lambda metrics: compact_model_json(engine, metrics),
+    )
+    return directory
+
+
+@pytest.fixture(scope="session")
+def api(artifacts_dir):
+    """``service.api``, serving from ``artifacts_dir``."""
+    os.environ["ML_ARTIFACTS_DIR"] = str(artifacts_dir)
+    from service import api
+
+    assert api.ARTIFACTS_DIR == artifacts_dir, "service.api was imported before the api fixture"
+    return api
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from service.batching import MicroBatcher
+
+
+def _double(payloads):
+    return [{"value": p["x"] * 2} if p["x"] >= 0 else {"error": "negative"} for p in payloads]
+
+
+def test_concurrent_submits_are_scored_together():
+    calls = []
+
+    def score(payloads):
+        calls.append(len(payloads))
+        return _double(payloads)
+
+    async def main():
+        batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=50)
+        try:
+            return await asyncio.gather(*(batcher.submit({"x": i}) for i in range(20))), batcher.stats()
+        finally:
+            await batcher.stop()
+
+    results, stats = asyncio.run(main())
+
+    assert [r["value"] for r in results] == [2 * i for i in range(20)]
+    assert calls == [8, 8, 4]
+    assert (stats["batches"], stats["items"], stats["max_observed_batch_size"]) == (3, 20, 8)
+    assert stats["batch_size_counts"] == {"4": 1, "8": 2}
+
+
+def test_row_errors_only_fail_their_own_caller():
+    async def main():
+        batcher = MicroBatcher(_double, max_batch_size=4, max_wait_ms=50)
+        try:
+            return await asyncio.gather(
+                batcher.submit({"x": 1}), batcher.submit({"x": -1}), batcher.submit({"x": 3}),
+                return_exceptions=True,
+            )
+        finally:
+            await batcher.stop()
+
+    ok, bad, ok2 = asyncio.run(main())
+    assert ok == {"value": 2} and ok2 == {"value": 6}
+    assert isinstance(bad, ValueError) and str(bad) == "negative"
+
+
+def test_score_fn_failure_is_raised_to_every_caller_and_batcher_keeps_running():
+    fail = [True]
+
+    def score(payloads):
+        if fail[0]:
+            raise RuntimeError("boom")
+        return _double(payloads)
+
+    async def main():
+        batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=50)
+        try:
+            first = await asyncio.gather(*(batcher.submit({"x": i}) for i in range(2)), return_exceptions=True)
+            fail[0] = False
+            return first, await batcher.submit({"x": 5})
+        finally:
+            await batcher.stop()
+
+    first, after = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in first)
+    assert after == {"value": 10}
+
+
+@pytest.mark.parametrize("kwargs", [{"max_batch_size": 0}, {"max_wait_ms": -1}])
+def test_rejects_invalid_limits(kwargs):
+    with pytest.raises(ValueError):
+        MicroBatcher(_double, **kwargs)
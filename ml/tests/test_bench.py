@@ -0,0 +1,27 @@
+from ml.benchmarks import bench
+from service.schemas import VitalsIn
+
+
+def test_measure_warms_up_then_times_every_call():
+    calls = []
+    result = bench.measure(lambda: calls.append(1), number=3, repeat=4, rows=100)
+
+    assert len(calls) == 1 + 3 * 4
+    assert (result["repeat"], result["number"], result["rows"]) == (4, 3, 100)
+    assert result["min_s"] <= result["median_s"]
+
+
+def test_compare_flags_only_slowdowns_past_the_tolerance(capsys):
+    baseline = {"results": {"a": {"min_s": 1.0}, "b": {"min_s": 1.0}, "c": {"min_s": 1.0}}}
+    current = {"results": {"a": {"min_s": 1.05}, "b": {"min_s": 1.5}, "c": {"min_s": 0.5}, "d": {"min_s": 9.0}}}
+
+    assert bench.compare(current, baseline, tolerance=0.1) == ["b"]
+    assert "regression" in capsys.readouterr().out
+
+
+def test_service_readings_are_distinct_valid_bodies():
+    readings = bench._service_readings(300)
+
+    assert len({tuple(sorted(r.items())) for r in readings}) == 300
+    for reading in readings:
+        VitalsIn.model_validate(reading)
@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.inference import compile_model
+from ml.predict import ChunkWriter, iter_input_chunks, predict_batch, score_bulk, score_frame
+from ml.synthetic import make_synthetic_data
+
+
+@pytest.fixture(scope="module")
+def engine(trained):
+    return compile_model(trained["model"], trained["metrics"]["feature_names"])
+
+
+@pytest.fixture(scope="module")
+def readings():
+    frame = make_synthetic_data(n=500, seed=5).drop(columns="at_risk")
+    frame.loc[3, "heart_rate"] = np.nan
+    frame.loc[7, "age_years"] = np.nan
+    return frame
+
+
+def test_score_frame_matches_predict_batch(engine, trained, readings):
+    names, metrics = trained["metrics"]["feature_names"], trained["metrics"]
+    scored = score_frame(engine, readings, names, 0.5, metrics)
+    rows = readings.astype(object).where(readings.notna(), None).to_dict(orient="records")
+    results = predict_batch(engine, rows, names, 0.5, metrics)
+
+    assert scored["error"].iloc[3] != "" and "error" in results[3]
+    for i, result in enumerate(results):
+        if "error" in result:
+            continue
+        assert scored["risk_probability"].iloc[i] == pytest.approx(result["risk_probability"], abs=1e-12)
+        assert scored["threshold"].iloc[i] == result["threshold"]
+        assert int(scored["pred"].iloc[i]) == result["pred"]
+
+
+def test_ndjson_output_keeps_full_precision(tmp_path, engine, trained, readings):
+    names, metrics = trained["metrics"]["feature_names"], trained["metrics"]
+    outputs = {}
+    for suffix in ("csv", "ndjson"):
+        path = tmp_path / f"scores.{suffix}"
+        stats = score_bulk(iter([readings.iloc[:200], readings.iloc[200:]]), ChunkWriter(path), engine, names, 0.5, metrics)
+        assert stats["rows"] == len(readings) and stats["errors"] == 2  # NaN vital, NaN age
+        outputs[suffix] = path
+
+    csv = pd.read_csv(outputs["csv"], float_precision="round_trip")
+    records = [json.loads(line) for line in outputs["ndjson"].read_text().splitlines()]
+    assert [r["row"] for r in records] == list(range(len(readings)))
+    for record, prob in zip(records, csv["risk_probability"]):
+        if record["error"]:
+            assert record["risk_probability"] is None and record["pred"] is None
+        else:
+            assert record["risk_probability"] == prob  # exact, not 10-digit rounded
+    assert len(list(iter_input_chunks(outputs["ndjson"], 100))) == 5
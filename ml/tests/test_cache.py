@@ -0,0 +1,35 @@
+import pytest
+
+from service.cache import PredictionCache
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = PredictionCache(max_entries=2)
+    cache.put("v1", "a", {"p": 1})
+    cache.put("v1", "b", {"p": 2})
+    assert cache.get("v1", "a") == {"p": 1}  # "a" is now the most recent
+
+    cache.put("v1", "c", {"p": 3})
+
+    assert cache.get("v1", "b") is None
+    assert cache.get("v1", "a") == {"p": 1} and cache.get("v1", "c") == {"p": 3}
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+    assert stats["hit_rate"] == pytest.approx(0.75)
+
+
+def test_new_model_version_drops_every_entry():
+    cache = PredictionCache()
+    cache.put("v1", "a", {"p": 1})
+
+    assert cache.get("v2", "a") is None
+    cache.put("v2", "b", {"p": 2})
+    assert cache.get("v1", "b") is None  # switching back is a new version too
+
+    stats = cache.stats()
+    assert stats["invalidations"] == 2 and stats["entries"] == 0 and stats["model_version"] == "v1"
+
+
+def test_rejects_empty_cache():
+    with pytest.raises(ValueError):
+        PredictionCache(max_entries=0)
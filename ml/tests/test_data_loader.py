@@ -0,0 +1,375 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import data_loader
+
+
+class FakeCursor:
+    """Named-cursor stand-in serving fixed rows through fetchmany."""
+
+    def __init__(self, columns, rows, executed):
+        self.description = [SimpleNamespace(name=c) for c in columns]
+        self._rows = list(rows)
+        self._executed = executed
+        self.fetch_sizes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self._executed.append((query, params))
+
+    def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        self.fetch_sizes.append(len(batch))
+        return batch
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.cursor_names = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self, name=None):
+        self.cursor_names.append(name)
+        return self._cursor
+
+
+COLUMNS = ["id", "gradedAt", "heart_rate", "oxygen_saturation", "temperature", "at_risk"]
+
+
+def _rows(n):
+    return [(f"r{i}", None, 60 + i, 95, 98.6, i % 2) for i in range(n)]
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    executed = []
+    cursor = FakeCursor(COLUMNS, _rows(7) + [("r7", None, 80, 97, 99.1, None)], executed)
+    conn = FakeConnection(cursor)
+    monkeypatch.setenv("DATABASE_URL", "postgresql://test")
+    monkeypatch.setattr(data_loader.psycopg, "connect", lambda url: conn)
+    return SimpleNamespace(conn=conn, cursor=cursor, executed=executed)
+
+
+def test_build_query():
+    assert data_loader._build_query("ml_training_data", None) == 'SELECT * FROM "ml_training_data"'
+    assert (
+        data_loader._build_query("v", 10, '"gradedAt" > %s')
+        == 'SELECT * FROM "v" WHERE "gradedAt" > %s LIMIT 10'
+    )
+    assert data_loader._build_query("v", 0) == 'SELECT * FROM "v"'
+
+
+def test_stream_yields_compact_chunks_from_a_server_side_cursor(fake_db):
+    chunks = list(data_loader.iter_training_data_from_db(chunk_size=3, limit=8))
+
+    assert fake_db.conn.cursor_names == ["ml_training_data_stream"]
+    assert fake_db.executed == [('SELECT * FROM "ml_training_data" LIMIT 8', None)]
+    assert fake_db.cursor.fetch_sizes == [3, 3, 2, 0]
+    # The unlabeled last row is dropped, metadata columns too.
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert list(chunks[0].columns) == ["heart_rate", "oxygen_saturation", "temperature", "at_risk"]
+    assert chunks[0]["heart_rate"].dtype == np.int16
+    assert chunks[0]["oxygen_saturation"].dtype == np.uint8
+
+
+def test_stream_keeps_metadata_and_binds_params(fake_db):
+    chunks = list(
+        data_loader.iter_training_data_from_db(
+            chunk_size=100, keep_metadata=True, where='"gradedAt" > %s', params=("2024-01-01",)
+        )
+    )
+    assert fake_db.executed[0][1] == ("2024-01-01",)
+    assert chunks[0]["id"].tolist() == [f"r{i}" for i in range(7)]
+
+
+def test_stream_rejects_bad_chunk_size(fake_db):
+    with pytest.raises(ValueError, match="chunk_size"):
+        next(data_loader.iter_training_data_from_db(chunk_size=0))
+    assert fake_db.executed == []
+
+
+class FakeView:
+    """ml_training_data as a frame; answers the snapshot's full and delta reads."""
+
+    def __init__(self, n):
+        graded = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(np.arange(n), unit="h")
+        self.df = pd.DataFrame(
+            {
+                "id": [f"r{i:03d}" for i in range(n)],
+                "gradedAt": graded,
+                "heart_rate": np.arange(n) + 60,
+                "at_risk": np.arange(n) % 2,
+            }
+        )
+        self.fetches = []
+
+    def fetch_all(self, view_name, chunk_size, where=None, params=()):
+        df = self.df
+        if where is not None:
+            assert where == data_loader._DELTA_FILTER
+            after, _, after_id = params
+            after = pd.Timestamp(after)
+            df = df[(df["gradedAt"] > after) | ((df["gradedAt"] == after) & (df["id"] > after_id))]
+        self.fetches.append(len(df) if where else "full")
+        return data_loader._prepare_frame(df.copy(), keep_metadata=True)
+
+    def count_rows(self, view_name):
+        return len(self.df)
+
+
+@pytest.fixture
+def view(monkeypatch):
+    view = FakeView(20)
+    monkeypatch.setattr(data_loader, "_fetch_all", view.fetch_all)
+    monkeypatch.setattr(data_loader, "_count_rows", view.count_rows)
+    return view
+
+
+def _sync(tmp_path, **kwargs):
+    return data_loader.sync_training_snapshot("v", cache_dir=tmp_path, **kwargs)
+
+
+def _by_id(df):
+    return df.sort_values("id").reset_index(drop=True)[["id", "heart_rate", "at_risk"]]
+
+
+def test_compute_watermark_breaks_ties_on_id():
+    ts = pd.Timestamp("2024-03-01T12:00:00", tz="UTC")
+    df = pd.DataFrame({"id": ["a", "c", "b"], "gradedAt": [ts - pd.Timedelta("1h"), ts, ts]})
+    assert data_loader.compute_watermark(df) == {"gradedAt": ts.isoformat(), "id": "c"}
+    assert data_loader.compute_watermark(df.drop(columns="gradedAt")) is None
+
+
+def test_snapshot_round_trip(tmp_path, view):
+    df = data_loader._prepare_frame(view.df.copy(), keep_metadata=True)
+    meta = data_loader._write_snapshot(df, tmp_path, "v")
+    back, back_meta = data_loader._read_snapshot(tmp_path, "v")
+
+    assert back_meta == meta and meta["row_count"] == 20
+    assert meta["watermark"]["id"] == "r019"
+    assert back["id"].tolist() == df["id"].tolist()
+    assert (back["gradedAt"] == df["gradedAt"]).all()
+    assert back["heart_rate"].dtype == df["heart_rate"].dtype
+
+
+def test_sync_fetches_only_rows_past_the_watermark(tmp_path, view):
+    first = _sync(tmp_path)
+    assert view.fetches == ["full"] and len(first) == 20
+
+    # Two new rows and one regraded row (same id, later gradedAt).
+    later = view.df["gradedAt"].max() + pd.Timedelta("1h")
+    extra = pd.DataFrame(
+        {"id": ["r020", "r021"], "gradedAt": [later, later], "heart_rate": [150, 151], "at_risk": [1, 1]}
+    )
+    view.df = pd.concat([view.df, extra], ignore_index=True)
+    view.df.loc[view.df["id"] == "r003", ["gradedAt", "at_risk"]] = [later, 1]
+
+    second = _sync(tmp_path)
+    assert view.fetches == ["full", 3]
+    pd.testing.assert_frame_equal(_by_id(second), _by_id(view.df), check_dtype=False)
+
+    # Nothing new: a delta read of zero rows, served from disk.
+    third = _sync(tmp_path)
+    assert view.fetches == ["full", 3, 0]
+    pd.testing.assert_frame_equal(_by_id(third), _by_id(second))
+
+
+def test_sync_rebuilds_when_rows_disappear(tmp_path, view):
+    _sync(tmp_path)
+    view.df = view.df[view.df["id"] != "r005"].reset_index(drop=True)
+
+    snapshot = _sync(tmp_path)
+    assert view.fetches == ["full", 0, "full"]
+    assert "r005" not in set(snapshot["id"]) and len(snapshot) == 19
+
+
+def test_sync_rebuilds_when_the_view_loses_a_column(tmp_path, view):
+    _sync(tmp_path)
+    # Same row count; the delta's columns are a subset of the snapshot's.
+    view.df = view.df.drop(columns="heart_rate")
+    view.df.loc[view.df["id"] == "r003", "gradedAt"] = view.df["gradedAt"].max() + pd.Timedelta("1h")
+
+    snapshot = _sync(tmp_path)
+    assert view.fetches == ["full", 1, "full"]
+    assert "heart_rate" not in snapshot.columns and len(snapshot) == 20
+
+
+def test_refresh_ignores_the_snapshot(tmp_path, view):
+    _sync(tmp_path)
+    _sync(tmp_path, refresh=True)
+    assert view.fetches == ["full", "full"]
+
+
+class FakeRangeDB:
+    """Answers the partitioned read's percentile and range queries from a frame."""
+
+    def __init__(self, n):
+        rng = np.random.default_rng(4)
+        submitted = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 50, n), unit="D")
+        self.df = pd.DataFrame(
+            {
+                "id": [f"r{i:03d}" for i in range(n)],
+                "submittedAt": submitted,
+                "heart_rate": rng.integers(50, 150, n),
+                "at_risk": rng.integers(0, 2, n),
+            }
+        )
+        self.df.loc[[2, 9], "submittedAt"] = pd.NaT
+        self.queries = []
+
+    def percentiles(self, fractions):
+        ts = self.df["submittedAt"].dropna().sort_values().reset_index(drop=True)
+        # percentile_disc: first value whose cumulative fraction reaches f
+        return [ts[max(int(np.ceil(f * len(ts))) - 1, 0)].to_pydatetime() for f in fractions]
+
+    def select(self, query, params):
+        ts = self.df["submittedAt"]
+        if '"submittedAt" >= %s AND "submittedAt" < %s' in query:
+            mask = (ts >= params[0]) & (ts < params[1])
+        elif '("submittedAt" < %s OR "submittedAt" IS NULL)' in query:
+            mask = (ts < params[0]) | ts.isna()
+        elif '"submittedAt" >= %s' in query:
+            mask = ts >= params[0]
+        else:
+            mask = pd.Series(True, index=ts.index)
+        rows = self.df[mask].sort_values(["submittedAt", "id"], na_position="first")
+        return list(rows.itertuples(index=False, name=None))
+
+    def connection(self):
+        db = self
+
+        class Cursor:
+            description = [SimpleNamespace(name=c) for c in db.df.columns]
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, query, params):
+                db.queries.append(query)
+                self._rows = db.select(query, params)
+
+            def fetchall(self):
+                return self._rows
+
+        class Conn:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, query, params):
+                assert "percentile_disc" in query
+                return SimpleNamespace(fetchone=lambda: (db.percentiles(params[0]),))
+
+            def cursor(self):
+                return Cursor()
+
+        return Conn()
+
+
+@pytest.fixture
+def range_db(monkeypatch):
+    db = FakeRangeDB(300)
+
+    class Pool:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def connection(self):
+            return db.connection()
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql://test")
+    monkeypatch.setattr(data_loader, "ConnectionPool", Pool)
+    return db
+
+
+def test_partition_filters_cover_the_view_once(range_db):
+    filters = data_loader._partition_filters(range_db.connection(), "v", 4, None, ())
+    assert len(filters) == 4
+    assert filters[0][0] == '("submittedAt" < %s OR "submittedAt" IS NULL)'
+
+    sizes = [len(range_db.select(query, params)) for query, params in filters]
+    assert sum(sizes) == 300 and min(sizes) > 300 / 4 * 0.5
+
+
+def test_repeated_boundaries_collapse():
+    conn = SimpleNamespace(execute=lambda query, params: SimpleNamespace(fetchone=lambda: ([5, 5, None],)))
+    filters = data_loader._partition_filters(conn, "v", 4, None, ())
+    assert filters == [('("submittedAt" < %s OR "submittedAt" IS NULL)', (5,)), ('"submittedAt" >= %s', (5,))]
+
+
+def test_partitioned_read_is_ordered_and_complete(range_db):
+    df = data_loader.read_view_partitioned("v", partitions=5, pool_size=3)
+
+    assert sorted(df["id"]) == sorted(range_db.df["id"])
+    expected = range_db.df.sort_values(["submittedAt", "id"], na_position="first")["id"].tolist()
+    assert df["id"].tolist() == expected
+    assert len(range_db.queries) == 5
+    assert df["heart_rate"].dtype == np.int16
+
+
+def test_partitioned_read_rejects_bad_sizes():
+    with pytest.raises(ValueError):
+        data_loader.read_view_partitioned("v", partitions=0)
+    with pytest.raises(ValueError, match="partitions cannot be combined"):
+        data_loader.load_training_data_from_db(limit=10, partitions=2)
+
+
+def test_compact_frame_dtypes():
+    df = pd.DataFrame(
+        {
+            "id": ["a", "b", "c"],
+            "heart_rate": [70, 80, 90],
+            "bp_systolic": [120.0, np.nan, 110.0],  # NaN: no integer storage
+            "oxygen_saturation": [97, 98, 300],  # does not fit uint8
+            "pain_level": [1.0, 2.0, 3.0],
+            "temperature": ["98.6", "99.1", "bad"],
+            "novel_feature": [1, 2, 3],
+            "at_risk": [0, 1, 0],
+        }
+    )
+
+    compact = data_loader.compact_frame(df)
+
+    assert compact.dtypes.to_dict() == {
+        "id": df["id"].dtype,
+        "heart_rate": np.int16,
+        "bp_systolic": np.float32,
+        "oxygen_saturation": np.float32,
+        "pain_level": np.uint8,
+        "temperature": np.float32,
+        "novel_feature": np.float32,
+        "at_risk": np.int8,
+    }
+    assert np.isnan(compact["temperature"].iloc[2]) and compact["oxygen_saturation"].iloc[2] == 300
+    assert data_loader.compact_frame(compact).dtypes.equals(compact.dtypes)
+
+
+def test_compact_training_frame_is_smaller(synthetic_frame):
+    wide = synthetic_frame.astype(np.float64)
+    assert synthetic_frame.memory_usage(index=False).sum() < wide.memory_usage(index=False).sum() / 2.5
+    np.testing.assert_allclose(synthetic_frame.to_numpy(dtype=float), wide.to_numpy(), rtol=1e-6)
@@ -0,0 +1,149 @@
+import threading
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from ml import registry
+from ml.drift import (
+    PSI_ALERT,
+    ReferenceBuilder,
+    build_reference,
+    compare_counts,
+    ks_statistic,
+    psi,
+    quantile_edges,
+)
+from ml.inference import compact_model_json, compile_pipeline
+from ml.synthetic import FEATURE_NAMES, make_synthetic_data
+from service.drift import DriftMonitor, DriftTracker
+from service.model_state import ModelHolder
+from test_service import VITALS
+
+
+def test_psi_and_ks():
+    counts = [10, 20, 30, 40]
+    assert psi(counts, [2 * c for c in counts]) == pytest.approx(0.0)
+    assert ks_statistic(counts, counts) == 0.0
+    assert ks_statistic([1, 0], [0, 1]) == 1.0
+    assert ks_statistic([5, 5], [0, 0]) == 0.0
+    # Hand-computed: e = [0.5, 0.5], a = [0.9, 0.1]
+    assert psi([50, 50], [90, 10]) == pytest.approx(0.4 * np.log(1.8) - 0.4 * np.log(0.2))
+    assert np.isfinite(psi([10, 0], [0, 10]))
+
+
+def test_compare_counts_needs_min_count():
+    assert compare_counts([5, 5], [3, 2], min_count=10)["status"] == "insufficient_data"
+    shifted = compare_counts([50, 50], [95, 5], min_count=10)
+    assert shifted["status"] == "alert" and shifted["psi"] >= PSI_ALERT and shifted["n"] == 100
+
+
+def test_quantile_edges_collapse_repeats():
+    # 55% zeros: the first five deciles are all 0 and give no edge.
+    values = np.array([0] * 55 + [1] * 24 + [2] * 21 + [np.nan] * 5, dtype=float)
+    assert quantile_edges(values) == [1.0, 2.0]
+    assert quantile_edges(np.array([np.nan])) == []
+
+
+@pytest.fixture(scope="module")
+def reference():
+    df = make_synthetic_data(3000, seed=1)
+    X = df[FEATURE_NAMES].to_numpy(dtype=float)
+    prob = np.linspace(0, 1, len(df))
+    return build_reference(X, FEATURE_NAMES, prob, df["age_years"].to_numpy())
+
+
+def _live_rows(n, seed, shift=0.0):
+    df = make_synthetic_data(n, seed=seed)
+    df["heart_rate"] += shift
+    return df[FEATURE_NAMES].to_dict("records")
+
+
+def test_monitor_bins_like_the_reference_builder(reference):
+    rows = _live_rows(500, seed=2)
+    prob = np.random.default_rng(0).random(len(rows))
+    monitor = DriftMonitor("v1", reference, min_count=50)
+    for row, p in zip(rows, prob):
+        monitor.observe(row, float(p))
+
+    edges = {name: entry["edges"] for name, entry in reference["features"].items()}
+    builder = ReferenceBuilder(FEATURE_NAMES, edges)
+    X = np.array([[row[name] for name in FEATURE_NAMES] for row in rows])
+    builder.update(X, prob, X[:, FEATURE_NAMES.index("age_years")])
+    expected = builder.to_dict()
+
+    report = monitor.report()
+    assert report["n_observed"] == 500
+    for name in FEATURE_NAMES:
+        assert report["features"][name]["all"] == compare_counts(
+            reference["features"][name]["counts"]["all"], expected["features"][name]["counts"]["all"], 50
+        )
+
+
+def test_monitor_flags_a_shifted_feature(reference):
+    same, shifted = DriftMonitor("v1", reference, 100), DriftMonitor("v1", reference, 100)
+    for row in _live_rows(1000, seed=3):
+        same.observe(row, 0.2)
+    for row in _live_rows(1000, seed=3, shift=40.0):
+        shifted.observe(row, 0.2)
+
+    assert same.report()["features"]["heart_rate"]["all"]["status"] == "ok"
+    assert shifted.report()["features"]["heart_rate"]["all"]["status"] == "alert"
+    assert shifted.report()["features"]["temperature"]["all"]["status"] == "ok"
+
+
+def test_monitor_sums_per_thread_shards_and_skips_unknown_ages(reference):
+    monitor = DriftMonitor("v1", reference)
+    rows = _live_rows(100, seed=4)
+
+    def observe():
+        for row in rows:
+            monitor.observe(row, 0.5)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    monitor.observe({**rows[0], "age_years": float("nan")}, 0.5)
+    monitor.observe({**rows[0], "age_years": None}, 0.5)
+
+    assert monitor.report()["n_observed"] == 400
+
+
+def test_tracker_starts_over_for_a_new_version(reference):
+    class State:
+        def __init__(self, version, drift_reference=reference):
+            self.version, self.drift_reference = version, drift_reference
+
+    tracker = DriftTracker(min_count=1)
+    tracker.observe(State("v1"), _live_rows(1, seed=5)[0], 0.5)
+    assert tracker.report(State("v1"))["n_observed"] == 1
+    assert tracker.report(State("v2"))["n_observed"] == 0
+    assert tracker.report(State("v3", None))["enabled"] is False
+
+
+def test_drift_endpoint_reports_live_traffic(api, tmp_path, trained, monkeypatch):
+    if api.drift_tracker is None:
+        pytest.skip("drift monitoring disabled")
+    engine = compile_pipeline(trained["model"], trained["metrics"]["feature_names"])
+    registry.publish(
+        "v1",
+        trained["model"],
+        trained["metrics"],
+        trained["eval_report"],
+        artifacts_dir=tmp_path,
+        compact_json=lambda metrics: compact_model_json(engine, metrics),
+    )
+    monkeypatch.setattr(api, "holder", ModelHolder(tmp_path))
+    monkeypatch.setattr(api, "ADMIN_ALLOW_UNAUTHENTICATED", True)
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "")
+
+    with TestClient(api.app) as client:
+        assert client.post("/admin/drift/reset").status_code == 200
+        for heart_rate in (61, 75, 90, 104, 133):
+            assert client.post("/predict", json={**VITALS, "heart_rate": heart_rate}).status_code == 200
+        report = client.get("/drift").json()
+
+    assert report["enabled"] is True and report["model_version"] == "v1"
+    assert report["n_observed"] == 5 and report["status"] == "insufficient_data"
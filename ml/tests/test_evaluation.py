@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from sklearn import metrics as skm
+
+from ml.evaluation import evaluate_predictions
+from ml.train import DEFAULT_THRESHOLD_GRID, age_group, best_threshold
+
+
+@pytest.fixture(scope="module")
+def holdout():
+    rng = np.random.default_rng(3)
+    n = 3000
+    y = rng.integers(0, 2, n)
+    # Rounded scores give plenty of ties for the ranking metrics.
+    prob = np.round(np.clip(0.3 * y + 0.7 * rng.random(n), 0, 1), 3)
+    ages = rng.choice([0.5, 5.0, 15.0, 40.0, 80.0], n) + rng.random(n) * 0.4
+    return y, prob, ages
+
+
+def _sklearn_metrics(y, prob, threshold):
+    pred = (prob >= threshold).astype(int)
+    tn, fp, fn, tp = skm.confusion_matrix(y, pred, labels=[0, 1]).ravel()
+    return {
+        "accuracy": skm.accuracy_score(y, pred),
+        "balanced_accuracy": skm.balanced_accuracy_score(y, pred),
+        "precision": skm.precision_score(y, pred, zero_division=0),
+        "recall": skm.recall_score(y, pred, zero_division=0),
+        "f1": skm.f1_score(y, pred, zero_division=0),
+        "roc_auc": skm.roc_auc_score(y, prob),
+        "pr_auc": skm.average_precision_score(y, prob),
+        "brier_score": skm.brier_score_loss(y, prob),
+        "confusion_matrix": {"tn": tn, "fp": fp, "fn": fn, "tp": tp},
+    }
+
+
+def test_overall_metrics_match_sklearn(holdout):
+    y, prob, ages = holdout
+    overall = evaluate_predictions(y, prob, ages, 0.5, DEFAULT_THRESHOLD_GRID)["overall"]
+
+    expected = _sklearn_metrics(y, prob, 0.5)
+    assert overall.pop("confusion_matrix") == expected.pop("confusion_matrix")
+    assert overall == pytest.approx(expected, abs=1e-12)
+
+
+def test_group_metrics_match_sklearn_at_the_tuned_threshold(holdout):
+    y, prob, ages = holdout
+    result = evaluate_predictions(y, prob, ages, 0.5, DEFAULT_THRESHOLD_GRID, DEFAULT_THRESHOLD_GRID)
+    labels = np.array([age_group(a) for a in ages])
+
+    assert set(result["groups"]) == set(labels)
+    for group, stats in result["groups"].items():
+        mask = labels == group
+        t = best_threshold(y[mask], prob[mask])
+        assert stats["threshold"] == result["age_group_thresholds"][group] == pytest.approx(t)
+        expected = _sklearn_metrics(y[mask], prob[mask], t)
+        assert stats.pop("confusion_matrix") == expected.pop("confusion_matrix")
+        assert stats["n"] == mask.sum()
+        assert {k: stats[k] for k in expected} == pytest.approx(expected, abs=1e-12)
+
+
+def test_calibration_bins(holdout):
+    y, prob, ages = holdout
+    calibration = evaluate_predictions(y, prob, ages, 0.5, DEFAULT_THRESHOLD_GRID)["calibration"]["overall"]
+
+    bins = np.minimum((prob * 10).astype(int), 9)
+    assert calibration["count"] == np.bincount(bins, minlength=10).tolist()
+    for b in range(10):
+        if calibration["count"][b]:
+            assert calibration["mean_predicted"][b] == pytest.approx(prob[bins == b].mean())
+            assert calibration["fraction_positive"][b] == pytest.approx(y[bins == b].mean())
+
+
+def test_single_class_groups_have_no_ranking_metrics():
+    y = np.array([1, 1, 0, 1])
+    prob = np.array([0.9, 0.8, 0.3, 0.6])
+    ages = np.array([30.0, 30.0, 70.0, 70.0])
+
+    groups = evaluate_predictions(y, prob, ages, 0.5, DEFAULT_THRESHOLD_GRID)["groups"]
+    assert groups["adult"]["roc_auc"] is None and groups["adult"]["pr_auc"] is None
+    assert groups["senior"]["roc_auc"] == 1.0
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from vitalsml.features import FEATURE_ORDER, build_feature_matrix, vectorize
+
+
+def _readings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "age_years": rng.uniform(0, 95, n),
+            "heart_rate": rng.integers(40, 180, n).astype(float),
+            "resp_rate": rng.integers(8, 40, n).astype(float),
+            "temp_f": rng.normal(98.6, 1.5, n),
+            "spo2_pct": rng.integers(80, 101, n).astype(float),
+            "systolic_bp": rng.integers(80, 200, n).astype(float),
+            "diastolic_bp": rng.integers(40, 120, n).astype(float),
+            "pain_0_10": rng.integers(0, 11, n).astype(float),
+            "height_ft": rng.integers(0, 7, n).astype(float),
+            "height_in": rng.uniform(0, 12, n),
+            "weight_lb": rng.uniform(5, 300, n),
+        }
+    )
+    # Missing heights/weights, and a zero height, hit the None branches.
+    for col in ("height_ft", "height_in", "weight_lb"):
+        df.loc[rng.random(n) < 0.15, col] = np.nan
+    df.loc[0, ["height_ft", "height_in"]] = [0.0, 0.0]
+    return df
+
+
+def _as_dicts(df):
+    return [{k: (None if pd.isna(v) else v) for k, v in row.items()} for row in df.to_dict("records")]
+
+
+def test_matrix_rows_equal_vectorize_exactly():
+    df = _readings(2000)
+    expected = np.stack([vectorize(row)[0] for row in _as_dicts(df)])
+
+    matrix = build_feature_matrix(df)
+
+    assert matrix.shape == (2000, len(FEATURE_ORDER))
+    np.testing.assert_array_equal(matrix, expected)
+
+
+def test_absent_columns_behave_like_absent_keys():
+    df = _readings(50, seed=1).drop(columns=["pain_0_10", "weight_lb"])
+    expected = np.stack([vectorize(row)[0] for row in _as_dicts(df)])
+
+    np.testing.assert_array_equal(build_feature_matrix(df.to_dict("list")), expected)
+
+
+def test_out_is_filled_in_place():
+    df = _readings(10, seed=2)
+    out = np.empty((10, len(FEATURE_ORDER)))
+    assert build_feature_matrix(df, out=out) is out
+    with pytest.raises(ValueError, match="out must be"):
+        build_feature_matrix(df, out=np.empty((10, 3)))
+
+
+def test_rejects_frames_without_vitals():
+    with pytest.raises(ValueError, match="None of the input columns"):
+        build_feature_matrix({"unrelated": [1.0]})
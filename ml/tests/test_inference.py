@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from ml import registry
+from ml.inference import (
+    CompiledLogit,
+    compact_model_json,
+    compile_model,
+    compile_pipeline,
+    load_compact,
+    predict_positive,
+)
+from ml.synthetic import make_synthetic_data
+from service import model_state
+from service.model_state import load_model_state
+
+
+def _frame(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 4)) * [1, 10, 100, 0.1] + [0, 50, 500, 1], columns=list("abcd"))
+    y = (X["a"] + X["b"] / 10 + rng.normal(size=n) > 5).astype(int)
+    return X, y
+
+
+def test_sigmoid_is_stable_at_extreme_logits():
+    engine = CompiledLogit.from_params(["x"], np.zeros(1), np.ones(1), np.ones(1), 0.0)
+    p = engine.predict_positive(np.array([[-1000.0], [0.0], [1000.0]]))
+    assert p.tolist() == [0.0, 0.5, 1.0]
+
+
+@pytest.mark.parametrize(
+    "clf", [LogisticRegression(), SGDClassifier(loss="log_loss", random_state=0)], ids=["logreg", "sgd"]
+)
+def test_compiled_pipeline_matches_sklearn(clf):
+    X, y = _frame()
+    model = Pipeline([("scaler", StandardScaler()), ("clf", clf)]).fit(X, y)
+
+    engine = compile_pipeline(model)
+
+    assert isinstance(engine, CompiledLogit) and engine.feature_names == list("abcd")
+    assert engine.predict_positive(X.to_numpy()) == pytest.approx(model.predict_proba(X)[:, 1], abs=1e-12)
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [
+        [("clf", LogisticRegression())],
+        [("scaler", StandardScaler()), ("clf", RandomForestClassifier(n_estimators=5, random_state=0))],
+        [("scaler", StandardScaler()), ("clf", SGDClassifier(loss="hinge", random_state=0))],
+    ],
+    ids=["no-scaler", "forest", "hinge"],
+)
+def test_unsupported_pipelines_fall_back_to_sklearn(steps):
+    X, y = _frame()
+    model = Pipeline(steps).fit(X, y)
+
+    assert compile_pipeline(model) is None
+    assert compile_model(model) is model
+    if hasattr(model, "predict_proba"):
+        expected = model.predict_proba(X)[:, 1]
+        assert predict_positive(model, X.to_numpy(), list("abcd")) == pytest.approx(expected)
+
+
+def _rows(names, n=200):
+    return make_synthetic_data(n, seed=5)[names].to_numpy(dtype=float)
+
+
+def test_compact_json_round_trips_exactly(tmp_path, trained):
+    names = trained["metrics"]["feature_names"]
+    engine = compile_pipeline(trained["model"], names)
+    path = tmp_path / "model.json"
+    path.write_text(compact_model_json(engine, {**trained["metrics"], "model_version": "v9"}))
+
+    loaded, raw = load_compact(path)
+
+    X = _rows(names)
+    assert np.array_equal(loaded.predict_positive(X), engine.predict_positive(X))
+    assert raw["model_version"] == "v9"
+    assert raw["age_group_thresholds"] == trained["metrics"]["age_group_thresholds"]
+    with pytest.raises(ValueError, match="Unsupported compact model format"):
+        CompiledLogit.from_dict({**raw, "format": "other"})
+
+
+@pytest.fixture
+def published(tmp_path, trained):
+    engine = compile_pipeline(trained["model"], trained["metrics"]["feature_names"])
+    registry.publish(
+        "v1",
+        trained["model"],
+        trained["metrics"],
+        trained["eval_report"],
+        artifacts_dir=tmp_path,
+        compact_json=lambda metrics: compact_model_json(engine, metrics),
+    )
+    return tmp_path
+
+
+def test_service_loads_compact_file_without_the_pickle(published, trained):
+    paths = registry.resolve(published, "v1")
+    paths.model_path.unlink()
+
+    state = load_model_state(published)
+
+    assert state.model is None and isinstance(state.engine, CompiledLogit)
+    X = _rows(state.feature_names)
+    expected = trained["model"].predict_proba(pd.DataFrame(X, columns=state.feature_names))[:, 1]
+    assert state.engine.predict_positive(X) == pytest.approx(expected, abs=1e-12)
+    assert state.metrics["age_group_thresholds"] == trained["metrics"]["age_group_thresholds"]
+
+
+def test_joblib_format_forces_the_pickle(published, monkeypatch):
+    monkeypatch.setattr(model_state, "MODEL_FORMAT", "joblib")
+    state = load_model_state(published)
+    assert state.model is not None and isinstance(state.engine, CompiledLogit)
@@ -0,0 +1,47 @@
+import threading
+
+from service.metrics import Counter, Gauge, Histogram, render
+
+
+def test_histogram_buckets_are_cumulative_and_summed_across_threads():
+    hist = Histogram("h_seconds", "help", labelnames=("stage",), buckets=(0.1, 1.0))
+
+    def record():
+        for value in (0.05, 0.1, 0.5, 3.0):
+            hist.observe(value, "model")
+
+    threads = [threading.Thread(target=record) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    lines = hist.render()
+    assert lines[2:] == [
+        'h_seconds_bucket{stage="model",le="0.1"} 6',
+        'h_seconds_bucket{stage="model",le="1"} 9',
+        'h_seconds_bucket{stage="model",le="+Inf"} 12',
+        'h_seconds_sum{stage="model"} 10.95',
+        'h_seconds_count{stage="model"} 12',
+    ]
+
+
+def test_counter_and_gauge_render():
+    counter = Counter("c_total", "help", labelnames=("group",))
+    counter.inc("adult")
+    counter.inc("adult", amount=2)
+    counter.inc('we"ird')
+    gauge = Gauge("g", "help")
+    gauge.inc()
+    other = threading.Thread(target=gauge.dec)  # dec on another thread than inc
+    other.start()
+    other.join()
+
+    assert counter.render()[2:] == ['c_total{group="adult"} 3', 'c_total{group="we\\"ird"} 1']
+    assert gauge.render()[2] == "g 0"
+
+
+def test_render_starts_with_model_info():
+    text = render("v1")
+    assert text.startswith('# HELP gitvitals_model_info')
+    assert 'gitvitals_model_info{version="v1"} 1' in text and text.endswith("\n")
@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.inference import compile_model
+from ml.predict import (
+    _resolve_threshold,
+    _resolve_thresholds,
+    explain_contributions,
+    predict_batch,
+    predict_from_json,
+)
+
+METRICS = {"age_group_thresholds": {"neonate": 0.1, "child": 0.15, "teen": 0.2, "adult": 0.3, "senior": 0.4}}
+AGES = [0.0, 0.5, 1.0, 12.99, 13.0, 17.5, 18.0, 64.9, 65.0, 99.0, math.inf, math.nan]
+
+
+def test_threshold_rules_agree_scalar_and_vectorized():
+    vectorized = _resolve_thresholds(METRICS, np.array(AGES), 0.5)
+    scalar = [_resolve_threshold(METRICS, {"age_years": age}, 0.5) for age in AGES]
+    assert list(vectorized) == scalar
+    assert scalar[-1] == 0.5  # unknown age -> default threshold, not "senior"
+    assert _resolve_threshold(METRICS, {}, 0.5) == 0.5
+    assert list(_resolve_thresholds({}, np.array(AGES), 0.5)) == [0.5] * len(AGES)
+
+
+@pytest.fixture(scope="module")
+def scoring(trained):
+    names, metrics = trained["metrics"]["feature_names"], trained["metrics"]
+    return trained["model"], compile_model(trained["model"], names), names, metrics
+
+
+def _payloads(names, n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    base = {"age_years": 40.0, "bp_systolic": 120.0, "bp_diastolic": 80.0, "heart_rate": 75.0,
+            "temperature": 98.6, "respiratory_rate": 16.0, "oxygen_saturation": 97.0,
+            "pulse_pressure": 40.0, "pain_level": 2.0}
+    rows = []
+    for i in range(n):
+        row = {k: base[k] * float(rng.uniform(0.7, 1.3)) for k in names}
+        row["age_years"] = AGES[i % len(AGES)]
+        rows.append(row)
+    return rows
+
+
+def test_compiled_kernel_matches_sklearn(scoring):
+    model, engine, names, metrics = scoring
+    payloads = _payloads(names)
+    X = np.array([[p[k] for k in names] for p in payloads])
+    X = X[np.isfinite(X).all(axis=1)]
+    expected = model.predict_proba(pd.DataFrame(X, columns=names))[:, 1]
+    assert engine.predict_positive(X) == pytest.approx(expected, abs=1e-12)
+
+
+def test_batch_and_single_predictions_agree(scoring):
+    _, engine, names, metrics = scoring
+    payloads = _payloads(names)
+    batch = predict_batch(engine, payloads, names, 0.5, metrics, top_k=3)
+    for payload, result in zip(payloads, batch):
+        single = predict_from_json(engine, payload, names, 0.5, metrics, top_k=3)
+        if math.isnan(payload["age_years"]):
+            assert result["threshold"] == single["threshold"] == 0.5
+            continue
+        assert result["risk_probability"] == pytest.approx(single["risk_probability"], abs=1e-12)
+        assert result["threshold"] == single["threshold"]
+        assert result["pred"] == single["pred"]
+        assert result["contributions"] == single["contributions"]
+
+
+def test_contributions_are_exact_log_odds(scoring):
+    _, engine, names, _ = scoring
+    X = np.array([[p[k] for k in names] for p in _payloads(names)[:11]])  # known ages only
+    probs, contrib = engine.predict_with_contributions(X)
+    logit = np.log(probs / (1 - probs))
+    assert contrib.sum(axis=1) + engine.intercept == pytest.approx(logit, abs=1e-9)
+
+    flags = np.arange(len(X)) % 2 == 0
+    top = explain_contributions(contrib, X, names, flags, top_k=3)
+    for row, flag, items in zip(contrib, flags, top):
+        assert [item["log_odds"] for item in items] == pytest.approx(sorted(row, reverse=bool(flag))[:3])
+        assert all(item["text"] for item in items)
+
+
+def test_flagged_reading_is_explained_by_what_raises_risk(scoring):
+    _, engine, names, metrics = scoring
+    payloads = _payloads(names, n=200, seed=1)
+    # A low threshold flags readings whose biggest contributions lower risk.
+    results = predict_batch(engine, payloads, names, 0.01, {}, top_k=3)
+    flagged = [r for r in results if r["pred"] == 1]
+    assert flagged
+    for result in flagged:
+        first = result["contributions"][0]
+        assert first["log_odds"] > 0
+        assert "raises risk" in first["text"]
+    assert any(r["contributions"][0]["log_odds"] < 0 for r in results if r["pred"] == 0)
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from ml import registry
+from ml.inference import compact_model_json, compile_pipeline
+from ml.train import load_previous_artifacts
+from service.model_state import ModelHolder
+
+
+@pytest.fixture
+def artifacts(tmp_path, trained):
+    compiled = compile_pipeline(trained["model"], trained["metrics"]["feature_names"])
+    for version in ("v1", "v2"):
+        registry.publish(
+            version,
+            trained["model"],
+            trained["metrics"],
+            trained["eval_report"],
+            artifacts_dir=tmp_path,
+            make_current=version == "v1",
+            compact_json=lambda metrics: compact_model_json(compiled, metrics),
+        )
+    return tmp_path
+
+
+def test_publish_resolve_and_rollback(artifacts):
+    assert registry.list_versions(artifacts) == ["v1", "v2"]
+    assert registry.current_version(artifacts) == "v1"
+
+    paths = registry.resolve(artifacts, "v2")
+    assert json.loads(paths.metrics_path.read_text())["model_version"] == "v2"
+    assert paths.compact_path.exists() and paths.model_path.exists()
+
+    registry.set_current("v2", artifacts)
+    assert registry.resolve(artifacts).version == "v2"
+    registry.set_current("v1", artifacts)  # rollback
+    assert registry.resolve(artifacts).directory.name == "v1"
+
+
+def test_incremental_training_starts_from_current(artifacts):
+    registry.set_current("v2", artifacts)
+    registry.set_current("v1", artifacts)  # rollback
+
+    _, metrics = load_previous_artifacts(artifacts)
+
+    assert metrics["model_version"] == "v1"
+
+
+def test_publish_never_overwrites(artifacts, trained):
+    paths = registry.publish("v1", trained["model"], trained["metrics"], artifacts_dir=artifacts)
+    assert paths.version == "v1-1"
+    assert registry.current_version(artifacts) == "v1-1"
+
+
+@pytest.mark.parametrize("version", ["..", "../..", "../versions/v1", "v1/..", ".", "missing", "/etc", "..\\v1"])
+def test_resolve_rejects_names_outside_versions(artifacts, version):
+    with pytest.raises(FileNotFoundError):
+        registry.resolve(artifacts, version)
+    with pytest.raises(FileNotFoundError):
+        registry.set_current(version, artifacts)
+
+
+def test_publish_rejects_path_names(tmp_path, trained):
+    with pytest.raises(ValueError):
+        registry.publish("../escape", trained["model"], trained["metrics"], artifacts_dir=tmp_path)
+
+
+def test_holder_reload_swaps_whole_state(artifacts):
+    holder = ModelHolder(artifacts)
+    assert holder.current.version == "v1"
+    before = holder.current
+
+    assert holder.reload("v1") == {"previous": "v1", "version": "v1", "swapped": False}
+    result = holder.reload("v2")
+    assert result == {"previous": "v1", "version": "v2", "swapped": True}
+    assert holder.current.version == "v2"
+    assert before.version == "v1"  # in-flight requests keep their own state
+
+    with pytest.raises(FileNotFoundError):
+        holder.reload("../..")
+    assert holder.current.version == "v2"
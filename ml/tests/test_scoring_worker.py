@@ -0,0 +1,136 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import scoring_worker
+from ml.predict import score_frame
+from ml.synthetic import FEATURE_NAMES, make_synthetic_data
+
+COLUMNS = ["id", "studentId", "patientId", "readingNumber", *FEATURE_NAMES]
+
+
+class FakeTable:
+    """"VitalReading" rows; claims skip rows another open batch holds, like SKIP LOCKED."""
+
+    def __init__(self, n):
+        frame = make_synthetic_data(n, seed=8)
+        frame.loc[3, "age_years"] = np.nan  # a patient without an age
+        self.rows = {
+            f"r{i:04d}": (f"r{i:04d}", "s1", "p1", i, *frame.loc[i, FEATURE_NAMES].tolist()) for i in range(n)
+        }
+        self.scores = {}
+        self.claimed = set()
+        self.claim_sizes = []
+        self.lock = threading.Lock()
+
+    def claim(self, limit):
+        with self.lock:
+            free = [key for key in self.rows if key not in self.scores and key not in self.claimed][:limit]
+            self.claimed.update(free)
+            self.claim_sizes.append(len(free))
+            return [self.rows[key] for key in free]
+
+    def write(self, scores, version):
+        with self.lock:
+            for row_id, prob, flag in scores:
+                assert row_id not in self.scores, f"{row_id} scored twice"
+                self.scores[row_id] = (prob, flag, version)
+                self.claimed.discard(row_id)
+
+
+class FakeCursor:
+    def __init__(self, table):
+        self.table = table
+        self.description = [SimpleNamespace(name=c) for c in COLUMNS]
+        self.copied = []
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if "FOR UPDATE OF vr SKIP LOCKED" in query:
+            assert scoring_worker._UNSCORED in query
+            self._rows = self.table.claim(params["limit"])
+        elif query.lstrip().startswith('UPDATE "VitalReading"'):
+            self.table.write(self.copied, params["version"])
+
+    def fetchall(self):
+        return self._rows
+
+    def copy(self, statement):
+        cursor = self
+
+        class Copy:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def write_row(self, row):
+                cursor.copied.append(row)
+
+        return Copy()
+
+
+class FakePool:
+    def __init__(self, table):
+        self.table = table
+
+    def connection(self):
+        table = self.table
+
+        class Connection:
+            def __enter__(self):
+                return SimpleNamespace(cursor=lambda: FakeCursor(table))
+
+            def __exit__(self, *exc):
+                return False
+
+        return Connection()
+
+
+@pytest.fixture
+def table():
+    return FakeTable(250)
+
+
+def test_drain_scores_every_row_once(table, artifacts_dir):
+    worker = scoring_worker.ScoringWorker(FakePool(table), batch_size=40, concurrency=3, artifacts_dir=artifacts_dir)
+
+    stats = worker.drain()
+
+    assert (stats["rows"], stats["errors"]) == (250, 1)
+    assert stats["batches"] == 7 and table.claim_sizes.count(0) == 3
+    assert set(table.scores) == set(table.rows)
+    assert table.scores["r0003"] == (None, None, worker.state.version)
+
+
+def test_write_back_matches_bulk_scoring(table, artifacts_dir):
+    worker = scoring_worker.ScoringWorker(FakePool(table), batch_size=1000, concurrency=1, artifacts_dir=artifacts_dir)
+    worker.drain()
+
+    frame = pd.DataFrame.from_records(list(table.rows.values()), columns=COLUMNS)
+    state = worker.state
+    expected = score_frame(state.engine, frame, state.feature_names, state.threshold, state.metrics)
+    for row_id, prob, pred, error in zip(
+        frame["id"], expected["risk_probability"], expected["pred"], expected["error"]
+    ):
+        got_prob, got_flag, _ = table.scores[row_id]
+        if error:
+            assert got_prob is None
+        else:
+            assert got_prob == prob and got_flag == (pred == 1)
+
+
+@pytest.mark.parametrize("kwargs", [{"batch_size": 0}, {"concurrency": 0}])
+def test_rejects_invalid_settings(table, kwargs):
+    with pytest.raises(ValueError):
+        scoring_worker.ScoringWorker(FakePool(table), **kwargs)
@@ -0,0 +1,123 @@
+import gc
+import os
+import select
+import signal
+import threading
+
+import pytest
+import uvicorn
+
+from ml import registry
+from ml.inference import compact_model_json, compile_pipeline
+from service.model_state import ModelHolder
+
+
+@pytest.fixture(scope="module")
+def serve(api):
+    from service import serve
+
+    return serve
+
+
+def test_shared_status_is_visible_across_fork(serve):
+    status = serve.SharedStatus(size=4096)
+    status.write({"generation": 1})
+    pid = os.fork()
+    if pid == 0:
+        # Child: read the parent's document, then publish one of its own.
+        ok = status.read() == {"generation": 1}
+        status.write({"generation": 2, "from": "child"})
+        os._exit(0 if ok else 1)
+    _, code = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(code) == 0
+    assert status.read() == {"generation": 2, "from": "child"}
+    with pytest.raises(ValueError, match="does not fit"):
+        status.write({"blob": "x" * 5000})
+    assert status.read()["generation"] == 2
+
+
+@pytest.fixture
+def supervisor(api, serve, tmp_path, trained, monkeypatch):
+    engine = compile_pipeline(trained["model"], trained["metrics"]["feature_names"])
+    for version in ("v1", "v2"):
+        registry.publish(
+            version,
+            trained["model"],
+            trained["metrics"],
+            trained["eval_report"],
+            artifacts_dir=tmp_path,
+            make_current=version == "v1",
+            compact_json=lambda metrics: compact_model_json(engine, metrics),
+        )
+    monkeypatch.setattr(api, "holder", ModelHolder(tmp_path))
+    sup = serve.Supervisor(uvicorn.Config(api.app), workers=2)
+    # No real workers: record forks and signals instead.
+    pids = iter(range(10_000_000, 10_001_000))
+    signals = []
+
+    def spawn(sock):
+        pid = next(pids)
+        sup.workers[pid] = sup.generation
+        return pid
+
+    monkeypatch.setattr(sup, "_spawn", spawn)
+    monkeypatch.setattr(sup, "_signal", lambda pid, sig: signals.append((pid, sig)))
+    sup.signals = signals
+    sup._start_generation(None)
+    yield sup
+    gc.unfreeze()
+    for fd in (sup._requests_r, sup._requests_w):
+        os.close(fd)
+
+
+def test_request_lines_survive_partial_reads(supervisor):
+    os.write(supervisor._requests_w, b'{"id": "a", "version": "v2"}\n{"id": "b", "ver')
+    assert supervisor._read_requests() == [{"id": "a", "version": "v2"}]
+    os.write(supervisor._requests_w, b'sion": null}\n\nnot json\n')
+    assert supervisor._read_requests() == [{"id": "b", "version": None}, {}]
+
+
+def test_reload_replaces_the_whole_generation(supervisor):
+    old = sorted(supervisor.workers)
+    supervisor._handle_request(None, {"id": "r1", "version": "v2"})
+
+    doc = supervisor.status.read()
+    assert doc["results"]["r1"] == {"previous": "v1", "version": "v2", "swapped": True, "generation": 2}
+    assert (doc["generation"], doc["version"]) == (2, "v2")
+    assert len(doc["workers"]) == 2 and not set(doc["workers"]) & set(old)
+    assert supervisor.signals == [(pid, signal.SIGTERM) for pid in old]
+
+    supervisor._handle_request(None, {"id": "r2", "version": "missing"})
+    doc = supervisor.status.read()
+    assert "error" in doc["results"]["r2"] and doc["last_reload_error"].startswith("FileNotFoundError")
+    assert (doc["generation"], doc["version"]) == (2, "v2")
+
+
+def test_worker_link_waits_for_the_parent(serve, supervisor):
+    link = serve.WorkerLink(supervisor.status, supervisor._requests_w, 1, supervisor.holder.artifacts_dir)
+    assert link.request_reload("v1", force=False) == {"previous": "v1", "version": "v1", "swapped": False}
+    with pytest.raises(FileNotFoundError):
+        link.request_reload("../..", force=False)
+
+    done = threading.Event()
+
+    def parent():
+        # The supervisor's loop, for one request.
+        while not done.is_set():
+            if select.select([supervisor._requests_r], [], [], 0.05)[0]:
+                for request in supervisor._read_requests():
+                    supervisor._handle_request(None, request)
+                return
+
+    thread = threading.Thread(target=parent)
+    thread.start()
+    try:
+        result = link.request_reload("v2", force=False)
+    finally:
+        done.set()
+        thread.join()
+
+    assert result == {"previous": "v1", "version": "v2", "swapped": True, "generation": 2}
+    assert link.info()["serving_generation"] == 2 and link.info()["count"] == 2
+    assert link.status.read()["version"] == "v2"
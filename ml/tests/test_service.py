@@ -0,0 +1,112 @@
+import asyncio
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+VITALS = {
+    "age_years": 30,
+    "heart_rate": 72,
+    "resp_rate": 16,
+    "temp_f": 98.6,
+    "spo2_pct": 98,
+    "systolic_bp": 120,
+    "diastolic_bp": 80,
+    "height_ft": 5,
+    "height_in": 7,
+    "weight_lb": 160,
+    "pain_0_10": 2,
+}
+
+
+@pytest.fixture(scope="module")
+def client(api):
+    with TestClient(api.app) as client:
+        yield client
+
+
+def _predictions_total(client: TestClient) -> float:
+    text = client.get("/metrics").text
+    return sum(float(v) for v in re.findall(r"^gitvitals_predictions_total\{.*\} (\S+)$", text, re.M))
+
+
+def test_predict_cache_hits_are_counted(api, client):
+    if api.prediction_cache is None:
+        pytest.skip("prediction cache disabled")
+    reading = {**VITALS, "heart_rate": 131}  # not used by other tests
+    before = _predictions_total(client)
+    hits_before = api.prediction_cache.stats()["hits"]
+
+    bodies = [client.post("/predict", json=reading).json() for _ in range(4)]
+
+    assert api.prediction_cache.stats()["hits"] - hits_before == 3
+    assert _predictions_total(client) - before == 4
+    assert all(body == bodies[0] for body in bodies)
+
+
+def test_admin_refused_without_configured_token(api, client, monkeypatch):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "")
+    monkeypatch.setattr(api, "ADMIN_ALLOW_UNAUTHENTICATED", False)
+    assert client.get("/admin/model").status_code == 403
+    assert client.post("/admin/reload", params={"version": "../.."}).status_code == 403
+
+    monkeypatch.setattr(api, "ADMIN_ALLOW_UNAUTHENTICATED", True)
+    assert client.get("/admin/model").status_code == 200
+
+
+def test_admin_token_and_version_validation(api, client, monkeypatch):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/model").status_code == 403
+    assert client.get("/admin/model", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    headers = {"X-Admin-Token": "s3cret"}
+    assert client.get("/admin/model", headers=headers).json()["version"] == api.holder.current.version
+    for version in ("..", "../..", "../../ml"):
+        response = client.post("/admin/reload", params={"version": version}, headers=headers)
+        assert response.status_code == 404
+
+
+def test_batch_endpoint_keeps_order_and_isolates_bad_rows(client):
+    readings = [VITALS, {**VITALS, "spo2_pct": 140}, {**VITALS, "heart_rate": 118, "age_years": 70}]
+    body = client.post("/predict/batch", json={"readings": readings}).json()
+
+    assert (body["n_ok"], body["n_errors"]) == (2, 1)
+    assert [item["index"] for item in body["results"]] == [0, 1, 2]
+    assert body["results"][1]["error"] == "spo2_pct: Input should be less than or equal to 100"
+    assert body["results"][1]["result"] is None
+    for i in (0, 2):
+        single = client.post("/predict", json=readings[i]).json()
+        assert body["results"][i]["result"]["p_flag"] == pytest.approx(single["p_flag"], abs=1e-12)
+        assert body["results"][i]["result"]["threshold"] == single["threshold"]
+
+
+def test_predict_validation_errors_keep_the_fastapi_shape(client):
+    response = client.post("/predict", json={**VITALS, "spo2_pct": 140})
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["loc"] == ["body", "spo2_pct"] and error["type"] == "less_than_equal"
+    assert "url" not in error
+
+    for body in ([VITALS], "not an object"):
+        [error] = client.post("/predict", json=body).json()["detail"]
+        assert error["loc"] == ["body"]
+
+    response = client.post("/predict", content=b"{not json", headers={"Content-Type": "application/json"})
+    assert response.status_code == 422 and response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_unbatched_predict_scores_off_the_event_loop(api, client, monkeypatch):
+    score_one, on_loop = api._score_one, []
+
+    def spy(state, payload):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return score_one(state, payload)
+
+    monkeypatch.setattr(api, "batcher", None)
+    monkeypatch.setattr(api, "prediction_cache", None)
+    monkeypatch.setattr(api, "_score_one", spy)
+    assert client.post("/predict", json=VITALS).status_code == 200
+    assert on_loop == [False]
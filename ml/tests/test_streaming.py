@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from service.streaming import ndjson_blocks
+from test_service import VITALS
+
+
+async def _chunks(parts):
+    for part in parts:
+        yield part
+
+
+def _blocks(parts, max_block=100, max_line_bytes=1000):
+    async def collect():
+        return [block async for block in ndjson_blocks(_chunks(parts), max_block, max_line_bytes)]
+
+    return asyncio.run(collect())
+
+
+def test_lines_split_across_chunks_are_reassembled():
+    blocks = _blocks([b'{"a"', b': 1}\n\n{"b": 2}', b"\r\n", b'{"c": 3}'])
+    # One block per body chunk that completed a line; the unterminated tail comes last.
+    assert blocks == [[b'{"a": 1}'], [b'{"b": 2}'], [b'{"c": 3}']]
+
+
+def test_blocks_are_capped_at_max_block():
+    blocks = _blocks([b"1\n2\n3\n4\n5\n"], max_block=2)
+    assert blocks == [[b"1", b"2"], [b"3", b"4"], [b"5"]]
+
+
+def test_oversized_lines_are_reported_without_buffering():
+    blocks = _blocks([b"ok\n", b"x" * 30, b"x" * 30, b"\nfine\n", b"y" * 50], max_line_bytes=40)
+    assert [line for block in blocks for line in block] == [b"ok", None, b"fine", None]
+
+
+def test_rejects_empty_blocks():
+    with pytest.raises(ValueError):
+        _blocks([b"1\n"], max_block=0)
+
+
+@pytest.fixture(scope="module")
+def client(api):
+    with TestClient(api.app) as client:
+        yield client
+
+
+def test_stream_endpoint_matches_batch_and_isolates_bad_lines(api, client, monkeypatch):
+    monkeypatch.setattr(api, "STREAM_BLOCK_SIZE", 2)
+    readings = [VITALS, {**VITALS, "heart_rate": 140}, {**VITALS, "spo2_pct": 140}, {**VITALS, "age_years": 80}]
+    lines = [json.dumps(r) for r in readings]
+    body = "\n".join([lines[0], "", lines[1], "not json", lines[2], lines[3]]) + "\n"
+
+    response = client.post("/predict/stream", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["index"] for item in items] == [0, 1, 2, 3, 4]
+    assert [("error" in item) for item in items] == [False, False, True, True, False]
+    assert items[2]["error"].startswith("Invalid JSON") and "\n" not in items[2]["error"]
+    assert items[3]["error"] == "spo2_pct: Input should be less than or equal to 100"
+
+    batch = client.post("/predict/batch", json={"readings": [readings[i] for i in (0, 1, 3)]}).json()
+    streamed = [items[i]["result"] for i in (0, 1, 4)]
+    for got, expected in zip(streamed, (r["result"] for r in batch["results"])):
+        # Blocks of different sizes may round the matmul differently in the last bit.
+        assert got.pop("p_flag") == pytest.approx(expected.pop("p_flag"), abs=1e-12)
+        assert got == expected
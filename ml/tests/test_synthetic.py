@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from ml.matrix_store import MatrixDataset, write_dataset
+from ml.synthetic import FEATURE_NAMES, iter_synthetic_chunks, make_synthetic_data, write_synthetic_dataset
+
+
+def test_chunks_are_reproducible_one_by_one():
+    chunks = list(iter_synthetic_chunks(2500, seed=4, chunk_size=1000))
+    assert [len(y) for _, y in chunks] == [1000, 1000, 500]
+
+    again = list(iter_synthetic_chunks(2500, seed=4, chunk_size=1000))
+    for (X, y), (X2, y2) in zip(chunks, again):
+        np.testing.assert_array_equal(X, X2)
+        np.testing.assert_array_equal(y, y2)
+    other_seed = next(iter_synthetic_chunks(1000, seed=5, chunk_size=1000))[0]
+    assert not np.array_equal(chunks[0][0], other_seed)
+
+    X, y = chunks[0]
+    assert X.shape == (1000, len(FEATURE_NAMES)) and X.dtype == np.float64 and y.dtype == np.int8
+    assert set(np.unique(y)) <= {0, 1}
+
+
+def test_make_synthetic_data_is_deterministic():
+    a, b = make_synthetic_data(300, seed=9), make_synthetic_data(300, seed=9)
+    assert a.equals(b)
+    assert list(a.columns) == [*FEATURE_NAMES, "at_risk"]
+
+
+def test_dataset_round_trip(tmp_path):
+    path = write_synthetic_dataset(tmp_path / "ds", 2500, seed=4, chunk_size=1000)
+    expected_X = np.concatenate([X for X, _ in iter_synthetic_chunks(2500, seed=4, chunk_size=1000)])
+    expected_y = np.concatenate([y for _, y in iter_synthetic_chunks(2500, seed=4, chunk_size=1000)])
+
+    ds = MatrixDataset(path)
+
+    assert ds.n_rows == 2500 and ds.feature_names == FEATURE_NAMES
+    assert ds.meta["seed"] == 4 and ds.meta["positive_rate"] == pytest.approx(expected_y.mean())
+    X, y = ds.read(0, ds.n_rows)
+    np.testing.assert_array_equal(X, expected_X.astype(np.float32))
+    np.testing.assert_array_equal(y, expected_y)
+
+    batches = list(ds.batches(0, 2500, 700, order=np.array([3, 1, 0, 2])))
+    assert [len(b) for _, b in batches] == [400, 700, 700, 700]
+    np.testing.assert_array_equal(batches[0][1], expected_y[2100:])
+    assert sorted(path.parent.iterdir()) == [path]  # no staging leftovers
+
+
+def test_failed_write_leaves_no_dataset(tmp_path):
+    def chunks():
+        yield np.zeros((2, 2)), np.zeros(2, dtype=np.int8)
+        raise RuntimeError("source died")
+
+    with pytest.raises(RuntimeError):
+        write_dataset(tmp_path / "ds", chunks(), ["a", "b"])
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from sklearn.metrics import f1_score
+
+from ml.train import DEFAULT_THRESHOLD_GRID, best_threshold, threshold_curve
+
+
+def _grid_loop(y, prob, grid):
+    """The original 81-step f1_score loop."""
+    best_t, best_f1 = 0.5, -1.0
+    for t in grid:
+        f1 = f1_score(y, (prob >= t).astype(int), zero_division=0)
+        if f1 > best_f1:
+            best_t, best_f1 = float(t), f1
+    return best_t
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_best_threshold_matches_grid_loop(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(5, 400))
+    y = rng.integers(0, 2, n)
+    # Rounded probabilities put ties exactly on grid points.
+    prob = np.round(np.clip(0.35 * y + rng.random(n) * 0.65, 0, 1), 2)
+
+    assert best_threshold(y, prob) == pytest.approx(_grid_loop(y, prob, DEFAULT_THRESHOLD_GRID))
+
+
+def test_curve_matches_sklearn_at_every_threshold():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 300)
+    prob = rng.random(300)
+    curve = threshold_curve(y, prob)
+
+    for i in range(0, len(curve["thresholds"]), 37):
+        pred = (prob >= curve["thresholds"][i]).astype(int)
+        assert curve["f1"][i] == pytest.approx(f1_score(y, pred, zero_division=0))
+
+
+def test_exact_search_is_at_least_as_good_as_the_grid():
+    rng = np.random.default_rng(1)
+    y = rng.integers(0, 2, 500)
+    prob = np.clip(0.2 * y + rng.random(500) * 0.8, 0, 1)
+
+    grid_t = best_threshold(y, prob)
+    exact_t = best_threshold(y, prob, None)
+
+    assert f1_score(y, prob >= exact_t) >= f1_score(y, prob >= grid_t)
+    assert exact_t in set(prob)
+
+
+def test_best_threshold_on_empty_input():
+    assert best_threshold(np.array([]), np.array([])) == 0.5
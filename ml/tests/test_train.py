@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from ml.data_loader import compact_frame
+from ml.matrix_store import MatrixDataset
+from ml.synthetic import make_synthetic_data, write_synthetic_dataset
+from ml.train import (
+    StreamingEvaluator,
+    _parse_param_grid,
+    evaluate_holdout,
+    fit_streaming_scaler,
+    resolve_n_jobs,
+    train_cv,
+    train_incremental,
+    train_out_of_core,
+)
+
+
+def test_incremental_accepts_compact_frames(trained):
+    new_rows = compact_frame(make_synthetic_data(n=800, seed=11))
+    assert (new_rows.drop(columns="at_risk").dtypes == np.float32).any()
+
+    result = train_incremental(trained["model"], trained["metrics"], new_rows, seed=3)
+
+    clf = result["model"].named_steps["clf"]
+    assert clf.coef_.dtype == np.float64
+    assert result["metrics"]["training_mode"] == "incremental"
+    seen = int(trained["model"].named_steps["scaler"].n_samples_seen_)
+    assert result["metrics"]["n_rows"] == seen + len(new_rows)
+    prob = result["model"].predict_proba(new_rows[trained["metrics"]["feature_names"]])[:, 1]
+    assert np.isfinite(prob).all()
+
+
+def test_incremental_rejects_missing_features(trained):
+    new_rows = compact_frame(make_synthetic_data(n=100, seed=11)).drop(columns="heart_rate")
+    with pytest.raises(ValueError, match="missing trained features"):
+        train_incremental(trained["model"], trained["metrics"], new_rows)
+
+
+def test_incremental_starts_from_the_previous_model(trained):
+    prev = trained["model"]
+    prev_scaler = prev.named_steps["scaler"]
+    seen_before = int(prev_scaler.n_samples_seen_)
+    new_rows = compact_frame(make_synthetic_data(n=400, seed=12))
+    features = trained["metrics"]["feature_names"]
+
+    result = train_incremental(prev, trained["metrics"], new_rows, seed=3, epochs=1)
+
+    # The previous pipeline is left untouched; the copy absorbed the 300 fit rows.
+    assert int(prev_scaler.n_samples_seen_) == seen_before
+    assert int(result["model"].named_steps["scaler"].n_samples_seen_) == seen_before + 300
+    assert result["metrics"]["parent_version"] == trained["metrics"].get("model_version")
+    # A small warm-started update stays close to the model it started from.
+    X = new_rows[features].astype(np.float64)
+    before = prev.predict_proba(X)[:, 1]
+    after = result["model"].predict_proba(X)[:, 1]
+    assert np.corrcoef(before, after)[0, 1] > 0.95
+
+
+def test_incremental_weights_history_by_rows_actually_fit(trained):
+    new_rows = compact_frame(make_synthetic_data(n=400, seed=12))
+    # metrics["n_rows"] includes the hold-out; the warm start must not use it.
+    inflated = {**trained["metrics"], "n_rows": 10 * trained["metrics"]["n_rows"]}
+
+    a = train_incremental(trained["model"], trained["metrics"], new_rows, seed=3, epochs=1)
+    b = train_incremental(trained["model"], inflated, new_rows, seed=3, epochs=1)
+
+    assert np.array_equal(a["model"].named_steps["clf"].coef_, b["model"].named_steps["clf"].coef_)
+    assert a["metrics"]["n_rows"] < trained["metrics"]["n_rows"] + len(new_rows)
+
+
+def test_incremental_keeps_thresholds_when_too_few_rows(trained):
+    new_rows = compact_frame(make_synthetic_data(n=5, seed=13))
+
+    result = train_incremental(trained["model"], trained["metrics"], new_rows)
+
+    assert result["metrics"]["age_group_thresholds"] == trained["metrics"]["age_group_thresholds"]
+    assert result["metrics"]["n_rows_incremental"] == 5
+
+
+@pytest.fixture(scope="module")
+def cv_frame():
+    return compact_frame(make_synthetic_data(n=600, seed=21))
+
+
+def test_cv_picks_the_best_candidate_and_pools_oof_predictions(cv_frame):
+    grid = _parse_param_grid("0.01,1", "balanced")
+    result = train_cv(cv_frame, seed=3, n_folds=3, n_repeats=2, param_grid=grid)
+
+    cv = result["eval_report"]["cv"]
+    assert [r["params"] for r in cv["results"]] == grid
+    best = max(cv["results"], key=lambda r: r["roc_auc_mean"])
+    assert cv["best_params"] == best["params"] == result["metrics"]["cv"]["best_params"]
+    assert result["metrics"]["training_mode"] == "cv" and result["metrics"]["n_rows"] == 600
+    # Refit on all rows with the winning parameters.
+    assert result["model"].named_steps["clf"].C == best["params"]["C"]
+
+
+def test_cv_results_do_not_depend_on_the_worker_count(cv_frame):
+    serial = train_cv(cv_frame, seed=3, n_folds=3, n_jobs=1)
+    parallel = train_cv(cv_frame, seed=3, n_folds=3, n_jobs=2)
+
+    assert parallel["eval_report"]["cv"]["n_jobs"] == 2
+    assert serial["eval_report"]["cv"]["results"] == parallel["eval_report"]["cv"]["results"]
+    assert serial["metrics"]["age_group_thresholds"] == parallel["metrics"]["age_group_thresholds"]
+
+
+def test_cv_argument_parsing():
+    assert _parse_param_grid("0.1, 1", "balanced,none") == [
+        {"C": 0.1, "class_weight": "balanced"},
+        {"C": 0.1, "class_weight": None},
+        {"C": 1.0, "class_weight": "balanced"},
+        {"C": 1.0, "class_weight": None},
+    ]
+    assert resolve_n_jobs(3) == 3 and resolve_n_jobs(-1) >= 1
+    with pytest.raises(ValueError):
+        resolve_n_jobs(0)
+
+
+@pytest.fixture(scope="module")
+def matrix_dir(tmp_path_factory):
+    return write_synthetic_dataset(tmp_path_factory.mktemp("matrix") / "ds", 4000, seed=2, chunk_size=1500)
+
+
+def test_streaming_scaler_matches_in_memory_fit(matrix_dir):
+    dataset = MatrixDataset(matrix_dir)
+    scaler, class_counts = fit_streaming_scaler(dataset, 3000, batch_size=256)
+
+    X, y = dataset.read(0, 3000)
+    expected = StandardScaler().fit(X.astype(np.float64))
+    np.testing.assert_allclose(scaler.mean_, expected.mean_, rtol=1e-12)
+    np.testing.assert_allclose(scaler.scale_, expected.scale_, rtol=1e-10)
+    assert class_counts.tolist() == np.bincount(y, minlength=2).tolist()
+
+
+def test_streaming_evaluator_matches_in_memory_metrics():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 5000)
+    prob = np.clip(0.3 * y + 0.7 * rng.random(5000), 0, 1)
+    ages = rng.uniform(0, 90, 5000)
+    evaluator = StreamingEvaluator(0.5)
+    for part in np.array_split(np.arange(5000), 7):
+        evaluator.update(y[part], prob[part], ages[part])
+
+    expected = evaluate_holdout(y, prob, ages, 0.5)
+    for group, curve in evaluator.group_curves().items():
+        np.testing.assert_allclose(curve["f1"], expected["threshold_curves"][group]["f1"], rtol=1e-12)
+    metrics = evaluator.metrics()
+    assert metrics["confusion_matrix"] == expected["overall"]["confusion_matrix"]
+    assert metrics["roc_auc"] == pytest.approx(roc_auc_score(y, prob), abs=1e-3)
+
+
+def test_out_of_core_training_scores_the_holdout_slice(matrix_dir):
+    result = train_out_of_core(matrix_dir, seed=1, epochs=3, batch_size=512)
+
+    metrics = result["metrics"]
+    assert metrics["training_mode"] == "out-of-core"
+    assert (metrics["n_rows"], metrics["n_rows_holdout"]) == (4000, 1000)
+    X, y = MatrixDataset(matrix_dir).read(3000, 4000)
+    frame = pd.DataFrame(X.astype(np.float64), columns=metrics["feature_names"])
+    prob = result["model"].predict_proba(frame)[:, 1]
+    assert metrics["roc_auc"] == pytest.approx(roc_auc_score(y, prob), abs=1e-3)
+    assert metrics["roc_auc"] > 0.7
+    assert set(metrics["age_group_thresholds"]) == set(result["eval_report"]["threshold_curves"])
@@ -1,25 +1,20 @@
 from __future__ import annotations
 
 import argparse
+import copy
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import (
-    accuracy_score,
-    average_precision_score,
-    balanced_accuracy_score,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
-)
-from sklearn.model_selection import train_test_split
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import RepeatedStratifiedKFold, train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
@@ -27,13 +22,55 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     # For static analysis / type checkers, prefer the package import
-    from ml.data_loader import load_training_data_from_db  # pragma: no cover
+    from ml import registry  # pragma: no cover
+    from ml.inference import COMPACT_FILENAME, compact_model_json, compile_pipeline  # pragma: no cover
+    from ml.data_loader import (  # pragma: no cover
+        MATRIX_DIR,
+        compact_frame,
+        export_training_matrix,
+        load_training_data_cached,
+        load_training_data_from_db,
+        log_memory,
+    )
+    from ml.drift import ReferenceBuilder, build_reference  # pragma: no cover
+    from ml.evaluation import curve_from_sorted, evaluate_predictions  # pragma: no cover
+    from ml.matrix_store import MatrixDataset, frame_chunks_to_matrix, write_dataset  # pragma: no cover
+    from ml.predict import AGE_GROUP_BOUNDS, AGE_GROUPS  # pragma: no cover
+    from ml.synthetic import make_synthetic_data  # pragma: no cover
 else:
     # Runtime: try package import first, then fallback to local module import
     try:
-        from ml.data_loader import load_training_data_from_db
+        from ml import registry
+        from ml.inference import COMPACT_FILENAME, compact_model_json, compile_pipeline
+        from ml.data_loader import (
+            MATRIX_DIR,
+            compact_frame,
+            export_training_matrix,
+            load_training_data_cached,
+            load_training_data_from_db,
+            log_memory,
+        )
+        from ml.drift import ReferenceBuilder, build_reference
+        from ml.evaluation import curve_from_sorted, evaluate_predictions
+        from ml.matrix_store import MatrixDataset, frame_chunks_to_matrix, write_dataset
+        from ml.predict import AGE_GROUP_BOUNDS, AGE_GROUPS
+        from ml.synthetic import make_synthetic_data
     except Exception:
-        from data_loader import load_training_data_from_db
+        import registry
+        from inference import COMPACT_FILENAME, compact_model_json, compile_pipeline
+        from data_loader import (
+            MATRIX_DIR,
+            compact_frame,
+            export_training_matrix,
+            load_training_data_cached,
+            load_training_data_from_db,
+            log_memory,
+        )
+        from drift import ReferenceBuilder, build_reference
+        from evaluation import curve_from_sorted, evaluate_predictions
+        from matrix_store import MatrixDataset, frame_chunks_to_matrix, write_dataset
+        from predict import AGE_GROUP_BOUNDS, AGE_GROUPS
+        from synthetic import make_synthetic_data
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 ARTIFACTS_DIR = REPO_ROOT / "ml" / "artifacts"
@@ -45,49 +82,6 @@ class TrainOutputs:
     metrics_path: Path
 
 
-def make_synthetic_data(n: int = 2000, seed: int = 7) -> pd.DataFrame:
-    """Generate synthetic medical vitals data with age-aware variation."""
-    rng = np.random.default_rng(seed)
-
-    age_years = rng.uniform(0, 100, size=n)
-    age_factor = np.clip((age_years - 18) / 50, 0, 1)
-
-    bp_systolic = rng.integers(90, 180, size=n) + (age_factor * 12)
-    bp_diastolic = rng.integers(60, 110, size=n) + (age_factor * 6)
-    heart_rate = rng.integers(50, 120, size=n) + (age_years < 12) * 15
-    temperature = rng.uniform(96.0, 102.0, size=n)
-    respiratory_rate = rng.integers(10, 30, size=n) + (age_years < 2) * 6
-    oxygen_saturation = rng.integers(85, 100, size=n)
-    pulse_pressure = bp_systolic - bp_diastolic
-    pain_level = rng.integers(0, 11, size=n)
-
-    risk_score = (
-        0.18 * ((bp_systolic > 140) | (bp_systolic < 90)).astype(int)
-        + 0.14 * ((bp_diastolic > 90) | (bp_diastolic < 60)).astype(int)
-        + 0.18 * (heart_rate > 100).astype(int)
-        + 0.14 * (temperature > 100.4).astype(int)
-        + 0.10 * (respiratory_rate > 20).astype(int)
-        + 0.10 * (oxygen_saturation < 95).astype(int)
-        + 0.10 * (pain_level >= 7).astype(int)
-        + 0.06 * (age_years > 70).astype(int)
-    ) + rng.normal(0, 0.12, size=n)
-
-    at_risk = (risk_score >= 0.45).astype(int)
-
-    return pd.DataFrame({
-        "age_years": age_years.round(1),
-        "bp_systolic": bp_systolic,
-        "bp_diastolic": bp_diastolic,
-        "heart_rate": heart_rate,
-        "temperature": temperature,
-        "respiratory_rate": respiratory_rate,
-        "oxygen_saturation": oxygen_saturation,
-        "pulse_pressure": pulse_pressure,
-        "pain_level": pain_level,
-        "at_risk": at_risk,
-    })
-
-
 def age_group(age: float) -> str:
     if age < 1:
         return "neonate"
@@ -100,79 +94,291 @@ def age_group(age: float) -> str:
     return "senior"
 
 
-def best_threshold(y_true: np.ndarray, prob: np.ndarray) -> float:
-    candidates = np.linspace(0.1, 0.9, 81)
-    best_t = 0.5
-    best_f1 = -1.0
-    for t in candidates:
-        pred = (prob >= t).astype(int)
-        score = f1_score(y_true, pred, zero_division=0)
-        if score > best_f1:
-            best_f1 = score
-            best_t = t
-    return float(best_t)
+DEFAULT_THRESHOLD_GRID = np.linspace(0.1, 0.9, 81)
+
+
+def threshold_curve(
+    y_true: np.ndarray, prob: np.ndarray, thresholds: np.ndarray | None = None
+) -> dict[str, np.ndarray]:
+    """Precision/recall/F1 at every threshold from a single sort.
+
+    Predictions are ``prob >= t``. With ``thresholds=None`` the curve is
+    evaluated at every distinct probability, which is where F1 can change.
+    """
+    y = np.asarray(y_true).astype(np.int64)
+    p = np.asarray(prob, dtype=float)
+    order = np.argsort(p, kind="mergesort")
+    return curve_from_sorted(p[order], y[order], thresholds)
+
+
+def best_threshold(
+    y_true: np.ndarray, prob: np.ndarray, candidates: np.ndarray | None = DEFAULT_THRESHOLD_GRID
+) -> float:
+    """F1-optimal threshold over ``candidates`` (``None`` = exact search).
+
+    Ties go to the smallest threshold, matching the old grid loop.
+    """
+    if len(prob) == 0:
+        return 0.5
+    curve = threshold_curve(y_true, prob, candidates)
+    return float(curve["thresholds"][int(np.argmax(curve["f1"]))])
+
+
+def _curve_report(curve: dict[str, np.ndarray]) -> dict[str, list[float]]:
+    return {
+        "thresholds": [float(x) for x in curve["thresholds"]],
+        "precision": [float(x) for x in curve["precision"]],
+        "recall": [float(x) for x in curve["recall"]],
+        "f1": [float(x) for x in curve["f1"]],
+    }
+
 
+def evaluate_holdout(
+    y_true: np.ndarray,
+    prob: np.ndarray,
+    ages: np.ndarray,
+    threshold: float,
+    threshold_grid: np.ndarray | None = DEFAULT_THRESHOLD_GRID,
+) -> dict:
+    """Overall/per-group metrics and tuned thresholds (see evaluation.py).
 
-def load_data(source: str, csv_path: Path | None = None, limit: int | None = None) -> pd.DataFrame:
+    Report curves always use the standard grid; an exact search would emit
+    one point per distinct probability.
+    """
+    return evaluate_predictions(y_true, prob, ages, threshold, DEFAULT_THRESHOLD_GRID, threshold_grid)
+
+
+def _eval_report(evaluation: dict) -> dict:
+    return {
+        "overall": evaluation["overall"],
+        "age_group_thresholds": evaluation["age_group_thresholds"],
+        "groups": evaluation["groups"],
+        "threshold_curves": {
+            group: _curve_report(curve) for group, curve in evaluation["threshold_curves"].items()
+        },
+        "calibration": evaluation["calibration"],
+    }
+
+
+def new_model_version() -> str:
+    """UTC timestamp version id, e.g. 20260301T021500Z."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def load_data(
+    source: str,
+    csv_path: Path | None = None,
+    limit: int | None = None,
+    chunk_size: int | None = None,
+    cache: bool = False,
+    refresh_cache: bool = False,
+    since: dict | None = None,
+    synthetic_dir: Path | None = None,
+    partitions: int | None = None,
+    pool_size: int | None = None,
+) -> pd.DataFrame:
     """Load training data from specified source."""
     if source == "db":
-        return load_training_data_from_db(limit=limit)
+        parallel = {"partitions": partitions, "pool_size": pool_size}
+        if since is not None:
+            return load_training_data_from_db(limit=limit, chunk_size=chunk_size, since=since, **parallel)
+        if cache or refresh_cache:
+            if limit is not None:
+                raise ValueError("--limit cannot be combined with the snapshot cache")
+            if partitions is not None:
+                raise ValueError("--db-partitions cannot be combined with the snapshot cache")
+            kwargs = {"chunk_size": chunk_size} if chunk_size else {}
+            return load_training_data_cached(refresh=refresh_cache, **kwargs)
+        return load_training_data_from_db(limit=limit, chunk_size=chunk_size, **parallel)
     if source == "csv":
         if csv_path is None or not csv_path.exists():
             raise FileNotFoundError(f"CSV not found: {csv_path}")
         df = pd.read_csv(csv_path)
         if "at_risk" not in df.columns:
             raise ValueError("CSV must include target column 'at_risk'")
-        return df
-    if source == "synthetic":
-        return make_synthetic_data()
-    raise ValueError(f"Invalid source: {source}")
+        df = compact_frame(df)
+    elif source == "synthetic":
+        if synthetic_dir is not None:
+            df = compact_frame(MatrixDataset(synthetic_dir).to_frame(limit))
+        else:
+            df = compact_frame(make_synthetic_data())
+    else:
+        raise ValueError(f"Invalid source: {source}")
+    log_memory("loaded", df)
+    return df
+
+
+def make_pipeline(C: float = 1.0, class_weight: str | None = "balanced") -> Pipeline:
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("clf", LogisticRegression(C=C, max_iter=2000, class_weight=class_weight)),
+    ])
 
 
-def train_model(df: pd.DataFrame, seed: int = 7, threshold: float = 0.5) -> dict:
+def train_model(
+    df: pd.DataFrame,
+    seed: int = 7,
+    threshold: float = 0.5,
+    threshold_grid: np.ndarray | None = DEFAULT_THRESHOLD_GRID,
+) -> dict:
     if "age_years" not in df.columns:
         raise ValueError("Training data must include age_years column.")
 
     feature_cols = [c for c in df.columns if c != "at_risk"]
-    X = df[feature_cols].astype(float)
+    # Compact dtypes as loaded; the scaler makes the one float64 copy.
+    X = df[feature_cols]
     y = df["at_risk"].astype(int)
+    log_memory("features", X)
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.25, random_state=seed, stratify=y
     )
+    log_memory("train split", X_train)
 
-    model = Pipeline([
-        ("scaler", StandardScaler()),
-        ("clf", LogisticRegression(max_iter=2000, class_weight="balanced")),
-    ])
+    model = make_pipeline()
     model.fit(X_train, y_train)
+    log_memory("fitted")
 
     prob = model.predict_proba(X_test)[:, 1]
 
-    age_groups = pd.Series(X_test["age_years"].values, index=X_test.index).map(age_group)
-    group_thresholds = {
-        group: best_threshold(y_test[age_groups == group], prob[age_groups == group])
-        for group in sorted(age_groups.unique())
+    evaluation = evaluate_holdout(
+        y_test.to_numpy(), prob, X_test["age_years"].to_numpy(), threshold, threshold_grid
+    )
+    group_thresholds = evaluation["age_group_thresholds"]
+    overall = evaluation["overall"]
+    eval_report = _eval_report(evaluation)
+    eval_report["drift_reference"] = build_reference(
+        X_test.to_numpy(), feature_cols, prob, X_test["age_years"].to_numpy()
+    )
+
+    return {
+        "model": model,
+        "metrics": {
+            "n_rows": int(df.shape[0]),
+            "n_features": int(X.shape[1]),
+            "positive_rate": float(y.mean()),
+            "threshold": float(threshold),
+            "age_group_thresholds": group_thresholds,
+            **overall,
+            "feature_names": feature_cols,
+            "model_version": new_model_version(),
+            "training_mode": "full",
+        },
+        "eval_report": eval_report,
     }
 
-    pred = (prob >= threshold).astype(int)
 
-    cm = confusion_matrix(y_test, pred, labels=[0, 1])
-    tn, fp, fn, tp = int(cm[0, 0]), int(cm[0, 1]), int(cm[1, 0]), int(cm[1, 1])
+# Per-process copies of the CV training matrix. Workers receive it once via
+# the pool initializer; each task then only ships fold indices.
+_CV_X: np.ndarray | None = None
+_CV_Y: np.ndarray | None = None
 
-    eval_report = {
-        "overall": {
-            "accuracy": float(accuracy_score(y_test, pred)),
-            "balanced_accuracy": float(balanced_accuracy_score(y_test, pred)),
-            "precision": float(precision_score(y_test, pred, zero_division=0)),
-            "recall": float(recall_score(y_test, pred, zero_division=0)),
-            "f1": float(f1_score(y_test, pred, zero_division=0)),
-            "roc_auc": float(roc_auc_score(y_test, prob)),
-            "pr_auc": float(average_precision_score(y_test, prob)),
-            "confusion_matrix": {"tn": tn, "fp": fp, "fn": fn, "tp": tp},
-        },
-        "age_group_thresholds": group_thresholds,
+
+def _init_cv_worker(X: np.ndarray, y: np.ndarray, single_threaded: bool) -> None:
+    global _CV_X, _CV_Y
+    _CV_X, _CV_Y = X, y
+    if single_threaded:
+        # One fit per core: stop BLAS/OpenMP from oversubscribing the box.
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(1)
+
+
+def _fit_fold(task: tuple[int, dict, np.ndarray, np.ndarray]) -> tuple[int, np.ndarray]:
+    candidate, params, train_idx, val_idx = task
+    model = make_pipeline(**params)
+    model.fit(_CV_X[train_idx], _CV_Y[train_idx])
+    return candidate, model.predict_proba(_CV_X[val_idx])[:, 1]
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """``-1`` means one worker per CPU."""
+    if n_jobs == 0:
+        raise ValueError("--n-jobs must be a positive integer or -1")
+    return (os.cpu_count() or 1) if n_jobs < 0 else n_jobs
+
+
+def train_cv(
+    df: pd.DataFrame,
+    seed: int = 7,
+    threshold: float = 0.5,
+    threshold_grid: np.ndarray | None = DEFAULT_THRESHOLD_GRID,
+    n_folds: int = 5,
+    n_repeats: int = 1,
+    n_jobs: int = 1,
+    param_grid: list[dict] | None = None,
+) -> dict:
+    """Repeated stratified k-fold training with pooled out-of-fold thresholds.
+
+    Every (candidate params, fold) fit is an independent task run on a
+    process pool. The candidate with the best mean fold ROC AUC is refit on
+    all rows; its out-of-fold probabilities (every row scored once per
+    repeat, by a model that never saw it) tune the age-group thresholds and
+    give the reported metrics.
+    """
+    if "age_years" not in df.columns:
+        raise ValueError("Training data must include age_years column.")
+    param_grid = param_grid or [{"C": 1.0, "class_weight": "balanced"}]
+
+    feature_cols = [c for c in df.columns if c != "at_risk"]
+    # Common compact dtype (float32 for the default plan); shipped to each worker once.
+    X = df[feature_cols].to_numpy()
+    y = df["at_risk"].to_numpy(dtype=int)
+    ages = df["age_years"].to_numpy(dtype=float)
+    log_memory("features", X)
+
+    splitter = RepeatedStratifiedKFold(n_splits=n_folds, n_repeats=n_repeats, random_state=seed)
+    splits = list(splitter.split(X, y))
+    tasks = [(i, params, tr, va) for i, params in enumerate(param_grid) for tr, va in splits]
+
+    workers = min(resolve_n_jobs(n_jobs), len(tasks))
+    if workers == 1:
+        _init_cv_worker(X, y, single_threaded=False)
+        fold_probs = [_fit_fold(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_cv_worker, initargs=(X, y, True)) as pool:
+            fold_probs = list(pool.map(_fit_fold, tasks))
+
+    per_candidate: list[list[np.ndarray]] = [[] for _ in param_grid]
+    for candidate, prob in fold_probs:
+        per_candidate[candidate].append(prob)
+    val_idx = [va for _, va in splits]
+
+    cv_results = []
+    for params, probs in zip(param_grid, per_candidate):
+        aucs = [roc_auc_score(y[idx], p) for idx, p in zip(val_idx, probs)]
+        cv_results.append({
+            "params": params,
+            "roc_auc_mean": float(np.mean(aucs)),
+            "roc_auc_std": float(np.std(aucs)),
+        })
+    best = int(np.argmax([r["roc_auc_mean"] for r in cv_results]))
+
+    # Pool out-of-fold predictions: n_repeats * n_rows (y, prob, age) triples.
+    oof_idx = np.concatenate(val_idx)
+    oof_y, oof_prob, oof_ages = y[oof_idx], np.concatenate(per_candidate[best]), ages[oof_idx]
+
+    evaluation = evaluate_holdout(oof_y, oof_prob, oof_ages, threshold, threshold_grid)
+    group_thresholds = evaluation["age_group_thresholds"]
+    overall = evaluation["overall"]
+
+    model = make_pipeline(**param_grid[best])
+    model.fit(df[feature_cols], df["at_risk"].astype(int))
+    log_memory("fitted")
+
+    cv_summary = {
+        "folds": n_folds,
+        "repeats": n_repeats,
+        "n_jobs": workers,
+        "best_params": param_grid[best],
+        "results": cv_results,
     }
+    eval_report = {**_eval_report(evaluation), "cv": cv_summary}
+    # One repeat covers every row exactly once.
+    first_repeat = np.concatenate(val_idx[:n_folds])
+    eval_report["drift_reference"] = build_reference(
+        X[first_repeat], feature_cols, np.concatenate(per_candidate[best][:n_folds]), ages[first_repeat]
+    )
 
     return {
         "model": model,
@@ -182,15 +388,363 @@ def train_model(df: pd.DataFrame, seed: int = 7, threshold: float = 0.5) -> dict
             "positive_rate": float(y.mean()),
             "threshold": float(threshold),
             "age_group_thresholds": group_thresholds,
-            "accuracy": float(accuracy_score(y_test, pred)),
-            "balanced_accuracy": float(balanced_accuracy_score(y_test, pred)),
-            "precision": float(precision_score(y_test, pred, zero_division=0)),
-            "recall": float(recall_score(y_test, pred, zero_division=0)),
-            "f1": float(f1_score(y_test, pred, zero_division=0)),
-            "roc_auc": float(roc_auc_score(y_test, prob)),
-            "pr_auc": float(average_precision_score(y_test, prob)),
-            "confusion_matrix": {"tn": tn, "fp": fp, "fn": fn, "tp": tp},
+            **overall,
             "feature_names": feature_cols,
+            "model_version": new_model_version(),
+            "training_mode": "cv",
+            "cv": {k: v for k, v in cv_summary.items() if k != "results"},
+        },
+        "eval_report": eval_report,
+    }
+
+
+def _parse_param_grid(c_values: str, class_weights: str) -> list[dict]:
+    cs = [float(x) for x in c_values.split(",") if x.strip()]
+    weights = [None if w.strip().lower() == "none" else w.strip() for w in class_weights.split(",") if w.strip()]
+    return [{"C": c, "class_weight": w} for c in cs for w in weights]
+
+
+DEFAULT_BATCH_SIZE = 65_536
+AUC_BINS = 1 << 16
+
+
+class StreamingEvaluator:
+    """Hold-out metrics accumulated batch by batch in fixed memory.
+
+    Grid threshold curves per age group and the confusion matrix at the
+    reporting threshold are exact. ROC AUC and PR AUC come from
+    ``AUC_BINS``-bin score histograms, so they agree with sklearn to about
+    1 / AUC_BINS.
+    """
+
+    def __init__(self, threshold: float, grid: np.ndarray = DEFAULT_THRESHOLD_GRID):
+        self.threshold = float(threshold)
+        self.grid = np.asarray(grid, dtype=float)
+        # counts[group, label, k]: rows with exactly k grid thresholds <= prob
+        self.counts = np.zeros((len(AGE_GROUPS), 2, len(self.grid) + 1), dtype=np.int64)
+        self.hist = np.zeros((2, AUC_BINS), dtype=np.int64)
+        self.confusion = np.zeros((2, 2), dtype=np.int64)
+
+    def update(self, y: np.ndarray, prob: np.ndarray, ages: np.ndarray) -> None:
+        y = np.asarray(y, dtype=np.int64)
+        groups = np.searchsorted(AGE_GROUP_BOUNDS, ages, side="right")
+        above = np.searchsorted(self.grid, prob, side="right")
+        width = len(self.grid) + 1
+        flat = (groups * 2 + y) * width + above
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        bins = np.minimum((prob * AUC_BINS).astype(np.int64), AUC_BINS - 1)
+        self.hist += np.bincount(y * AUC_BINS + bins, minlength=2 * AUC_BINS).reshape(2, AUC_BINS)
+        pred = (prob >= self.threshold).astype(np.int64)
+        self.confusion += np.bincount(y * 2 + pred, minlength=4).reshape(2, 2)
+
+    def group_curves(self) -> dict[str, dict[str, np.ndarray]]:
+        """Same output as threshold_curve on the grid, for each group seen."""
+        curves = {}
+        for g, group in enumerate(AGE_GROUPS):
+            neg, pos = self.counts[g]
+            n_pos = int(pos.sum())
+            if n_pos + int(neg.sum()) == 0:
+                continue
+            # prob >= grid[k] for rows with above > k: suffix sums from k + 1
+            tp = np.cumsum(pos[::-1])[::-1][1:]
+            fp = np.cumsum(neg[::-1])[::-1][1:]
+            fn = n_pos - tp
+            with np.errstate(divide="ignore", invalid="ignore"):
+                precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+                recall = np.where(n_pos > 0, tp / max(n_pos, 1), 0.0)
+                f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+            curves[group] = {
+                "thresholds": self.grid,
+                "tp": tp,
+                "fp": fp,
+                "fn": fn,
+                "precision": precision,
+                "recall": recall,
+                "f1": f1,
+            }
+        return curves
+
+    def metrics(self) -> dict:
+        """Same keys as evaluate_holdout's overall metrics (minus brier_score)."""
+        tn, fp, fn, tp = (int(x) for x in self.confusion.ravel())
+        n = tn + fp + fn + tp
+        neg, pos = self.hist
+        n_neg, n_pos = int(neg.sum()), int(pos.sum())
+        # Descending score order; pairs sharing a bin count as ties.
+        neg_below = np.cumsum(neg) - neg
+        roc_auc = float((pos * (neg_below + 0.5 * neg)).sum() / max(n_pos * n_neg, 1))
+        tp_cum = np.cumsum(pos[::-1])
+        fp_cum = np.cumsum(neg[::-1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            prec_at = np.where(tp_cum + fp_cum > 0, tp_cum / (tp_cum + fp_cum), 0.0)
+        pr_auc = float((pos[::-1] * prec_at).sum() / max(n_pos, 1))
+        tpr = tp / max(tp + fn, 1)
+        tnr = tn / max(tn + fp, 1)
+        return {
+            "accuracy": (tp + tn) / max(n, 1),
+            "balanced_accuracy": (tpr + tnr) / 2,
+            "precision": tp / (tp + fp) if tp + fp else 0.0,
+            "recall": tpr,
+            "f1": 2 * tp / (2 * tp + fp + fn) if 2 * tp + fp + fn else 0.0,
+            "roc_auc": roc_auc,
+            "pr_auc": pr_auc,
+            "confusion_matrix": {"tn": tn, "fp": fp, "fn": fn, "tp": tp},
+        }
+
+
+def fit_streaming_scaler(
+    dataset: MatrixDataset, stop: int, batch_size: int = DEFAULT_BATCH_SIZE
+) -> tuple[StandardScaler, np.ndarray]:
+    """Two-pass StandardScaler fit over rows ``[0, stop)``, plus class counts.
+
+    Pass one sums features for the mean, pass two sums squared deviations
+    from it, both in float64: no catastrophic cancellation, one batch in
+    memory.
+    """
+    n_features = len(dataset.feature_names)
+    total = np.zeros(n_features)
+    class_counts = np.zeros(2, dtype=np.int64)
+    for X, y in dataset.batches(0, stop, batch_size):
+        total += X.sum(axis=0, dtype=np.float64)
+        class_counts += np.bincount(y.astype(np.int64), minlength=2)[:2]
+    mean = total / max(stop, 1)
+
+    sq_dev = np.zeros(n_features)
+    for X, _ in dataset.batches(0, stop, batch_size):
+        sq_dev += np.square(X.astype(np.float64) - mean).sum(axis=0)
+    var = sq_dev / max(stop, 1)
+
+    scaler = StandardScaler()
+    scaler.mean_ = mean
+    scaler.var_ = var
+    scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+    scaler.n_samples_seen_ = int(stop)
+    scaler.n_features_in_ = n_features
+    scaler.feature_names_in_ = np.asarray(dataset.feature_names, dtype=object)
+    return scaler, class_counts
+
+
+def train_out_of_core(
+    dataset_dir: Path,
+    seed: int = 7,
+    threshold: float = 0.5,
+    threshold_grid: np.ndarray | None = DEFAULT_THRESHOLD_GRID,
+    epochs: int = 5,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    test_fraction: float = 0.25,
+) -> dict:
+    """Train from an on-disk matrix dataset without loading it into memory.
+
+    The last ``test_fraction`` of rows is the hold-out slice. The scaler is
+    fit in two streaming passes over the rest, then an
+    ``SGDClassifier(loss="log_loss")`` with balanced class weights takes
+    ``epochs`` passes of mini-batches in shuffled batch order. Peak memory
+    is a few batches regardless of the number of rows.
+    """
+    if threshold_grid is None:
+        raise ValueError("Out-of-core training tunes thresholds on the grid; drop --exact-thresholds")
+    dataset = MatrixDataset(dataset_dir)
+    feature_cols = dataset.feature_names
+    if "age_years" not in feature_cols:
+        raise ValueError("Training data must include age_years column.")
+    n_rows = dataset.n_rows
+    split = int(round(n_rows * (1.0 - test_fraction)))
+    if split < 1 or split >= n_rows:
+        raise ValueError(f"Need rows on both sides of the hold-out split, got {n_rows} rows")
+
+    scaler, class_counts = fit_streaming_scaler(dataset, split, batch_size)
+    if class_counts.min() == 0:
+        raise ValueError("Training rows contain a single class")
+    # "balanced" weights, as LogisticRegression(class_weight="balanced") uses
+    class_weight = split / (2.0 * class_counts)
+    mean, scale = scaler.mean_, scaler.scale_
+
+    clf = SGDClassifier(
+        loss="log_loss",
+        alpha=1.0 / split,
+        learning_rate="invscaling",
+        eta0=0.05,
+        random_state=seed,
+    )
+    rng = np.random.default_rng(seed)
+    n_batches = -(-split // batch_size)
+    for _ in range(max(epochs, 1)):
+        for X, y in dataset.batches(0, split, batch_size, order=rng.permutation(n_batches)):
+            order = rng.permutation(len(y))
+            Z = (X[order].astype(np.float64) - mean) / scale
+            y = y[order].astype(int)
+            clf.partial_fit(Z, y, classes=np.array([0, 1]), sample_weight=class_weight[y])
+    model = Pipeline([("scaler", scaler), ("clf", clf)])
+
+    kernel = compile_pipeline(model, feature_cols)
+    age_idx = feature_cols.index("age_years")
+    evaluator = StreamingEvaluator(threshold, threshold_grid)
+    reference: ReferenceBuilder | None = None
+    for X, y in dataset.batches(split, n_rows, batch_size):
+        X = X.astype(np.float64)
+        prob = kernel.predict_positive(X)
+        evaluator.update(y, prob, X[:, age_idx])
+        if reference is None:
+            # Drift bin edges from the first hold-out batch.
+            reference = ReferenceBuilder.from_sample(X, feature_cols)
+        reference.update(X, prob, X[:, age_idx])
+
+    group_curves = evaluator.group_curves()
+    group_thresholds = {
+        group: float(curve["thresholds"][int(np.argmax(curve["f1"]))])
+        for group, curve in sorted(group_curves.items())
+    }
+    overall = evaluator.metrics()
+
+    eval_report = {
+        "overall": overall,
+        "age_group_thresholds": group_thresholds,
+        "threshold_curves": {group: _curve_report(curve) for group, curve in sorted(group_curves.items())},
+        "auc_bins": AUC_BINS,
+        "drift_reference": reference.to_dict(),
+    }
+
+    return {
+        "model": model,
+        "metrics": {
+            "n_rows": int(n_rows),
+            "n_features": len(feature_cols),
+            "positive_rate": float(dataset.meta.get("positive_rate", 0.0)),
+            "threshold": float(threshold),
+            "age_group_thresholds": group_thresholds,
+            **overall,
+            "feature_names": list(feature_cols),
+            "model_version": new_model_version(),
+            "training_mode": "out-of-core",
+            "n_rows_holdout": int(n_rows - split),
+        },
+        "eval_report": eval_report,
+    }
+
+
+def train_incremental(
+    prev_model: Pipeline,
+    prev_metrics: dict,
+    df_new: pd.DataFrame,
+    seed: int = 7,
+    threshold: float = 0.5,
+    threshold_grid: np.ndarray | None = DEFAULT_THRESHOLD_GRID,
+    epochs: int = 5,
+) -> dict:
+    """Update a trained scaler + linear pipeline with newly labeled rows only.
+
+    The scaler's running mean/variance absorb the new rows, the previous
+    coefficients are re-expressed in the updated scaled space, and an
+    ``SGDClassifier(loss="log_loss")`` warm-started from them takes a few
+    passes over the new rows. A quarter of the new rows is held out to
+    re-tune age-group thresholds; groups too small to tune keep their
+    previous threshold. Cost is proportional to ``len(df_new)``.
+    """
+    feature_cols = list(prev_metrics.get("feature_names") or [])
+    missing = [c for c in feature_cols if c not in df_new.columns]
+    if not feature_cols or missing:
+        raise ValueError(f"New rows are missing trained features: {missing or 'feature_names'}")
+    if "at_risk" not in df_new.columns:
+        raise ValueError("New rows must include target column 'at_risk'")
+
+    scaler = prev_model.named_steps["scaler"]
+    prev_clf = prev_model.named_steps["clf"]
+    if getattr(scaler, "n_samples_seen_", None) is None:
+        raise ValueError("Previous scaler has no running statistics; retrain with --mode full")
+
+    # Widen the compact (float32) columns here: the warm-started SGD keeps the
+    # previous float64 coef_ and only accepts float64 inputs.
+    X = df_new[feature_cols].astype(np.float64)
+    y = df_new["at_risk"].astype(int)
+    n_new = len(y)
+    can_split = n_new >= 8 and y.nunique() == 2 and y.value_counts().min() >= 2
+    if can_split:
+        X_fit, X_hold, y_fit, y_hold = train_test_split(
+            X, y, test_size=0.25, random_state=seed, stratify=y
+        )
+    else:
+        X_fit, y_fit = X, y
+        X_hold, y_hold = X.iloc[:0], y.iloc[:0]
+
+    old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+    # Rows the previous model was actually fit on (its training split), not
+    # metrics["n_rows"], which also counts the hold-out.
+    n_prev = int(np.max(scaler.n_samples_seen_))
+    prev_pos = n_prev * float(prev_metrics.get("positive_rate", 0.0))
+
+    scaler = copy.deepcopy(scaler)
+    scaler.partial_fit(X_fit)
+
+    # Same decision function, expressed for the updated scaler:
+    # w . (x - m0) / s0 + b  ==  (w * s1 / s0) . (x - m1) / s1 + b + w . (m1 - m0) / s0
+    w_old = np.asarray(prev_clf.coef_, dtype=float).ravel()
+    b_old = float(np.asarray(prev_clf.intercept_).ravel()[0])
+    coef = (w_old * scaler.scale_ / old_scale).reshape(1, -1)
+    intercept = np.array([b_old + float(w_old @ ((scaler.mean_ - old_mean) / old_scale))])
+
+    # "balanced" class weights from all labels seen so far
+    n_total = n_prev + n_new
+    n_pos = prev_pos + float(y.sum())
+    n_neg = n_total - n_pos
+    class_weight = {
+        0: n_total / (2.0 * max(n_neg, 1.0)),
+        1: n_total / (2.0 * max(n_pos, 1.0)),
+    }
+
+    clf = SGDClassifier(
+        loss="log_loss",
+        alpha=1.0 / max(n_total, 1),
+        learning_rate="constant",
+        eta0=0.01,
+        random_state=seed,
+    )
+    clf.coef_ = coef
+    clf.intercept_ = intercept
+    clf.classes_ = np.array([0, 1])
+    clf.t_ = 1.0
+
+    Z = scaler.transform(X_fit)
+    y_arr = y_fit.to_numpy()
+    weights = np.where(y_arr == 1, class_weight[1], class_weight[0])
+    rng = np.random.default_rng(seed)
+    for _ in range(max(epochs, 1)):
+        order = rng.permutation(len(y_arr))
+        clf.partial_fit(Z[order], y_arr[order], sample_weight=weights[order])
+
+    model = Pipeline([("scaler", scaler), ("clf", clf)])
+
+    prev_thresholds = dict(prev_metrics.get("age_group_thresholds") or {})
+    group_thresholds = dict(prev_thresholds)
+    eval_report: dict = {"age_group_thresholds": group_thresholds}
+    overall: dict = {}
+    if y_hold.nunique() == 2:
+        prob = model.predict_proba(X_hold)[:, 1]
+        evaluation = evaluate_holdout(
+            y_hold.to_numpy(), prob, X_hold["age_years"].to_numpy(), threshold, threshold_grid
+        )
+        for group, stats in evaluation["groups"].items():
+            if stats["n"] >= 20 and 0 < stats["positive_rate"] < 1:
+                group_thresholds[group] = stats["threshold"]
+        overall = evaluation["overall"]
+        eval_report.update(_eval_report(evaluation))
+        eval_report["age_group_thresholds"] = group_thresholds
+        eval_report["drift_reference"] = build_reference(
+            X_hold.to_numpy(), feature_cols, prob, X_hold["age_years"].to_numpy()
+        )
+
+    return {
+        "model": model,
+        "metrics": {
+            **{k: v for k, v in prev_metrics.items() if k not in overall},
+            "n_rows": int(n_total),
+            "positive_rate": float(n_pos / max(n_total, 1)),
+            "threshold": float(threshold),
+            "age_group_thresholds": group_thresholds,
+            **overall,
+            "model_version": new_model_version(),
+            "parent_version": prev_metrics.get("model_version"),
+            "training_mode": "incremental",
+            "n_rows_incremental": int(n_new),
         },
         "eval_report": eval_report,
     }
@@ -198,33 +752,243 @@ def train_model(df: pd.DataFrame, seed: int = 7, threshold: float = 0.5) -> dict
 
 def save_artifacts(model, metrics: dict, eval_report: dict | None = None) -> TrainOutputs:
     ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Publish an immutable version directory and point CURRENT at it; the
+    # service picks it up from there without a restart.
+    version = metrics.get("model_version") or new_model_version()
+    compiled = compile_pipeline(model, metrics.get("feature_names"))
+    published = registry.publish(
+        version,
+        model,
+        metrics,
+        eval_report,
+        ARTIFACTS_DIR,
+        compact_json=(lambda m: compact_model_json(compiled, m)) if compiled is not None else None,
+    )
+    metrics["model_version"] = published.version
+
+    # Top-level copies for predict.py and older deployments
     model_path = ARTIFACTS_DIR / "model.joblib"
     metrics_path = ARTIFACTS_DIR / "metrics.json"
     joblib.dump(model, model_path)
     metrics_path.write_text(json.dumps(metrics, indent=2))
     if eval_report is not None:
         EVAL_REPORT_PATH.write_text(json.dumps(eval_report, indent=2))
+    if compiled is not None:
+        (ARTIFACTS_DIR / COMPACT_FILENAME).write_text(compact_model_json(compiled, metrics))
     return TrainOutputs(model_path=model_path, metrics_path=metrics_path)
 
 
+def load_previous_artifacts(artifacts_dir: Path = ARTIFACTS_DIR) -> tuple[Pipeline, dict]:
+    """The model and metrics CURRENT points at (the one being served)."""
+    paths = registry.resolve(artifacts_dir)
+    if not paths.model_path.exists() or not paths.metrics_path.exists():
+        raise FileNotFoundError(
+            f"No previous model in {paths.directory}. Run a full training first: python ml/train.py"
+        )
+    return joblib.load(paths.model_path), json.loads(paths.metrics_path.read_text())
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Train ML model for vitals risk prediction")
     parser.add_argument("--source", choices=["db", "csv", "synthetic"], default="db")
     parser.add_argument("--csv", type=str, default="")
     parser.add_argument("--limit", type=int, default=None)
     parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument(
+        "--synthetic-dir",
+        type=str,
+        default="",
+        help="With --source synthetic, train on an on-disk dataset from ml/synthetic.py instead of 2,000 in-memory rows.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["full", "incremental", "cv", "out-of-core"],
+        default="full",
+        help=(
+            "full: fit from scratch. incremental: update the current model with newly labeled rows only. "
+            "cv: repeated k-fold, thresholds tuned on pooled out-of-fold predictions. "
+            "out-of-core: stream mini-batches from an on-disk matrix dataset."
+        ),
+    )
+    parser.add_argument(
+        "--matrix-dir",
+        type=str,
+        default="",
+        help=(
+            "In --mode out-of-core, where --source db/csv rows are exported before training "
+            "(default: ml/data/matrix)."
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Rows per mini-batch in --mode out-of-core.",
+    )
+    parser.add_argument("--cv-folds", type=int, default=5, help="Folds per repeat in --mode cv.")
+    parser.add_argument("--cv-repeats", type=int, default=1, help="Repeats of k-fold in --mode cv.")
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=1,
+        help="Worker processes for --mode cv fold fits (-1 = one per CPU).",
+    )
+    parser.add_argument(
+        "--grid-c",
+        type=str,
+        default="1.0",
+        help="Comma-separated LogisticRegression C values to search in --mode cv.",
+    )
+    parser.add_argument(
+        "--grid-class-weight",
+        type=str,
+        default="balanced",
+        help="Comma-separated class weights to search in --mode cv ('balanced' and/or 'none').",
+    )
+    parser.add_argument(
+        "--epochs",
+        type=int,
+        default=5,
+        help="Passes over the new rows in --mode incremental, or over all rows in --mode out-of-core.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="With --source db, stream the view through a server-side cursor in chunks of this many rows.",
+    )
+    parser.add_argument(
+        "--db-partitions",
+        type=int,
+        default=None,
+        help="With --source db, read the view as this many submittedAt ranges fetched in parallel.",
+    )
+    parser.add_argument(
+        "--db-pool-size",
+        type=int,
+        default=None,
+        help="Pooled connections for --db-partitions (default: min(partitions, 8)).",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="With --source db, keep a local snapshot of the view and only fetch rows graded since the last run.",
+    )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Rebuild the local snapshot from a full scan of the view (implies --cache).",
+    )
+    parser.add_argument(
+        "--exact-thresholds",
+        action="store_true",
+        help="Tune age-group thresholds at every distinct probability instead of the 0.1-0.9 grid.",
+    )
     args = parser.parse_args()
 
     csv_path = Path(args.csv).expanduser().resolve() if args.csv else None
-    df = load_data(args.source, csv_path, args.limit if args.source == "db" else None)
-    out = train_model(df, threshold=args.threshold)
+    synthetic_dir = Path(args.synthetic_dir).expanduser().resolve() if args.synthetic_dir else None
+    grid = None if args.exact_thresholds else DEFAULT_THRESHOLD_GRID
+
+    prev_model, prev_metrics, since = None, {}, None
+    if args.mode == "incremental":
+        prev_model, prev_metrics = load_previous_artifacts()
+        if args.source == "db":
+            since = prev_metrics.get("data_watermark")
+            if since is None:
+                raise ValueError(
+                    "Current model has no data_watermark; run a full --source db training first."
+                )
+
+    if args.mode == "out-of-core":
+        if args.exact_thresholds:
+            parser.error("--exact-thresholds is not supported with --mode out-of-core")
+        dataset_dir = _prepare_matrix(args, csv_path, synthetic_dir)
+        out = train_out_of_core(
+            dataset_dir,
+            threshold=args.threshold,
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+        )
+        outputs = save_artifacts(out["model"], out["metrics"], out.get("eval_report"))
+        _print_summary(args, outputs, out["metrics"])
+        return
+
+    df = load_data(
+        args.source,
+        csv_path,
+        args.limit if args.source in ("db", "synthetic") else None,
+        chunk_size=args.chunk_size,
+        cache=args.cache,
+        refresh_cache=args.refresh_cache,
+        since=since,
+        synthetic_dir=synthetic_dir,
+        partitions=args.db_partitions,
+        pool_size=args.db_pool_size,
+    )
+    watermark = df.attrs.get("watermark")
+
+    if args.mode == "incremental":
+        if df.empty:
+            print("No newly labeled rows; current model is up to date.")
+            return
+        out = train_incremental(
+            prev_model,
+            prev_metrics,
+            df,
+            threshold=args.threshold,
+            threshold_grid=grid,
+            epochs=args.epochs,
+        )
+    elif args.mode == "cv":
+        out = train_cv(
+            df,
+            threshold=args.threshold,
+            threshold_grid=grid,
+            n_folds=args.cv_folds,
+            n_repeats=args.cv_repeats,
+            n_jobs=args.n_jobs,
+            param_grid=_parse_param_grid(args.grid_c, args.grid_class_weight),
+        )
+    else:
+        out = train_model(df, threshold=args.threshold, threshold_grid=grid)
+    if watermark is not None:
+        out["metrics"]["data_watermark"] = watermark
     outputs = save_artifacts(out["model"], out["metrics"], out.get("eval_report"))
+    _print_summary(args, outputs, out["metrics"])
+
+
+def _prepare_matrix(args: argparse.Namespace, csv_path: Path | None, synthetic_dir: Path | None) -> Path:
+    """Dataset directory for --mode out-of-core, exporting db/csv rows first."""
+    if args.source == "synthetic":
+        if synthetic_dir is None:
+            raise ValueError("--mode out-of-core with --source synthetic needs --synthetic-dir (see ml/synthetic.py)")
+        return synthetic_dir
+    matrix_dir = Path(args.matrix_dir).expanduser().resolve() if args.matrix_dir else MATRIX_DIR
+    if args.source == "db":
+        kwargs = {"chunk_size": args.chunk_size} if args.chunk_size else {}
+        return export_training_matrix(matrix_dir, limit=args.limit, **kwargs)
+    if csv_path is None or not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found: {csv_path}")
+    feature_names, chunks = frame_chunks_to_matrix(
+        pd.read_csv(csv_path, chunksize=args.chunk_size or DEFAULT_BATCH_SIZE)
+    )
+    return write_dataset(
+        matrix_dir,
+        chunks,
+        feature_names,
+        extra_meta={"source": "csv", "csv": str(csv_path)},
+    )
+
 
+def _print_summary(args: argparse.Namespace, outputs: TrainOutputs, metrics: dict) -> None:
     print("Training complete")
     print(f"Source: {args.source}")
+    print(f"Mode:    {args.mode}")
     print(f"Model:   {outputs.model_path}")
     print(f"Metrics: {outputs.metrics_path}")
-    print(json.dumps(out["metrics"], indent=2))
+    print(json.dumps(metrics, indent=2))
 
 
 if __name__ == "__main__":